@@ -0,0 +1,666 @@
+"""
+Knowledge Base API - Headless HTTP service for bots and intranet integrations
+
+Serves the same DocumentProcessor / VectorStoreManager / QAChain objects as the
+Streamlit app from a small asyncio HTTP/1.1 server with keep-alive, request
+limits and graceful shutdown. Blocking work runs in a thread pool, so one
+process handles many concurrent clients without Streamlit's script reruns.
+
+Endpoints:
+    POST /ask      {"question", "tenant"?, "sources"?, "k"?, "stream"?, "user"?}
+    POST /search   {"query", "tenant"?, "sources"?, "k"?}
+    POST /ingest?filename=policy.pdf&tenant=finance   (raw file as the body)
+    GET  /stats?tenant=finance
+    GET  /metrics
+    GET  /health
+
+With --workers N, N processes accept connections on the same port and serve
+read-only, memory-mapped index generations; this process ingests uploads and
+publishes a new generation after each one (see utils/shared_index.py).
+
+Usage:
+    python api_server.py --port 8000
+    python api_server.py --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from dotenv import load_dotenv
+from utils.answer_router import AnswerRouter, tier_usage
+from utils.confidence import ConfidenceCalibrator
+from utils.document_processor import DocumentProcessor
+from utils.extractors import supported_extensions
+from utils.metrics import metrics
+from utils.model_manager import ModelLifecycleManager
+from utils.qa_chain import QAChain
+from utils.query_log import QueryLog
+from utils.scheduler import GenerationScheduler
+from utils.shared_index import CoordinatorClient, IndexCoordinator, SharedIndexRegistry
+from utils.tenant_registry import KnowledgeBaseRegistry
+from utils.tokenizer import chunk_token_budget, context_token_budget
+from utils.upload_archive import UploadArchive
+from utils.vector_store import create_embeddings
+from utils.warmup import Warmup
+
+# Largest number of chunks a request may retrieve
+MAX_K = 50
+
+STATUS_TEXT = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 411: "Length Required", 413: "Payload Too Large",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def build_doc_processor(retrieval_k: int, context_window: int) -> DocumentProcessor:
+    """
+    Chunker for every ingest path (in process or through the coordinator)
+
+    Small chunks sized in model tokens, so retrieval_k hits with
+    context_window neighbors on each side still fit the LLM context.
+    """
+    budget = chunk_token_budget(context_tokens=int(os.getenv("KB_LLM_CONTEXT_TOKENS", "2048")),
+                                k=retrieval_k, window=context_window)
+    return DocumentProcessor(
+        chunk_size=int(os.getenv("KB_CHUNK_TOKENS", str(budget))),
+        chunk_overlap=int(os.getenv("KB_CHUNK_OVERLAP_TOKENS", "40")),
+        unit="tokens"
+    )
+
+class KnowledgeBaseService:
+    def __init__(self, registry: KnowledgeBaseRegistry, query_log: Optional[QueryLog] = None,
+                 base_url: Optional[str] = None, upload_dir: Optional[str] = "./data/uploads",
+                 scheduler: Optional[GenerationScheduler] = None,
+                 model_manager: Optional[ModelLifecycleManager] = None,
+                 coordinator: Optional[CoordinatorClient] = None):
+        """
+        Blocking knowledge base operations behind the HTTP API
+
+        Args:
+            registry: Tenant registry (same layout as the Streamlit app)
+            query_log: Optional query log for analytics
+            base_url: Ollama server URL for generation
+            upload_dir: Archive of ingested files (content-addressed, see
+                UploadArchive); None keeps no copies. Required with a coordinator,
+                which reads the archived file
+            scheduler: Queue for generations on the Ollama server
+            model_manager: Keeps the Ollama models loaded and owns the LLM client
+            coordinator: Process that ingests for read-only worker processes
+        """
+        self.registry = registry
+        self.query_log = query_log
+        self.base_url = base_url
+        if upload_dir is None and coordinator is not None:
+            raise ValueError("Ingesting through a coordinator needs an upload_dir")
+        self.archive = UploadArchive(upload_dir) if upload_dir else None
+        self.scheduler = scheduler
+        self.coordinator = coordinator
+        self.retrieval_k = int(os.getenv("KB_RETRIEVAL_K", "3"))
+        self.context_window = int(os.getenv("KB_CONTEXT_WINDOW", "1"))
+        self.context_tokens = context_token_budget(int(os.getenv("KB_LLM_CONTEXT_TOKENS", "2048")))
+        self.doc_processor = build_doc_processor(self.retrieval_k, self.context_window)
+        # Relevance thresholds for confidence and "not in the documents" replies
+        self.calibrator = ConfidenceCalibrator.load()
+        self.model_manager = model_manager or ModelLifecycleManager(base_url=base_url)
+        # The Ollama client is shared; each request gets its own retriever
+        self._llm = self.model_manager.llm
+
+    def _existing(self, tenant: str) -> "VectorStoreManager":
+        """A tenant's index for reading; unknown tenants are not created (only uploads create them)"""
+        if not self.registry.exists(tenant):
+            raise HTTPError(404, f"Unknown knowledge base '{tenant}'")
+        return self.registry.get(tenant)
+
+    def _answer_router(self, tenant: str, k: int, sources: Optional[List[str]]) -> AnswerRouter:
+        manager = self._existing(tenant)
+        search_filter = {"source": sources} if sources else None
+        retriever = manager.get_retriever(k=k, filter=search_filter, window=self.context_window,
+                                          max_context_tokens=self.context_tokens)
+        if retriever is None:
+            raise HTTPError(409, f"Knowledge base '{tenant}' has no documents")
+        qa_chain = QAChain(retriever, llm=self._llm, scheduler=self.scheduler, calibrator=self.calibrator)
+        return AnswerRouter(qa_chain, known_sources=sources or manager.get_sources(),
+                            source_terms=manager.source_terms)
+
+    def ask(self, tenant: str, question: str, k: int = 4, sources: Optional[List[str]] = None,
+            on_token: Optional[Callable[[str], None]] = None, user: Optional[str] = None) -> Dict:
+        start = time.perf_counter()
+        response = self._answer_router(tenant, k, sources).answer(question, on_token=on_token, user=user)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if response.get("tier") != "error":
+            self.model_manager.record_request(latency_ms, response["tier"])
+
+        timings = response.get("timings", {})
+        if self.query_log:
+            self.query_log.append(
+                question, response["answer"], response["confidence"],
+                latency_ms=latency_ms,
+                cache_hit=response.get("tier") == "faq" or (
+                    "retrieval" in timings and "query_embedding" not in timings
+                ),
+                tenant=tenant
+            )
+        return {
+            "answer": response["answer"],
+            "sources": response["sources"],
+            "confidence": response["confidence"],
+            "tier": response.get("tier"),
+            "degraded": response.get("degraded"),
+            "timings": timings
+        }
+
+    def search(self, tenant: str, query: str, k: int = 4,
+               sources: Optional[List[str]] = None) -> List[Dict]:
+        search_filter = {"source": sources} if sources else None
+        results = self._existing(tenant).search_with_score(query, k=k, filter=search_filter)
+        return [
+            {
+                "source": doc.metadata.get("source"),
+                "chunk_id": doc.metadata.get("chunk_id"),
+                "score": score,
+                "text": doc.page_content
+            }
+            for doc, score in results
+        ]
+
+    def ingest(self, tenant: str, filename: str, data: bytes) -> Dict:
+        filename = os.path.basename(filename)
+        if os.path.splitext(filename)[1].lower() not in supported_extensions():
+            raise HTTPError(400, f"Supported file types: {', '.join(supported_extensions())}")
+
+        if self.coordinator is not None:
+            # This worker only reads published generations; the coordinator
+            # writes, reading the file from the archive
+            digest = self.archive.archive(data, filename, wait=True, metadata={"tenant": tenant})
+            try:
+                result = self.coordinator.ingest(tenant, filename, self.archive.path_for(digest))
+            except Exception as e:
+                raise HTTPError(500, str(e))
+            self.registry.refresh(tenant)
+            return {"filename": filename, "chunks": result["chunks"], "duplicates": result.get("duplicates", 0),
+                    "generation": result["generation"]}
+
+        if self.archive is not None:
+            self.archive.archive(data, filename, metadata={"tenant": tenant})
+        documents = self.doc_processor.process_document(data, filename)
+        manager = self.registry.get(tenant)
+        if not manager.add_documents(documents):
+            raise HTTPError(500, f"Failed to add {filename} to the knowledge base")
+        self.registry.refresh(tenant)
+        return {"filename": filename, "chunks": len(documents),
+                "duplicates": (manager.last_dedup or {}).get("collapsed", 0)}
+
+    def stats(self, tenant: Optional[str] = None) -> Dict:
+        stats = {
+            "registry": self.registry.get_stats(),
+            "stages": metrics.summary(),
+            "answer_tiers": tier_usage(),
+            "models": self.model_manager.get_stats(),
+            "counters": metrics.counters()
+        }
+        if tenant:
+            manager = self._existing(tenant)
+            stats["knowledge_base"] = {**manager.get_stats(), "sources": manager.get_sources(),
+                                       "dedup": manager.get_dedup_stats()}
+            stats["query_cache"] = manager.get_cache_stats()
+            if self.query_log:
+                # Rollups hold question text, so they are only shown per tenant
+                stats["queries"] = self.query_log.get_rollups(tenant)
+        if self.archive:
+            stats["uploads"] = self.archive.get_stats()
+        if self.scheduler:
+            stats["scheduler"] = self.scheduler.get_stats()
+        return stats
+
+class APIServer:
+    def __init__(self, service: KnowledgeBaseService, host: str = "127.0.0.1", port: int = 8000,
+                 max_concurrency: int = 32, max_body_bytes: int = 20 * 1024 * 1024,
+                 max_header_bytes: int = 16 * 1024, keepalive_timeout: float = 15.0,
+                 default_tenant: str = "default", reuse_port: bool = False):
+        """
+        Initialize API server
+
+        Args:
+            service: Knowledge base operations to expose
+            host: Interface to bind
+            port: Port to listen on
+            max_concurrency: Requests processed at once; extra work gets 503
+            max_body_bytes: Largest accepted request body (uploads included)
+            max_header_bytes: Largest accepted request line + headers
+            keepalive_timeout: Seconds an idle connection is kept open
+            default_tenant: Knowledge base used when a request names none
+            reuse_port: Let several worker processes listen on the same port
+                (the kernel spreads connections between them)
+        """
+        self.service = service
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.max_body_bytes = max_body_bytes
+        self.max_header_bytes = max_header_bytes
+        self.keepalive_timeout = keepalive_timeout
+        self.default_tenant = default_tenant
+        self.reuse_port = reuse_port
+
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="kb-api")
+        self._server = None
+        self._inflight = 0
+        self._idle = set()
+        self._connections = set()
+        self._closing = False
+        self._shutdown = None
+
+        self.routes = {
+            ("POST", "/ask"): self.handle_ask,
+            ("POST", "/search"): self.handle_search,
+            ("POST", "/ingest"): self.handle_ingest,
+            ("GET", "/stats"): self.handle_stats,
+            ("GET", "/metrics"): self.handle_metrics,
+            ("GET", "/health"): self.handle_health
+        }
+        # Cheap endpoints stay available when the worker pool is saturated
+        self.limited_routes = {"/ask", "/search", "/ingest"}
+
+    async def start(self):
+        self._shutdown = asyncio.Event()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=self.max_header_bytes,
+            reuse_port=self.reuse_port or None
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"✅ Knowledge base API listening on http://{self.host}:{self.port}")
+
+    async def serve(self, grace_period: float = 30.0):
+        """Serve until SIGINT/SIGTERM, then shut down gracefully"""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._shutdown.set)
+            except NotImplementedError:
+                pass
+        await self._shutdown.wait()
+        await self.shutdown(grace_period)
+
+    async def shutdown(self, grace_period: float = 30.0):
+        """Stop accepting connections and let in-flight requests finish"""
+        print("Shutting down: finishing in-flight requests...")
+        self._closing = True
+        self._server.close()
+        for writer in list(self._idle):
+            writer.close()
+
+        deadline = time.monotonic() + grace_period
+        while self._inflight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in list(self._connections):
+            task.cancel()
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.service.query_log:
+            self.service.query_log.close()
+        print("✅ Knowledge base API stopped")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            keep_alive = True
+            while keep_alive and not self._closing:
+                self._idle.add(writer)
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send_json(writer, 431, {"error": "Request headers too large"}, False)
+                    break
+                finally:
+                    self._idle.discard(writer)
+
+                keep_alive = await self._handle_request(head, reader, writer)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Connection error: {str(e)}")
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _handle_request(self, head: bytes, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> bool:
+        """Parse and answer one request; returns whether to keep the connection open"""
+        try:
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            await self._send_json(writer, 400, {"error": "Malformed request"}, False)
+            return False
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            await self._send_json(writer, 411, {"error": "Send a Content-Length body"}, False)
+            return False
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            await self._send_json(writer, 400, {"error": "Invalid Content-Length"}, False)
+            return False
+        if length > self.max_body_bytes:
+            await self._send_json(writer, 413, {"error": f"Body exceeds {self.max_body_bytes} bytes"}, False)
+            return False
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), self.keepalive_timeout) if length else b""
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return False
+
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            status = 405 if any(path == url.path for _, path in self.routes) else 404
+            await self._send_json(writer, status, {"error": STATUS_TEXT[status]}, keep_alive)
+            return keep_alive
+
+        limited = url.path in self.limited_routes
+        if limited and self._inflight >= self.max_concurrency:
+            metrics.increment("api_rejected")
+            await self._send_json(writer, 503, {"error": "Server busy, retry shortly"}, keep_alive,
+                                  {"Retry-After": "1"})
+            return keep_alive
+
+        request = {
+            "query": {key: values[-1] for key, values in parse_qs(url.query).items()},
+            "headers": headers,
+            "body": body
+        }
+        if limited:
+            self._inflight += 1
+        start = time.perf_counter()
+        try:
+            await handler(request, writer, keep_alive and not self._closing)
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": e.message}, keep_alive)
+        except ValueError as e:
+            await self._send_json(writer, 400, {"error": str(e)}, keep_alive)
+        except ConnectionError:
+            return False
+        except Exception as e:
+            print(f"❌ Error handling {method} {url.path}: {str(e)}")
+            await self._send_json(writer, 500, {"error": str(e)}, keep_alive)
+        finally:
+            if limited:
+                self._inflight -= 1
+            metrics.observe(f"api{url.path.replace('/', '_')}", (time.perf_counter() - start) * 1000)
+        return keep_alive and not self._closing
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool,
+                         extra_headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        await self._send(writer, status, body, "application/json", keep_alive, extra_headers)
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str,
+                    keep_alive: bool, extra_headers: Optional[Dict[str, str]] = None):
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **(extra_headers or {})
+        }
+        writer.write(self._status_line(status, headers) + body)
+        await writer.drain()
+
+    def _status_line(self, status: int, headers: Dict[str, str]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    def _run(self, fn: Callable, *args, **kwargs):
+        """Run blocking knowledge base work on the thread pool"""
+        return asyncio.get_running_loop().run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    def _parse_json(self, request: Dict) -> Dict:
+        try:
+            payload = json.loads(request["body"] or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return payload
+
+    def _tenant(self, name: Optional[str]) -> str:
+        return self.service.registry.validate_name(name or self.default_tenant)
+
+    @staticmethod
+    def _k(payload: Dict, default: int) -> int:
+        k = payload.get("k", default)
+        # bool is an int subclass, but true/false is not a count
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= MAX_K:
+            raise HTTPError(400, f"'k' must be an integer from 1 to {MAX_K}")
+        return k
+
+    @staticmethod
+    def _sources(payload: Dict) -> Optional[List[str]]:
+        sources = payload.get("sources")
+        if sources is not None and (
+            not isinstance(sources, list) or not all(isinstance(source, str) for source in sources)
+        ):
+            raise HTTPError(400, "'sources' must be a list of file names")
+        return sources
+
+    async def handle_ask(self, request: Dict, writer: asyncio.StreamWriter, keep_alive: bool):
+        payload = self._parse_json(request)
+        question = str(payload.get("question", "")).strip()
+        if not question:
+            raise HTTPError(400, "Missing 'question'")
+        tenant = self._tenant(payload.get("tenant"))
+        k = self._k(payload, self.service.retrieval_k)
+        sources = self._sources(payload)
+        user = payload.get("user") or request["headers"].get("x-user")
+
+        if not payload.get("stream"):
+            result = await self._run(self.service.ask, tenant, question, k, sources, user=user)
+            await self._send_json(writer, 200, result, keep_alive)
+            return
+
+        # Stream tokens as NDJSON chunks while the answer is generated
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        on_token = lambda token: loop.call_soon_threadsafe(events.put_nowait, {"token": token})
+        future = self._run(self.service.ask, tenant, question, k, sources, on_token, user)
+        future.add_done_callback(lambda _: events.put_nowait(None))
+
+        headers = {
+            "Content-Type": "application/x-ndjson",
+            "Transfer-Encoding": "chunked",
+            "Connection": "keep-alive" if keep_alive else "close"
+        }
+        started = False
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            if not started:
+                writer.write(self._status_line(200, headers))
+                started = True
+            await self._write_chunk(writer, event)
+
+        try:
+            result = future.result()
+        except Exception:
+            # Headers are already sent; all we can do is drop the connection
+            if started:
+                raise ConnectionError("stream aborted")
+            raise
+        if not started:
+            writer.write(self._status_line(200, headers))
+        await self._write_chunk(writer, {"done": True, **result})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _write_chunk(self, writer: asyncio.StreamWriter, payload: Dict):
+        data = (json.dumps(payload, default=str) + "\n").encode("utf-8")
+        writer.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        await writer.drain()
+
+    async def handle_search(self, request: Dict, writer: asyncio.StreamWriter, keep_alive: bool):
+        payload = self._parse_json(request)
+        query = str(payload.get("query", "")).strip()
+        if not query:
+            raise HTTPError(400, "Missing 'query'")
+        tenant = self._tenant(payload.get("tenant"))
+        k = self._k(payload, 4)
+        sources = self._sources(payload)
+        results = await self._run(self.service.search, tenant, query, k, sources)
+        await self._send_json(writer, 200, {"results": results}, keep_alive)
+
+    async def handle_ingest(self, request: Dict, writer: asyncio.StreamWriter, keep_alive: bool):
+        filename = request["query"].get("filename")
+        if not filename or not request["body"]:
+            raise HTTPError(400, "Send the file as the body with ?filename=")
+        tenant = self._tenant(request["query"].get("tenant"))
+        result = await self._run(self.service.ingest, tenant, filename, request["body"])
+        await self._send_json(writer, 200, result, keep_alive)
+
+    async def handle_stats(self, request: Dict, writer: asyncio.StreamWriter, keep_alive: bool):
+        tenant = request["query"].get("tenant")
+        stats = await self._run(self.service.stats, self._tenant(tenant) if tenant else None)
+        stats["server"] = {"inflight": self._inflight, "connections": len(self._connections)}
+        await self._send_json(writer, 200, stats, keep_alive)
+
+    async def handle_metrics(self, request: Dict, writer: asyncio.StreamWriter, keep_alive: bool):
+        body = metrics.render_prometheus().encode("utf-8")
+        await self._send(writer, 200, body, "text/plain; version=0.0.4; charset=utf-8", keep_alive)
+
+    async def handle_health(self, request: Dict, writer: asyncio.StreamWriter, keep_alive: bool):
+        await self._send_json(writer, 200, {"status": "shutting_down" if self._closing else "ok"}, keep_alive)
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the knowledge base over HTTP")
+    parser.add_argument("--host", default=os.getenv("KB_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("KB_API_PORT", "8000")))
+    parser.add_argument("--max-concurrency", type=int, default=32, help="Requests processed at once")
+    parser.add_argument("--max-body-mb", type=float, default=20, help="Largest accepted upload")
+    parser.add_argument("--keepalive-timeout", type=float, default=15.0)
+    parser.add_argument("--ollama-url", help="Ollama server (default: $OLLAMA_BASE_URL or localhost)")
+    parser.add_argument("--max-generations", type=int, default=int(os.getenv("KB_MAX_GENERATIONS", "1")),
+                        help="Generations sent to Ollama at once")
+    parser.add_argument("--generation-queue", type=int, default=int(os.getenv("KB_GENERATION_QUEUE", "16")),
+                        help="Waiting generations before answers fall back to extraction")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("KB_API_WORKERS", "1")),
+                        help="Serving processes sharing the port (generation limits apply per worker)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_workers(args)
+        return
+
+    registry = KnowledgeBaseRegistry(
+        memory_budget_mb=float(os.getenv("KB_MEMORY_BUDGET_MB", "512")),
+        embeddings=create_embeddings(base_url=args.ollama_url)
+    )
+    registry.migrate_legacy(os.getenv("KB_DEFAULT_TENANT", "default"))
+    asyncio.run(build_server(args, build_service(args, registry)).serve())
+
+def build_service(args, registry, coordinator: Optional[CoordinatorClient] = None,
+                  query_log_dir: str = "./data/query_logs") -> KnowledgeBaseService:
+    """Service with its scheduler and model manager, from the command line options"""
+    scheduler = GenerationScheduler(
+        max_concurrent=args.max_generations,
+        max_queue=args.generation_queue,
+        default_deadline=float(os.getenv("KB_GENERATION_DEADLINE_S", "30"))
+    )
+    model_manager = ModelLifecycleManager(
+        base_url=args.ollama_url,
+        keep_alive=os.getenv("KB_MODEL_KEEP_ALIVE", "30m"),
+        ping_interval=float(os.getenv("KB_MODEL_PING_S", "240")),
+        idle_timeout=float(os.getenv("KB_MODEL_IDLE_S", "3600"))
+    ).start()
+    # Load the models while the server starts accepting connections
+    Warmup([("models", model_manager.warm_up)]).start()
+    archive = coordinator is not None or os.getenv("KB_ARCHIVE_UPLOADS", "1") != "0"
+    return KnowledgeBaseService(registry, QueryLog(log_dir=query_log_dir), base_url=args.ollama_url,
+                                upload_dir="./data/uploads" if archive else None, scheduler=scheduler,
+                                model_manager=model_manager, coordinator=coordinator)
+
+def build_server(args, service: KnowledgeBaseService, reuse_port: bool = False) -> APIServer:
+    return APIServer(
+        service, args.host, args.port,
+        max_concurrency=args.max_concurrency,
+        max_body_bytes=int(args.max_body_mb * 1024 * 1024),
+        keepalive_timeout=args.keepalive_timeout,
+        default_tenant=os.getenv("KB_DEFAULT_TENANT", "default"),
+        reuse_port=reuse_port
+    )
+
+def run_worker(args, socket_path: str, worker_id: int):
+    """Entry point of one serving process"""
+    load_dotenv()
+    registry = SharedIndexRegistry(embeddings=create_embeddings(base_url=args.ollama_url))
+    service = build_service(args, registry, CoordinatorClient(socket_path),
+                            query_log_dir=f"./data/query_logs/worker-{worker_id}")
+    asyncio.run(build_server(args, service, reuse_port=True).serve())
+
+def run_workers(args):
+    """Start the serving processes; this one ingests and publishes index generations"""
+    registry = KnowledgeBaseRegistry(
+        memory_budget_mb=float(os.getenv("KB_MEMORY_BUDGET_MB", "512")),
+        embeddings=create_embeddings(base_url=args.ollama_url)
+    )
+    registry.migrate_legacy(os.getenv("KB_DEFAULT_TENANT", "default"))
+    # Chunk exactly as a single-process server would
+    doc_processor = build_doc_processor(int(os.getenv("KB_RETRIEVAL_K", "3")),
+                                        int(os.getenv("KB_CONTEXT_WINDOW", "1")))
+    coordinator = IndexCoordinator(registry, os.path.join(registry.base_directory, ".coordinator.sock"),
+                                   doc_processor)
+    published = coordinator.publish_all()
+    print(f"✅ Published {len(published)} knowledge bases")
+    coordinator.start()
+
+    # Spawned, not forked: the parent already runs threads and FAISS
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, args=(args, coordinator.socket_path, i), name=f"kb-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    while not stop.is_set() and all(worker.is_alive() for worker in workers):
+        stop.wait(1.0)
+
+    print("Stopping workers...")
+    for worker in workers:
+        if worker.is_alive():
+            os.kill(worker.pid, signal.SIGTERM)
+    for worker in workers:
+        worker.join(35)
+    coordinator.stop()
+
+if __name__ == "__main__":
+    main()
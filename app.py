@@ -7,15 +7,28 @@ import os
 from dotenv import load_dotenv
 from datetime import datetime
 import json
+import uuid
 
-# Import our custom modules
-from utils.document_processor import DocumentProcessor
-from utils.vector_store import VectorStoreManager
-from utils.qa_chain import QAChain
+# Import our custom modules (LangChain, FAISS and PDF parsing are imported on
+# first use or by the background warm-up, so the page renders without them)
+from utils.tenant_registry import KnowledgeBaseRegistry
+from utils.answer_router import AnswerRouter, tier_usage
+from utils.extractors import supported_extensions
+from utils.metrics import metrics, start_metrics_server
+from utils.model_manager import ModelLifecycleManager
+from utils.query_log import QueryLog
+from utils.scheduler import GenerationScheduler
+from utils.upload_archive import UploadArchive
+from utils.warmup import Warmup, import_modules
 
 # Load environment variables
 load_dotenv()
 
+# Chunks retrieved per question, and neighbors added on each side of a hit
+RETRIEVAL_K = int(os.getenv("KB_RETRIEVAL_K", "3"))
+CONTEXT_WINDOW = int(os.getenv("KB_CONTEXT_WINDOW", "1"))
+LLM_CONTEXT_TOKENS = int(os.getenv("KB_LLM_CONTEXT_TOKENS", "2048"))
+
 # Page configuration
 st.set_page_config(
     page_title="Knowledge Base Agent",
@@ -62,41 +75,172 @@ if 'messages' not in st.session_state:
 if 'total_queries' not in st.session_state:
     st.session_state.total_queries = 0
 
-if 'query_log' not in st.session_state:
-    st.session_state.query_log = []
+@st.cache_resource
+def get_registry():
+    """Knowledge base registry shared by all sessions"""
+    registry = KnowledgeBaseRegistry(
+        memory_budget_mb=float(os.getenv("KB_MEMORY_BUDGET_MB", "512"))
+    )
+    # Indexes saved by versions without knowledge bases become the default one
+    registry.migrate_legacy(os.getenv("KB_DEFAULT_TENANT", "default"))
+    return registry
+
+@st.cache_resource
+def get_doc_processor():
+    """Document processor shared by all sessions, sizing chunks in model tokens"""
+    from utils.document_processor import DocumentProcessor
+    from utils.tokenizer import chunk_token_budget
+    # Small chunks for precise matching; expansion rebuilds the surrounding passage
+    budget = chunk_token_budget(context_tokens=LLM_CONTEXT_TOKENS, k=RETRIEVAL_K, window=CONTEXT_WINDOW)
+    return DocumentProcessor(
+        chunk_size=int(os.getenv("KB_CHUNK_TOKENS", str(budget))),
+        chunk_overlap=int(os.getenv("KB_CHUNK_OVERLAP_TOKENS", "40")),
+        unit="tokens"
+    )
+
+@st.cache_resource
+def get_upload_archive():
+    """Content-addressed copies of uploads, written in the background (off with KB_ARCHIVE_UPLOADS=0)"""
+    if os.getenv("KB_ARCHIVE_UPLOADS", "1") == "0":
+        return None
+    return UploadArchive()
+
+@st.cache_resource
+def get_model_manager():
+    """Keeps the Ollama models loaded and shares one LLM client across sessions"""
+    return ModelLifecycleManager(
+        keep_alive=os.getenv("KB_MODEL_KEEP_ALIVE", "30m"),
+        ping_interval=float(os.getenv("KB_MODEL_PING_S", "240")),
+        idle_timeout=float(os.getenv("KB_MODEL_IDLE_S", "3600"))
+    ).start()
+
+@st.cache_resource
+def get_warmup():
+    """Import heavy modules and load the default knowledge base in the background"""
+    if os.getenv("KB_WARMUP", "1") == "0":
+        return None
+    registry = get_registry()
+    default_tenant = os.getenv("KB_DEFAULT_TENANT", "default")
+    return Warmup([
+        ("imports", import_modules("utils.vector_store", "utils.qa_chain", "utils.document_processor")),
+        ("knowledge_base", lambda: registry.get(default_tenant)),
+        ("models", get_model_manager().warm_up)
+    ]).start()
+
+get_warmup()
+
+@st.cache_resource
+def get_metrics_server():
+    """Expose /metrics for Prometheus when KB_METRICS_PORT is set"""
+    port = os.getenv("KB_METRICS_PORT")
+    return start_metrics_server(int(port)) if port else None
+
+get_metrics_server()
+
+@st.cache_resource
+def get_scheduler():
+    """Queue for generations on the shared Ollama server, across all sessions"""
+    return GenerationScheduler(
+        max_concurrent=int(os.getenv("KB_MAX_GENERATIONS", "1")),
+        max_queue=int(os.getenv("KB_GENERATION_QUEUE", "16")),
+        default_deadline=float(os.getenv("KB_GENERATION_DEADLINE_S", "30"))
+    )
+
+@st.cache_resource
+def get_query_log():
+    """Durable query log shared by all sessions"""
+    return QueryLog()
+
+def get_url_tenant():
+    """Knowledge base pinned by the ?tenant= URL parameter, if any"""
+    if hasattr(st, "query_params"):
+        return st.query_params.get("tenant")
+    return st.experimental_get_query_params().get("tenant", [None])[0]
 
-if 'vectorstore_manager' not in st.session_state:
-    st.session_state.vectorstore_manager = VectorStoreManager()
+if 'tenant' not in st.session_state:
+    st.session_state.tenant = get_url_tenant() or os.getenv("KB_DEFAULT_TENANT", "default")
 
-if 'doc_processor' not in st.session_state:
-    st.session_state.doc_processor = DocumentProcessor()
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = uuid.uuid4().hex
 
 if 'qa_chain' not in st.session_state:
     st.session_state.qa_chain = None
+    st.session_state.answer_router = None
+
+if 'search_scope' not in st.session_state:
+    st.session_state.search_scope = []
+
+if 'query_history' not in st.session_state:
+    # This session's questions only; the shared query log feeds the rollups
+    st.session_state.query_history = []
 
 # Helper Functions
+def get_vectorstore_manager():
+    """Vector store of the current session's knowledge base (loads it on first use)"""
+    return get_registry().get(st.session_state.tenant)
+
+def get_kb_summary():
+    """Chunk count and sources of the current knowledge base, without loading it (None while unknown)"""
+    return get_registry().summary(st.session_state.tenant)
+
+def switch_tenant(tenant):
+    """Route this session to another knowledge base"""
+    get_registry().validate_name(tenant)
+    st.session_state.tenant = tenant
+    st.session_state.messages = []
+    st.session_state.qa_chain = None
+    st.session_state.answer_router = None
+    st.session_state.search_scope = []
+    st.session_state.query_history = []
+
 def initialize_qa_chain():
     """Initialize QA chain with retriever"""
-    retriever = st.session_state.vectorstore_manager.get_retriever(k=4)
+    # Restrict retrieval to the selected documents, if any
+    scope = st.session_state.search_scope
+    search_filter = {"source": scope} if scope else None
+    from utils.tokenizer import context_token_budget
+    # Resolved through the registry per query, so eviction frees the index
+    retriever = get_registry().get_retriever(
+        st.session_state.tenant, k=RETRIEVAL_K, filter=search_filter, window=CONTEXT_WINDOW,
+        max_context_tokens=context_token_budget(LLM_CONTEXT_TOKENS)
+    )
     if retriever:
-        st.session_state.qa_chain = QAChain(retriever)
+        if st.session_state.qa_chain is None:
+            from utils.qa_chain import QAChain
+            st.session_state.qa_chain = QAChain(
+                retriever, llm=get_model_manager().llm, scheduler=get_scheduler()
+            )
+        else:
+            # Index changed: keep the chain and its LLM client, swap the retriever
+            st.session_state.qa_chain.set_retriever(retriever)
+        # FAQ answers only for documents in this knowledge base (and search scope)
+        st.session_state.answer_router = AnswerRouter(
+            st.session_state.qa_chain,
+            known_sources=scope or get_vectorstore_manager().get_sources(),
+            # FAQ answers only where this knowledge base's copy of the document backs them
+            source_terms=get_vectorstore_manager().source_terms,
+            faq_threshold=float(os.getenv("KB_FAQ_THRESHOLD", "0.6")),
+            extractive_threshold=float(os.getenv("KB_EXTRACTIVE_THRESHOLD", "0.8"))
+        )
         return True
     return False
 
-def save_uploaded_file(uploaded_file):
-    """Save uploaded file to disk"""
-    upload_dir = "./data/uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    file_path = os.path.join(upload_dir, uploaded_file.name)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    
-    return file_path
+def archive_uploaded_file(uploaded_file):
+    """Keep a copy of the upload, if archiving is on (returns immediately)"""
+    archive = get_upload_archive()
+    if archive:
+        archive.archive(uploaded_file.getbuffer(), uploaded_file.name,
+                        metadata={"tenant": st.session_state.tenant})
 
-def log_query(question, answer, confidence):
-    """Log query for analytics"""
-    st.session_state.query_log.append({
+def log_query(question, answer, confidence, latency_ms=None, cache_hit=None):
+    """Log query for analytics (written to disk off the request path)"""
+    get_query_log().append(
+        question, answer, confidence,
+        latency_ms=latency_ms,
+        cache_hit=cache_hit,
+        tenant=st.session_state.tenant
+    )
+    st.session_state.query_history.append({
         "question": question,
         "answer": answer[:100] + "..." if len(answer) > 100 else answer,
         "confidence": confidence,
@@ -112,12 +256,33 @@ def main():
     
     # Sidebar
     with st.sidebar:
+        # Knowledge base selection (fixed when pinned by URL)
+        st.header("🏢 Knowledge Base")
+        if get_url_tenant():
+            st.write(f"**{st.session_state.tenant}**")
+        else:
+            tenants = get_registry().list_tenants()
+            if st.session_state.tenant not in tenants:
+                tenants.append(st.session_state.tenant)
+            selected = st.selectbox("Department", sorted(tenants),
+                                    index=sorted(tenants).index(st.session_state.tenant))
+            new_tenant = st.text_input("New knowledge base", placeholder="e.g. finance")
+            if st.button("➕ Create") and new_tenant:
+                selected = new_tenant.strip()
+            if selected != st.session_state.tenant:
+                try:
+                    switch_tenant(selected)
+                    st.rerun()
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+        
+        st.markdown("---")
         st.header("📁 Document Management")
         
         # File Upload
         uploaded_files = st.file_uploader(
-            "Upload Documents (PDF or TXT)",
-            type=['pdf', 'txt'],
+            "Upload Documents (PDF, DOCX, TXT, Markdown, HTML or CSV)",
+            type=[extension[1:] for extension in supported_extensions()],
             accept_multiple_files=True,
             help="Upload documents to build your knowledge base"
         )
@@ -127,28 +292,33 @@ def main():
                 with st.spinner("Processing documents..."):
                     all_documents = []
                     
+                    # Archive files
                     for uploaded_file in uploaded_files:
-                        try:
-                            # Save file
-                            file_path = save_uploaded_file(uploaded_file)
-                            
-                            # Process document
-                            documents = st.session_state.doc_processor.process_document(
-                                file_path, 
-                                uploaded_file.name
-                            )
+                        archive_uploaded_file(uploaded_file)
+                    
+                    # Process documents straight from memory (in worker
+                    # processes when KB_EXTRACT_WORKERS > 1)
+                    results = get_doc_processor().process_documents(
+                        [(uploaded_file, uploaded_file.name) for uploaded_file in uploaded_files],
+                        max_workers=int(os.getenv("KB_EXTRACT_WORKERS", "1"))
+                    )
+                    for name, documents, error in results:
+                        if error is None:
                             all_documents.extend(documents)
-                            
-                            st.success(f"✅ {uploaded_file.name} processed!")
-                        
-                        except Exception as e:
-                            st.error(f"❌ Error processing {uploaded_file.name}: {str(e)}")
+                            st.success(f"✅ {name} processed!")
+                        else:
+                            st.error(f"❌ Error processing {name}: {str(error)}")
                     
                     # Add to vector store
                     if all_documents:
-                        success = st.session_state.vectorstore_manager.add_documents(all_documents)
+                        success = get_vectorstore_manager().add_documents(all_documents)
+                        get_registry().refresh(st.session_state.tenant)
                         
                         if success:
+                            dedup = get_vectorstore_manager().last_dedup
+                            if dedup and dedup["collapsed"]:
+                                st.info(f"🧹 {dedup['collapsed']} of {dedup['chunks']} chunks were near-duplicates "
+                                        f"of existing text and were merged instead of embedded")
                             st.success(f"🎉 Added {len(all_documents)} chunks to knowledge base!")
                             
                             # Initialize QA chain
@@ -159,51 +329,99 @@ def main():
         
         st.markdown("---")
         
-        # Vector Store Stats
+        # Vector Store Stats (from the saved summary; the index loads on the first question)
         st.header("📊 Knowledge Base Stats")
-        stats = st.session_state.vectorstore_manager.get_stats()
+        summary = get_kb_summary()
         
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Total Chunks", stats['total_documents'])
+            st.metric("Total Chunks", summary['total_documents'] if summary else "…")
         with col2:
             st.metric("Total Queries", st.session_state.total_queries)
+        if summary is None:
+            st.caption("⏳ Loading knowledge base…")
+        
+        # Search Scope
+        sources = summary['sources'] if summary else []
+        if sources:
+            scope = st.multiselect(
+                "🔎 Search only in",
+                sources,
+                default=[s for s in st.session_state.search_scope if s in sources],
+                help="Leave empty to search all documents"
+            )
+            if scope != st.session_state.search_scope:
+                st.session_state.search_scope = scope
+                # Rebuilt with the new scope on the next question
+                st.session_state.answer_router = None
         
         # Clear Knowledge Base
         st.markdown("---")
         if st.button("🗑️ Clear Knowledge Base", type="secondary"):
-            if st.session_state.vectorstore_manager.clear_vectorstore():
+            if get_vectorstore_manager().clear_vectorstore():
                 st.session_state.messages = []
                 st.session_state.qa_chain = None
+                st.session_state.answer_router = None
+                st.session_state.search_scope = []
                 st.success("Knowledge base cleared!")
                 st.rerun()
         
-        # Analytics
-        if st.session_state.query_log:
+        # Recent Queries Analytics
+        recent_queries = st.session_state.query_history[-5:][::-1]
+        if recent_queries:
             st.markdown("---")
             st.header("📈 Recent Queries")
             
             # Show last 5 queries
-            for query in st.session_state.query_log[-5:][::-1]:
+            for query in recent_queries:
                 with st.expander(f"❓ {query['question'][:50]}..."):
                     st.write(f"**Answer:** {query['answer']}")
                     st.write(f"**Confidence:** {query['confidence']}")
                     st.write(f"**Time:** {query['timestamp']}")
+        
+        # Rollups precomputed by the query log writer, for this knowledge base only
+        rollups = get_query_log().get_rollups(st.session_state.tenant)
+        if rollups["total_queries"]:
+            with st.expander("📊 Query Analytics"):
+                st.write(f"**All-time queries:** {rollups['total_queries']}")
+                st.write(f"**Low confidence:** {rollups['low_confidence_rate']:.0%}")
+                st.write(f"**Latency p50 / p95:** {rollups['latency_p50_ms']:.0f} / {rollups['latency_p95_ms']:.0f} ms")
+                st.write(f"**Cache hit rate:** {rollups['cache_hit_rate']:.0%}")
+                st.markdown("**Top questions:**")
+                for item in rollups["top_questions"][:5]:
+                    st.write(f"- {item['question']} ({item['count']})")
+        
+        # Admin: per-stage latency
+        stage_summary = metrics.summary()
+        if stage_summary:
+            st.markdown("---")
+            with st.expander("⏱️ Performance"):
+                st.table([
+                    {"stage": stage, "count": s["count"], "p50 ms": s["p50_ms"],
+                     "p95 ms": s["p95_ms"], "p99 ms": s["p99_ms"]}
+                    for stage, s in stage_summary.items()
+                ])
+                manager = get_registry().loaded(st.session_state.tenant)
+                if manager is not None:
+                    cache_stats = manager.get_cache_stats()
+                    st.write(f"**Query cache hit rate:** {cache_stats['hit_rate']:.0%} "
+                             f"({cache_stats['saved_ms']:.0f} ms saved)")
+                usage = tier_usage()
+                st.write("**Answered by:** " + ", ".join(
+                    f"{tier} {u['share']:.0%}" for tier, u in usage.items()
+                ))
+                model_stats = get_model_manager().get_stats()
+                cold, warm = model_stats["latency"]["cold"], model_stats["latency"]["warm"]
+                st.write(f"**Models:** warm answers {warm['count']} (p50 {warm['p50_ms']:.0f} ms), "
+                         f"cold answers {cold['count']} (p50 {cold['p50_ms']:.0f} ms)")
     
     # Main Chat Interface
     st.header("💬 Chat with your Knowledge Base")
     
-    # Check if agent is ready
-    if st.session_state.qa_chain is None:
-        stats = st.session_state.vectorstore_manager.get_stats()
-        
-        if stats['total_documents'] > 0:
-            # Try to initialize QA chain
-            if initialize_qa_chain():
-                st.success("✅ Agent initialized and ready!")
-            else:
-                st.warning("⚠️ Could not initialize agent. Please upload documents first.")
-        else:
+    # Check if agent is ready (the QA chain itself is built on the first question)
+    if st.session_state.answer_router is None:
+        summary = get_kb_summary()
+        if summary is not None and summary['total_documents'] == 0:
             st.info("👈 Upload documents in the sidebar to get started!")
             st.stop()
     
@@ -241,10 +459,17 @@ def main():
         with st.chat_message("user"):
             st.write(question)
         
+        # Load the knowledge base and build the QA chain if not done yet
+        if st.session_state.answer_router is None and not initialize_qa_chain():
+            st.warning("⚠️ Could not initialize agent. Please upload documents first.")
+            st.stop()
+        
         # Generate response
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
-                response = st.session_state.qa_chain.ask(question)
+                response = st.session_state.answer_router.answer(question, user=st.session_state.user_id)
+                if response.get('tier') != 'error':
+                    get_model_manager().record_request(response['timings'].get('ask_total', 0.0), response['tier'])
                 
                 answer = response['answer']
                 sources = response['sources']
@@ -252,6 +477,14 @@ def main():
                 
                 # Display answer
                 st.write(answer)
+                if response.get('degraded'):
+                    st.caption("⚡ The assistant is busy, so this answer was taken directly from your documents.")
+                elif response.get('tier') == 'faq':
+                    st.caption("📖 Answered from the FAQ")
+                elif response.get('tier') == 'extractive':
+                    st.caption("📄 Answered directly from your documents")
+                elif response.get('tier') == 'abstain':
+                    st.caption("🔎 Your documents don't seem to cover this question")
                 
                 # Display sources
                 if sources:
@@ -275,8 +508,15 @@ def main():
                     "confidence": confidence
                 })
                 
-                # Log query
-                log_query(question, answer, confidence)
+                # Log query (a query embedding served from cache skips the embedding stage)
+                timings = response.get('timings', {})
+                log_query(
+                    question, answer, confidence,
+                    latency_ms=timings.get('ask_total'),
+                    cache_hit=response.get('tier') == 'faq' or (
+                        'retrieval' in timings and 'query_embedding' not in timings
+                    )
+                )
 
 if __name__ == "__main__":
     # Just run the app - Ollama connection will be tested when needed
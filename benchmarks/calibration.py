@@ -0,0 +1,144 @@
+"""
+Confidence Calibration - Fit confidence and abstention thresholds to labeled questions
+
+Scores every labeled question (sample_doc FAQ keys, the synthetic corpus'
+approval-code questions) and a set of questions the documents cannot answer
+with vector and keyword retrieval, labels each as correct (the top hit holds
+the answer), wrong or unanswerable, and fits ConfidenceCalibrator thresholds.
+Point KB_CONFIDENCE_CALIBRATION at the output file to use them.
+
+Scores depend on the embedding model, so calibrate with --ollama against the
+model the app serves; the default hash embeddings only exercise the pipeline.
+
+Usage:
+    python -m benchmarks.calibration --ollama --output data/confidence.json
+    python -m benchmarks.calibration --documents 0
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+from typing import Dict, List, Tuple
+from utils.confidence import ConfidenceCalibrator, top_score
+from utils.document_processor import DocumentProcessor
+from utils.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+from utils.keyword_search import chunk_text, simple_search
+from utils.vector_store import VectorStoreManager, create_embeddings
+from benchmarks.corpus import generate_corpus, sample_paths, sample_questions, write_corpus
+from benchmarks.fakes import HashEmbeddings
+
+# Questions an HR / IT policy knowledge base should not be able to answer
+UNANSWERABLE = [
+    "What is the capital of France?",
+    "How do I bake sourdough bread?",
+    "Who won the football world cup in 2018?",
+    "What is the boiling point of nitrogen?",
+    "Can you recommend a good science fiction novel?",
+    "How many moons does Jupiter have?",
+    "What is the best way to learn the violin?",
+    "How do I change a flat tire on a bicycle?",
+    "What is the stock price of the company today?",
+    "Which restaurants near the office serve vegan food?",
+    "What is the company policy on pet insurance for goldfish?",
+    "Who is the CEO's favourite musician?",
+    "How tall is the office building in meters?",
+    "What is the wifi password of the cafeteria vending machine?",
+    "When is the next solar eclipse?",
+    "How do I translate Python code into Rust?"
+]
+
+def label_vector(manager: VectorStoreManager, labeled: List[Dict], unanswerable: List[str]) -> List[Tuple[float, str]]:
+    """(top relevance, label) per question from the vector index"""
+    questions = [item["question"] for item in labeled] + unanswerable
+    results = manager.search_many_with_score(questions, k=1, relevance=True)
+    samples = []
+    for item, hits in zip(labeled + [None] * len(unanswerable), results):
+        if not hits:
+            continue
+        doc, score = hits[0]
+        if item is None:
+            label = "unanswerable"
+        elif "answer" in item:
+            label = "correct" if item["answer"] in doc.page_content else "wrong"
+        else:
+            sources = [doc.metadata["source"], *doc.metadata.get("duplicate_sources", [])]
+            label = "correct" if any(source in item["sources"] for source in sources) else "wrong"
+        samples.append((score, label))
+    return samples
+
+def label_keyword(chunks: List[Dict], labeled: List[Dict], unanswerable: List[str]) -> List[Tuple[float, str]]:
+    """(best score of the k=4 hits, as QA confidence uses it, label) per question from simple_search"""
+    samples = []
+    questions = [item["question"] for item in labeled] + unanswerable
+    for item, question in zip(labeled + [None] * len(unanswerable), questions):
+        hits = simple_search(question, chunks)
+        if item is None:
+            samples.append((top_score(hits) or 0.0, "unanswerable"))
+        elif hits:
+            if "answer" in item:
+                correct = item["answer"] in hits[0]["text"]
+            else:
+                correct = hits[0]["source"] in item["sources"]
+            samples.append((top_score(hits), "correct" if correct else "wrong"))
+    return samples
+
+def index_corpus(paths: List[str], workdir: str, embeddings: CachedEmbeddings) -> Tuple[VectorStoreManager, List[Dict]]:
+    processor = DocumentProcessor()
+    documents, chunks = [], []
+    for path in paths:
+        documents.extend(processor.process_document(path, os.path.basename(path)))
+        with open(path, "r", encoding="utf-8") as f:
+            chunks.extend(chunk_text(f.read(), os.path.basename(path)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = VectorStoreManager(os.path.join(workdir, "index"), embeddings=embeddings)
+        manager.add_documents(documents)
+    return manager, chunks
+
+def summarize(samples: List[Tuple[float, str]], calibrator: ConfidenceCalibrator) -> Dict:
+    return {
+        "questions": {label: sum(l == label for _, l in samples) for label in ("correct", "wrong", "unanswerable")},
+        "thresholds": calibrator.to_dict(),
+        **calibrator.evaluate(samples)
+    }
+
+def run(documents: int = 50, ollama: bool = False) -> Dict:
+    embeddings = create_embeddings() if ollama else CachedEmbeddings(HashEmbeddings(), QueryEmbeddingCache())
+    corpora = [(sample_paths(), sample_questions())]
+    vector_samples, keyword_samples = [], []
+    with tempfile.TemporaryDirectory(prefix="kb_calibration_") as workdir:
+        if documents:
+            corpus, questions = generate_corpus(documents)
+            corpora.append((write_corpus(os.path.join(workdir, "synthetic"), corpus), questions))
+        for number, (paths, labeled) in enumerate(corpora):
+            manager, chunks = index_corpus(paths, os.path.join(workdir, str(number)), embeddings)
+            vector_samples += label_vector(manager, labeled, UNANSWERABLE)
+            keyword_samples += label_keyword(chunks, labeled, UNANSWERABLE)
+
+    results = {}
+    for kind, samples in (("vector", vector_samples), ("keyword", keyword_samples)):
+        fitted = ConfidenceCalibrator.fit(samples)
+        results[kind] = {**fitted.to_dict(), "fitted": summarize(samples, fitted),
+                         "defaults": summarize(samples, ConfidenceCalibrator.default(kind))}
+        print(f"✅ {kind}: abstain below {fitted.abstain}, high from {fitted.high}")
+    results["embeddings"] = "ollama" if ollama else "hash"
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit confidence thresholds to labeled questions")
+    parser.add_argument("--documents", type=int, default=50, help="Synthetic corpus size (0: sample_doc only)")
+    parser.add_argument("--ollama", action="store_true", help="Score with the Ollama embedding model")
+    parser.add_argument("--output", help="Write thresholds as JSON (for KB_CONFIDENCE_CALIBRATION)")
+    args = parser.parse_args()
+
+    results = run(args.documents, args.ollama)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Chunk Size Report - Token distribution of chunks per corpus and chunking setting
+
+Chunks each corpus with the old character sizes and with token sizes, then
+reports how many chunks (embeddings) that makes, their size in model tokens,
+how many would be truncated by the embedding model and the context a k=4
+prompt needs.
+
+Usage:
+    python -m benchmarks.chunk_sizes sample_doc
+    python -m benchmarks.chunk_sizes ./policies --documents 0 --output chunks.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from typing import Dict, List
+from utils.document_processor import DocumentProcessor
+from utils.extractors import supported_extensions
+from utils.tokenizer import EMBEDDING_CONTEXT_TOKENS, chunk_token_budget, get_token_counter
+from benchmarks.corpus import generate_corpus, sample_paths, write_corpus
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def corpus_files(path: str) -> List[str]:
+    """Supported files under a directory (or the file itself)"""
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(path) for name in names
+        if os.path.splitext(name)[1].lower() in supported_extensions()
+    )
+
+def chunk_report(paths: List[str], processor: DocumentProcessor, k: int = 4) -> Dict:
+    chunks = []
+    for path in paths:
+        chunks.extend(doc.page_content for doc in processor.process_document(path, os.path.basename(path)))
+    tokens = get_token_counter().count_many(chunks)
+    return {
+        "chunks": len(chunks),
+        "tokens_total": sum(tokens),
+        "tokens_mean": round(sum(tokens) / len(tokens), 1) if tokens else 0.0,
+        "tokens_p50": percentile(tokens, 50),
+        "tokens_p95": percentile(tokens, 95),
+        "tokens_max": max(tokens, default=0),
+        "over_embedding_limit": sum(t > EMBEDDING_CONTEXT_TOKENS for t in tokens),
+        f"context_tokens_k{k}_p95": percentile(tokens, 95) * k
+    }
+
+def run(corpora: Dict[str, List[str]], chunk_tokens: int, overlap_tokens: int) -> Dict:
+    settings = {
+        "characters_1000": DocumentProcessor(1000, 200),
+        f"tokens_{chunk_tokens}": DocumentProcessor(chunk_tokens, overlap_tokens, unit="tokens")
+    }
+    results = {}
+    for name, paths in corpora.items():
+        results[name] = {"files": len(paths)}
+        for setting, processor in settings.items():
+            results[name][setting] = chunk_report(paths, processor)
+            print(f"✅ {name} / {setting}: {results[name][setting]['chunks']} chunks")
+    return {"tokenizer": get_token_counter().name, "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Report chunk sizes in model tokens")
+    parser.add_argument("paths", nargs="*", help="Files or directories, one corpus each (default: sample_doc)")
+    parser.add_argument("--documents", type=int, default=50, help="Also chunk a synthetic corpus this size (0: skip)")
+    parser.add_argument("--chunk-tokens", type=int, default=chunk_token_budget())
+    parser.add_argument("--overlap-tokens", type=int, default=40)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    corpora = {path: corpus_files(path) for path in args.paths} or {"sample_doc": sample_paths()}
+    with tempfile.TemporaryDirectory(prefix="kb_chunks_") as workdir:
+        if args.documents:
+            corpus, _ = generate_corpus(args.documents)
+            corpora["synthetic"] = write_corpus(workdir, corpus)
+        results = run(corpora, args.chunk_tokens, args.overlap_tokens)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Cold Start - Import time of the heavy modules and first-render time of app.py
+
+Every measurement runs in a fresh interpreter (and a scratch working
+directory for the app), so module caches from earlier runs do not hide the
+cost a new Streamlit process pays.
+
+Usage:
+    python -m benchmarks.cold_start --repeat 5
+    python -m benchmarks.cold_start --render-budget-ms 2500   (exit 1 if over)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules app.py used to import eagerly, cheapest first
+MODULES = [
+    "streamlit",
+    "utils.tenant_registry",
+    "utils.answer_router",
+    "utils.document_processor",
+    "utils.vector_store",
+    "utils.qa_chain"
+]
+
+IMPORT_SCRIPT = """
+import time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import {module}
+print((time.perf_counter() - start) * 1000)
+"""
+
+RENDER_SCRIPT = """
+import json, os, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(os.path.join({root!r}, "app.py"), default_timeout=120)
+app.run()
+first = time.perf_counter()
+app.run()
+rerun = time.perf_counter()
+print(json.dumps({{
+    "streamlit_import_ms": (imported - start) * 1000,
+    "first_render_ms": (first - imported) * 1000,
+    "rerun_ms": (rerun - first) * 1000,
+    "exceptions": [str(e.value) for e in app.exception]
+}}))
+"""
+
+def _python(script: str, cwd: str = ROOT, env: Dict = None) -> str:
+    environment = dict(os.environ, PYTHONPATH=ROOT, **(env or {}))
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=environment,
+                            capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return result.stdout.strip().splitlines()[-1]
+
+def measure_imports(repeat: int = 3) -> Dict[str, float]:
+    """Median cold import time (ms) of each module in a fresh interpreter"""
+    return {
+        module: round(statistics.median(
+            float(_python(IMPORT_SCRIPT.format(module=module))) for _ in range(repeat)
+        ), 1)
+        for module in MODULES
+    }
+
+def measure_render(repeat: int = 3, warmup: bool = True) -> Dict:
+    """Median first-render and rerun time (ms) of app.py on an empty knowledge base"""
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="kb_cold_") as workdir:
+            runs.append(json.loads(_python(
+                RENDER_SCRIPT.format(root=ROOT), cwd=workdir,
+                env={"KB_WARMUP": "1" if warmup else "0"}
+            )))
+
+    exceptions = [e for run in runs for e in run["exceptions"]]
+    return {
+        **{
+            key: round(statistics.median(run[key] for run in runs), 1)
+            for key in ("streamlit_import_ms", "first_render_ms", "rerun_ms")
+        },
+        "exceptions": exceptions[:3]
+    }
+
+def run(repeat: int = 3, render_budget_ms: float = None, import_budget_ms: float = None) -> Dict:
+    """Measure imports and first render, with and without the background warm-up"""
+    imports = measure_imports(repeat)
+    results = {
+        "imports_ms": imports,
+        "render": measure_render(repeat, warmup=True),
+        "render_without_warmup": measure_render(repeat, warmup=False)
+    }
+
+    budget = {}
+    if render_budget_ms is not None:
+        budget["first_render_ms"] = {
+            "limit": render_budget_ms,
+            "ok": results["render"]["first_render_ms"] <= render_budget_ms
+        }
+    if import_budget_ms is not None:
+        # What app.py pays at import time: Streamlit plus the modules it still imports eagerly
+        eager = imports["streamlit"] + imports["utils.tenant_registry"] + imports["utils.answer_router"]
+        budget["app_import_ms"] = {"limit": import_budget_ms, "value": round(eager, 1),
+                                   "ok": eager <= import_budget_ms}
+    if budget:
+        results["budget"] = budget
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app cold-start time")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render-budget-ms", type=float, help="Fail if the first render is slower")
+    parser.add_argument("--import-budget-ms", type=float, help="Fail if app.py's eager imports are slower")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.render_budget_ms, args.import_budget_ms)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if not all(check["ok"] for check in results.get("budget", {}).values()):
+        print("❌ Cold-start budget exceeded")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Corpus - Synthetic company documents modeled on sample_doc/*.txt, with labeled questions
+"""
+
+import glob
+import json
+import os
+import random
+import re
+from typing import Dict, List, Tuple
+from utils.qa_database import QA_DATABASE
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_doc")
+
+DEPARTMENTS = ["Finance", "Engineering", "Sales", "Marketing", "Operations", "Legal",
+               "Support", "Research", "Procurement", "Facilities", "Security", "Training"]
+REGIONS = ["North", "South", "East", "West", "Central", "Coastal", "Metro", "Rural"]
+TOPICS = ["travel", "equipment", "training", "overtime", "relocation", "software",
+          "conference", "hardware", "vendor", "expense", "parking", "wellness"]
+
+SECTION_RULE = "=" * 40
+
+def load_sample_sections() -> List[Tuple[str, str]]:
+    """Split the sample documents into (subsection title, paragraph) pairs"""
+    sections = []
+    for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        for match in re.finditer(r'^\d+\.\d+\s+(.+)\n((?:.+\n?)+)', text, re.MULTILINE):
+            sections.append((match.group(1).strip(), match.group(2).strip()))
+    return sections
+
+def _perturb_numbers(text: str, rng: random.Random) -> str:
+    """Vary the numbers so generated documents do not repeat the samples verbatim"""
+    return re.sub(r'\d+', lambda m: str(max(1, int(m.group()) + rng.randint(-2, 2))), text)
+
+def generate_corpus(documents: int = 50, sections_per_document: int = 12,
+                    seed: int = 42) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Generate a synthetic corpus and its labeled questions
+
+    Each document recombines sample subsections under numbered section
+    rules like the real policies, and hides one unique fact whose answer
+    token identifies the relevant chunk.
+
+    Args:
+        documents: Number of documents to generate
+        sections_per_document: Subsections per document
+        seed: Random seed (same seed, same corpus)
+
+    Returns:
+        (documents as {"name", "text"}, questions as {"question", "answer", "source"})
+    """
+    rng = random.Random(seed)
+    pool = load_sample_sections()
+    corpus, questions = [], []
+
+    for d in range(documents):
+        department = DEPARTMENTS[d % len(DEPARTMENTS)]
+        region = REGIONS[(d // len(DEPARTMENTS)) % len(REGIONS)]
+        topic = TOPICS[(d * 7) % len(TOPICS)]
+        name = f"{department.lower()}_{region.lower()}_policy_{d:04d}.txt"
+        code = f"{topic[:3].upper()}-{rng.randint(1000, 9999)}-{d:04d}"
+
+        lines = [
+            f"EMPLOYEE HANDBOOK - {department.upper()} POLICIES ({region.upper()} REGION)",
+            "Company: TechCorp Solutions",
+            f"Last Updated: {rng.choice(['January', 'April', 'July', 'October'])} {rng.randint(2022, 2025)}",
+            ""
+        ]
+
+        fact_section = rng.randrange(sections_per_document)
+        for s in range(sections_per_document):
+            if s % 4 == 0:
+                lines += [SECTION_RULE, f"{s // 4 + 1}. {rng.choice(pool)[0].upper()}", SECTION_RULE, ""]
+            number = f"{s // 4 + 1}.{s % 4 + 1}"
+            if s == fact_section:
+                lines += [
+                    f"{number} {topic.title()} Approval Code",
+                    f"The {topic} approval code for the {department} department in the {region} region is {code}. "
+                    f"All {topic} requests must quote this code and be approved by the department head.",
+                    ""
+                ]
+            else:
+                title, paragraph = rng.choice(pool)
+                lines += [f"{number} {title}", _perturb_numbers(paragraph, rng), ""]
+
+        corpus.append({"name": name, "text": "\n".join(lines)})
+        questions.append({
+            "question": f"What is the {topic} approval code for the {department} department in the {region} region?",
+            "answer": code,
+            "source": name
+        })
+
+    return corpus, questions
+
+def write_corpus(directory: str, corpus: List[Dict]) -> List[str]:
+    """Write generated documents as .txt files and return their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for document in corpus:
+        path = os.path.join(directory, document["name"])
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(document["text"])
+        paths.append(path)
+    return paths
+
+def sample_paths() -> List[str]:
+    """Paths of the bundled sample documents"""
+    return sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.txt")))
+
+def sample_questions() -> List[Dict]:
+    """Labeled questions for sample_doc: QA_DATABASE keys and their source documents"""
+    return [
+        {"question": key, "sources": [s.strip() for s in entry["source"].split(",")]}
+        for key, entry in QA_DATABASE.items()
+    ]
+
+def save_questions(path: str, questions: List[Dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        for question in questions:
+            f.write(json.dumps(question) + "\n")
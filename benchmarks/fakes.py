@@ -0,0 +1,42 @@
+"""
+Fakes - Deterministic, network-free stand-ins for the Ollama embedding model
+"""
+
+import hashlib
+import re
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class HashEmbeddings(Embeddings):
+    def __init__(self, dimensions: int = 256):
+        """
+        Feature-hashing embeddings: each word adds to a hashed dimension
+
+        Texts sharing words land close together, which is enough for
+        retrieval benchmarks without a running model.
+
+        Args:
+            dimensions: Embedding size
+        """
+        self.dimensions = dimensions
+        self.query_instruction = ""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text).tolist() for text in texts]
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r'\w+', text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,328 @@
+"""
+Load Test - Concurrent virtual users replaying a question mix against the question path
+
+Targets:
+    qa       QAChain.ask over a FAISS index of sample_doc, talking HTTP to Ollama
+             (the bundled stub unless --base-url points at a real server)
+    keyword  simple_search + generate_answer, as used by simple_app.py
+
+Questions answered "not in the documents" skip generation, so their latency
+is reported apart from answered ones. Against the stub, whose embeddings say
+nothing about relevance, the chain never abstains and every question
+generates.
+
+Closed loop: each of N users asks, waits for the answer, thinks, asks again.
+Open loop: questions arrive as a Poisson process at a fixed rate regardless of
+how fast they are answered; latency is measured from the scheduled arrival, so
+queueing shows up instead of being hidden.
+
+Usage:
+    python -m benchmarks.load_test --target qa --users 1,4,16 --duration 20
+    python -m benchmarks.load_test --target keyword --arrival open --rate 10,50,200
+    python -m benchmarks.load_test --target qa --profile gpu --ingest-every 2
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from utils.confidence import ConfidenceCalibrator
+from utils.document_processor import DocumentProcessor
+from utils.keyword_search import chunk_text, generate_answer, simple_search
+from utils.metrics import metrics
+from utils.qa_chain import QAChain
+from utils.qa_database import QA_DATABASE
+from utils.vector_store import VectorStoreManager
+from benchmarks.corpus import sample_paths
+from benchmarks.ollama_stub import PROFILES, OllamaStubServer
+from benchmarks.run import percentile, quiet
+
+# Stages reported per level to locate contention
+CONTENTION_STAGES = ("index_lock_wait", "query_embedding", "faiss_search", "time_to_first_token", "generation")
+
+def load_question_mix(log_dir: Optional[str] = None, max_logged: int = 5000) -> List[str]:
+    """
+    Questions to replay: every QA_DATABASE key plus logged user questions
+
+    Logged questions keep their repeats, so popular questions are asked
+    proportionally more often, like in production.
+    """
+    questions = list(QA_DATABASE.keys())
+    if not log_dir:
+        return questions
+
+    logged = []
+    for path in sorted(glob.glob(os.path.join(log_dir, "queries.jsonl*"))):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    question = json.loads(line).get("question")
+                except ValueError:
+                    continue
+                if question:
+                    logged.append(question)
+    return questions + logged[-max_logged:]
+
+class LoadTarget:
+    def __init__(self, name: str, ask: Callable[[str], Dict], close: Callable[[], None] = lambda: None,
+                 ingest: Optional[Callable[[], None]] = None, stub: Optional[OllamaStubServer] = None):
+        """
+        One system under test
+
+        Args:
+            name: Label for the report
+            ask: Answers a question; raises or returns {"error": ...} on failure
+            close: Releases servers and temporary files
+            ingest: Optional write operation used to create index contention
+            stub: Stub server, when used, for its queueing stats
+        """
+        self.name = name
+        self.ask = ask
+        self.close = close
+        self.ingest = ingest
+        self.stub = stub
+
+def keyword_target() -> LoadTarget:
+    chunks = []
+    for path in sample_paths():
+        with open(path, "r", encoding="utf-8") as f:
+            chunks.extend(chunk_text(f.read(), os.path.basename(path)))
+
+    def ask(question: str) -> Dict:
+        answer, sources, confidence = generate_answer(question, simple_search(question, chunks))
+        return {"answer": answer, "sources": sources, "confidence": confidence}
+
+    return LoadTarget("keyword", ask)
+
+def qa_target(base_url: Optional[str] = None, profile: str = "gpu", k: int = 4) -> LoadTarget:
+    stub, calibrator = None, None
+    if not base_url:
+        stub = OllamaStubServer(profile=profile).start()
+        base_url = stub.base_url
+        # Stub relevance scores are meaningless: never abstain, so the
+        # levels time generation rather than the abstain path
+        calibrator = ConfidenceCalibrator(float("-inf"), 0.5, 0.65)
+
+    workdir = tempfile.mkdtemp(prefix="kb_load_")
+    processor = DocumentProcessor()
+    documents = []
+    for path in sample_paths():
+        documents.extend(quiet(processor.process_document, path, os.path.basename(path)))
+
+    manager = quiet(VectorStoreManager, workdir, base_url=base_url)
+    if not quiet(manager.add_documents, documents):
+        raise RuntimeError(f"Could not build the index against {base_url}")
+    qa_chain = quiet(QAChain, manager.get_retriever(k=k), base_url=base_url, calibrator=calibrator)
+
+    def ask(question: str) -> Dict:
+        response = qa_chain.ask(question)
+        if response["answer"].startswith("Error processing question"):
+            response["error"] = response["answer"]
+        return response
+
+    def ingest():
+        quiet(manager.add_documents, documents[:8])
+
+    def close():
+        if stub:
+            stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return LoadTarget("qa", ask, close, ingest, stub)
+
+class LoadRecorder:
+    def __init__(self):
+        """Thread-safe collection of per-request outcomes"""
+        self.latencies = []
+        # Successful requests by outcome: generated or answered without generating
+        self.by_outcome = {"answered": [], "abstained": []}
+        self.errors = 0
+        self.error_samples = []
+        self._lock = threading.Lock()
+
+    def call(self, target: LoadTarget, question: str, start: Optional[float] = None):
+        """Ask one question; start lets open-loop runs count time spent queued"""
+        start = start or time.perf_counter()
+        error, abstained = None, False
+        try:
+            response = target.ask(question)
+            error = response.get("error")
+            abstained = bool(response.get("abstained"))
+        except Exception as e:
+            error = str(e)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.latencies.append(elapsed_ms)
+            if not error:
+                self.by_outcome["abstained" if abstained else "answered"].append(elapsed_ms)
+            if error:
+                self.errors += 1
+                if len(self.error_samples) < 3:
+                    self.error_samples.append(error[:200])
+
+def run_closed_loop(target: LoadTarget, questions: List[str], users: int, duration: float,
+                    think_time: float = 0.0, seed: int = 42) -> LoadRecorder:
+    """N users, each asking its next question once the previous one is answered"""
+    recorder = LoadRecorder()
+    deadline = time.perf_counter() + duration
+
+    def user(user_id: int):
+        rng = random.Random(seed + user_id)
+        while time.perf_counter() < deadline:
+            recorder.call(target, rng.choice(questions))
+            if think_time:
+                time.sleep(rng.expovariate(1 / think_time))
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder
+
+def run_open_loop(target: LoadTarget, questions: List[str], rate: float, duration: float,
+                  max_workers: int = 256, seed: int = 42) -> LoadRecorder:
+    """Poisson arrivals at rate questions/second, independent of response times"""
+    recorder = LoadRecorder()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        scheduled = start
+        while True:
+            scheduled += rng.expovariate(rate)
+            if scheduled - start >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(recorder.call, target, rng.choice(questions), scheduled)
+    return recorder
+
+def summarize(recorder: LoadRecorder, elapsed: float) -> Dict:
+    latencies = recorder.latencies
+    requests = len(latencies)
+    return {
+        "requests": requests,
+        "errors": recorder.errors,
+        "error_rate": round(recorder.errors / requests, 4) if requests else 0.0,
+        "throughput_rps": round((requests - recorder.errors) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / requests, 2) if requests else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2) if latencies else 0.0,
+        **{
+            outcome: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2)
+            }
+            for outcome, values in recorder.by_outcome.items()
+        },
+        "error_samples": recorder.error_samples
+    }
+
+def contention_report(target: LoadTarget, stub_before: Optional[Dict]) -> Dict:
+    """Stage p95s for the level just run, plus Ollama queueing when the stub is used"""
+    summary = metrics.summary()
+    report = {
+        stage: {"count": summary[stage]["count"], "p95_ms": summary[stage]["p95_ms"]}
+        for stage in CONTENTION_STAGES if stage in summary
+    }
+    if target.stub and stub_before is not None:
+        stats = target.stub.stats
+        calls = sum(stats["requests"].values()) - sum(stub_before["requests"].values())
+        waited = stats["queue_wait_ms"] - stub_before["queue_wait_ms"]
+        report["ollama"] = {
+            "calls": calls,
+            "avg_queue_wait_ms": round(waited / calls, 2) if calls else 0.0,
+            "max_active": stats["max_active"]
+        }
+    return report
+
+def run_levels(target: LoadTarget, questions: List[str], arrival: str, levels: List[float],
+               duration: float, think_time: float = 0.0, ingest_every: float = 0.0) -> List[Dict]:
+    """Run one load level after another and report each"""
+    results = []
+    for level in levels:
+        metrics.reset()
+        stub_before = None
+        if target.stub:
+            target.stub.stats["max_active"] = 0
+            stub_before = json.loads(json.dumps(target.stub.stats))
+
+        stop_ingest = threading.Event()
+        if ingest_every and target.ingest:
+            def writer():
+                while not stop_ingest.wait(ingest_every):
+                    target.ingest()
+            threading.Thread(target=writer, daemon=True).start()
+
+        start = time.perf_counter()
+        if arrival == "closed":
+            recorder = run_closed_loop(target, questions, int(level), duration, think_time)
+        else:
+            recorder = run_open_loop(target, questions, level, duration)
+        elapsed = time.perf_counter() - start
+        stop_ingest.set()
+
+        result = {"users" if arrival == "closed" else "rate": level, **summarize(recorder, elapsed)}
+        result["contention"] = contention_report(target, stub_before)
+        results.append(result)
+
+        print(f"{'users' if arrival == 'closed' else 'rate':>5}={level:<6g} "
+              f"rps={result['throughput_rps']:<8} p50={result['p50_ms']:<9} "
+              f"p95={result['p95_ms']:<9} p99={result['p99_ms']:<9} errors={result['error_rate']:.2%} "
+              f"abstained={result['abstained']['count']}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the question path with concurrent users")
+    parser.add_argument("--target", choices=["qa", "keyword"], default="qa")
+    parser.add_argument("--arrival", choices=["closed", "open"], default="closed")
+    parser.add_argument("--users", default="1,2,4,8,16", help="Closed-loop concurrency levels")
+    parser.add_argument("--rate", default="1,5,10,20", help="Open-loop arrival rates (questions/second)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds between a user's questions")
+    parser.add_argument("--base-url", help="Real Ollama server (default: start the bundled stub)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="gpu", help="Stub latency profile")
+    parser.add_argument("--query-log", help="Query log directory to add logged questions to the mix")
+    parser.add_argument("--ingest-every", type=float, default=0.0,
+                        help="Re-ingest a few chunks every N seconds to contend for the index lock")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    questions = load_question_mix(args.query_log)
+    target = qa_target(args.base_url, args.profile) if args.target == "qa" else keyword_target()
+    levels = [float(level) for level in (args.users if args.arrival == "closed" else args.rate).split(",")]
+
+    print(f"Load testing '{target.name}' ({args.arrival} loop) with {len(questions)} questions...")
+    try:
+        results = run_levels(target, questions, args.arrival, levels, args.duration,
+                             args.think_time, args.ingest_every)
+    finally:
+        target.close()
+
+    report = {
+        "target": target.name,
+        "arrival": args.arrival,
+        "profile": None if args.base_url or args.target != "qa" else args.profile,
+        "duration_s": args.duration,
+        "levels": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
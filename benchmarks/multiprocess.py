@@ -0,0 +1,157 @@
+"""
+Multi-Process Benchmark - Query throughput of 1..N worker processes sharing one index
+
+Each worker runs the CPU-bound part of answering a question (query embedding
+with the hashing fake, FAISS search, keyword re-ranking and prompt building)
+in a closed loop. "shared" workers serve a published generation through
+SharedIndexReader (memory-mapped index, read-only docstore); "private"
+workers each load their own copy, for comparing memory per worker.
+
+Usage:
+    python -m benchmarks.multiprocess --max-workers 8 --duration 10 --output scaling.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List
+from langchain_core.language_models.fake import FakeListLLM
+from utils.document_processor import DocumentProcessor
+from utils.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+from utils.keyword_search import simple_search
+from utils.qa_chain import QAChain
+from utils.shared_index import SharedIndexReader, publish_generation
+from utils.vector_store import VectorStoreManager
+from benchmarks.corpus import generate_corpus, write_corpus
+from benchmarks.fakes import HashEmbeddings
+
+def uncached_embeddings(dimensions: int) -> CachedEmbeddings:
+    """Fake embeddings without a query cache, so every query costs CPU"""
+    return CachedEmbeddings(HashEmbeddings(dimensions), QueryEmbeddingCache(max_size=0))
+
+def memory_mb() -> Dict[str, float]:
+    """Resident, proportional (shared pages split between processes) and private heap memory"""
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Anonymous"):
+                    usage[key.lower() + "_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return usage
+
+def build_index(directory: str, documents: int, dimensions: int) -> List[str]:
+    """Ingest a synthetic corpus, publish it and return its questions"""
+    corpus, questions = generate_corpus(documents)
+    paths = write_corpus(os.path.join(directory, "docs"), corpus)
+    processor = DocumentProcessor()
+    chunks = []
+    for path in paths:
+        chunks.extend(processor.process_document(path, os.path.basename(path)))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = VectorStoreManager(os.path.join(directory, "index"), embeddings=uncached_embeddings(dimensions))
+        manager.add_documents(chunks)
+        publish_generation(manager)
+    return [q["question"] for q in questions]
+
+def worker(directory: str, questions: List[str], dimensions: int, mode: str,
+           start, duration: float, results):
+    """Answer questions (without generation) until the duration is over"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        embeddings = uncached_embeddings(dimensions)
+        if mode == "shared":
+            manager = SharedIndexReader(directory, embeddings).current()
+        else:
+            manager = VectorStoreManager(directory, embeddings=embeddings)
+        qa_chain = QAChain(None, llm=FakeListLLM(responses=["ok"]))
+
+    start.wait()
+    queries = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        question = questions[queries % len(questions)]
+        documents = manager.search(question, k=8)
+        ranked = simple_search(question, [{"text": d.page_content, "doc": d} for d in documents], k=4)
+        qa_chain.build_prompt(question, [item["doc"] for item in ranked])
+        queries += 1
+    results.put({"queries": queries, **memory_mb()})
+
+def run_level(directory: str, questions: List[str], dimensions: int, workers: int,
+              duration: float, mode: str) -> Dict:
+    context = multiprocessing.get_context("spawn")
+    start, results = context.Event(), context.Queue()
+    processes = [
+        context.Process(target=worker, args=(directory, questions, dimensions, mode, start, duration, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Let every worker finish loading before the clock starts
+    time.sleep(2.0 + 0.5 * workers)
+    start.set()
+    reports = [results.get(timeout=duration + 120) for _ in processes]
+    for process in processes:
+        process.join()
+
+    queries = sum(r["queries"] for r in reports)
+    summary = {"workers": workers, "mode": mode, "queries": queries, "qps": round(queries / duration, 1)}
+    for key in ("rss_mb", "pss_mb", "anonymous_mb"):
+        if all(key in r for r in reports):
+            summary[f"{key}_per_worker"] = round(sum(r[key] for r in reports) / workers, 1)
+    return summary
+
+def run(max_workers: int = None, documents: int = 200, dimensions: int = 768,
+        duration: float = 5.0, modes: List[str] = ("shared", "private")) -> Dict:
+    """Throughput and memory per worker for 1, 2, 4 ... max_workers processes"""
+    max_workers = max_workers or os.cpu_count() or 1
+    levels = sorted({1, max_workers} | {2 ** i for i in range(1, max_workers.bit_length()) if 2 ** i < max_workers})
+
+    with tempfile.TemporaryDirectory(prefix="kb_mp_") as workdir:
+        questions = build_index(workdir, documents, dimensions)
+        directory = os.path.join(workdir, "index")
+        index_mb = round(os.path.getsize(os.path.join(directory, "faiss_index", "index.faiss")) / (1024 * 1024), 1)
+        results = []
+        for mode in modes:
+            for workers in levels:
+                results.append(run_level(directory, questions, dimensions, workers, duration, mode))
+                print(f"✅ {mode} x{workers}: {results[-1]['qps']} queries/s")
+
+    for mode in modes:
+        rows = [r for r in results if r["mode"] == mode]
+        for row in rows:
+            row["speedup"] = round(row["qps"] / rows[0]["qps"], 2) if rows[0]["qps"] else 0.0
+            row["efficiency"] = round(row["speedup"] / row["workers"], 2)
+    return {
+        "cpu_count": os.cpu_count(),
+        "documents": documents,
+        "index_mb": index_mb,
+        "duration_s": duration,
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure query throughput across worker processes")
+    parser.add_argument("--max-workers", type=int, help="Default: number of CPUs")
+    parser.add_argument("--documents", type=int, default=200, help="Synthetic corpus size")
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per level")
+    parser.add_argument("--modes", nargs="+", default=["shared", "private"], choices=["shared", "private"])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.max_workers, args.documents, args.dimensions, args.duration, args.modes)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Ollama Stub - Loopback server implementing the Ollama generate and embeddings APIs
+
+Embeddings are deterministic feature-hashing vectors and generations are
+extracted from the prompt's context, with latency and throughput taken from a
+profile. Point QAChain / VectorStoreManager at stub.base_url (or set
+OLLAMA_BASE_URL) to load-test without a model.
+
+Usage:
+    python -m benchmarks.ollama_stub --port 11434 --profile cpu
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from benchmarks.fakes import HashEmbeddings
+from utils.model_manager import parse_keep_alive
+
+# Latency profiles: per-embedding latency, time to first token, decode speed,
+# how many requests the "GPU" serves at once (the rest queue), and the time to
+# load a model that is not in memory. Like Ollama, models unload after
+# keep_alive (default 5 minutes) without requests.
+PROFILES = {
+    "instant": {"embed_ms": 0, "ttft_ms": 0, "tokens_per_second": 0, "max_concurrency": 64, "load_ms": 0},
+    "gpu": {"embed_ms": 5, "ttft_ms": 80, "tokens_per_second": 60, "max_concurrency": 4, "load_ms": 1500},
+    "cpu": {"embed_ms": 30, "ttft_ms": 400, "tokens_per_second": 15, "max_concurrency": 1, "load_ms": 4000},
+}
+
+FALLBACK_ANSWER = "I don't have enough information to answer this question based on the provided documents."
+
+def extract_answer(prompt: str, max_words: int = 60) -> str:
+    """Answer with the context sentence sharing the most words with the question"""
+    question_match = re.search(r'Question:\s*(.+?)\s*(?:\n\s*Answer:|$)', prompt, re.DOTALL)
+    context_match = re.search(r'Context:\s*(.+?)\s*Question:', prompt, re.DOTALL)
+    if not question_match or not context_match:
+        words = prompt.split()
+        return " ".join(words[:max_words]) if words else FALLBACK_ANSWER
+
+    question_words = set(re.findall(r'\w+', question_match.group(1).lower()))
+    best, best_overlap = None, 0
+    for sentence in re.split(r'(?<=[.!?])\s+|\n+', context_match.group(1)):
+        overlap = len(question_words & set(re.findall(r'\w+', sentence.lower())))
+        if overlap > best_overlap:
+            best, best_overlap = sentence.strip(), overlap
+
+    if not best:
+        return FALLBACK_ANSWER
+    return " ".join(best.split()[:max_words])
+
+class OllamaStubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, profile: str = "instant",
+                 dimensions: int = 768, **overrides):
+        """
+        Initialize stub server
+
+        Args:
+            host: Interface to bind
+            port: Port to listen on (0 picks a free port)
+            profile: Name of a latency profile in PROFILES
+            dimensions: Embedding size (nomic-embed-text uses 768)
+            overrides: Individual profile values, e.g. ttft_ms=200
+        """
+        self.settings = dict(PROFILES[profile], **overrides)
+        self.embedder = HashEmbeddings(dimensions)
+        self._slots = threading.BoundedSemaphore(self.settings["max_concurrency"])
+        self._lock = threading.Lock()
+        self.stats = {"requests": {}, "active": 0, "max_active": 0, "queue_wait_ms": 0.0, "loads": {}}
+        self._expires = {}
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OllamaStubServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _acquire_slot(self) -> float:
+        """Wait for a model slot; returns the time spent queued (ms)"""
+        start = time.perf_counter()
+        self._slots.acquire()
+        waited_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.stats["active"] += 1
+            self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+            self.stats["queue_wait_ms"] += waited_ms
+        return waited_ms
+
+    def _release_slot(self):
+        with self._lock:
+            self.stats["active"] -= 1
+        self._slots.release()
+
+    def _count(self, path: str):
+        with self._lock:
+            self.stats["requests"][path] = self.stats["requests"].get(path, 0) + 1
+
+    def _ensure_loaded(self, model: str) -> float:
+        """Simulate loading model if it has been unloaded; returns the load time (ms)"""
+        with self._lock:
+            loaded = self._expires.get(model, 0) > time.monotonic()
+            if not loaded:
+                self.stats["loads"][model] = self.stats["loads"].get(model, 0) + 1
+        load_ms = 0.0 if loaded else self.settings["load_ms"]
+        time.sleep(load_ms / 1000)
+        return load_ms
+
+    def _touch(self, model: str, keep_alive):
+        """Restart the model's unload timer after a request"""
+        with self._lock:
+            self._expires[model] = time.monotonic() + parse_keep_alive(keep_alive)
+
+    def loaded_models(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return sorted(model for model, expires in self._expires.items() if expires > now)
+
+    def embed(self, texts: List[str], model: str = "nomic-embed-text", keep_alive=None) -> Dict:
+        self._acquire_slot()
+        try:
+            load_ms = self._ensure_loaded(model)
+            time.sleep(self.settings["embed_ms"] * len(texts) / 1000)
+            return {
+                "embeddings": [self.embedder._vector(text).tolist() for text in texts],
+                "load_duration": int(load_ms * 1e6)
+            }
+        finally:
+            self._touch(model, keep_alive)
+            self._release_slot()
+
+    def _handler_class(self):
+        stub = self
+
+        class StubHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload: Dict, status: int = 200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self) -> Dict:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                stub._count(self.path)
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": "llama3.2:latest"}, {"name": "nomic-embed-text:latest"}]})
+                elif self.path == "/api/ps":
+                    self._send_json({"models": [{"name": m, "model": m} for m in stub.loaded_models()]})
+                elif self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-stub"})
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                stub._count(self.path)
+                request = self._read_json()
+                model = request.get("model", "nomic-embed-text")
+                if self.path == "/api/embeddings":
+                    result = stub.embed([request.get("prompt", "")], model, request.get("keep_alive"))
+                    self._send_json({"embedding": result["embeddings"][0]})
+                elif self.path == "/api/embed":
+                    texts = request.get("input", "")
+                    texts = [texts] if isinstance(texts, str) else texts
+                    self._send_json({"model": model, **stub.embed(texts, model, request.get("keep_alive"))})
+                elif self.path == "/api/generate":
+                    self._generate(request)
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def _generate(self, request: Dict):
+                settings = stub.settings
+                model = request.get("model", "llama3.2")
+                prompt = request.get("prompt", "")
+                # An empty prompt only loads the model (how clients warm it up)
+                tokens = [word + " " for word in extract_answer(prompt).split()] if prompt else []
+
+                start = time.perf_counter()
+                stub._acquire_slot()
+                try:
+                    load_ms = stub._ensure_loaded(model)
+                    if tokens:
+                        time.sleep(settings["ttft_ms"] / 1000)
+                    delay = 1 / settings["tokens_per_second"] if settings["tokens_per_second"] else 0
+
+                    if not request.get("stream", True) or not tokens:
+                        time.sleep(delay * len(tokens))
+                        self._send_json(self._chunk(model, "".join(tokens).strip(), True, start,
+                                                    len(tokens), load_ms))
+                        return
+
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i, token in enumerate(tokens):
+                        if i:
+                            time.sleep(delay)
+                        self._write_chunk(self._chunk(model, token, False, start))
+                    self._write_chunk(self._chunk(model, "", True, start, len(tokens), load_ms))
+                    self.wfile.write(b"0\r\n\r\n")
+                finally:
+                    stub._touch(model, request.get("keep_alive"))
+                    stub._release_slot()
+
+            def _chunk(self, model: str, text: str, done: bool, start: float, count: int = 0,
+                       load_ms: float = 0.0) -> Dict:
+                chunk = {
+                    "model": model,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "response": text,
+                    "done": done
+                }
+                if done:
+                    chunk.update({
+                        "done_reason": "stop",
+                        "total_duration": int((time.perf_counter() - start) * 1e9),
+                        "load_duration": int(load_ms * 1e6),
+                        "eval_count": count
+                    })
+                return chunk
+
+            def _write_chunk(self, payload: Dict):
+                data = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return StubHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="instant")
+    parser.add_argument("--ttft-ms", type=float, help="Override time to first token")
+    parser.add_argument("--tokens-per-second", type=float, help="Override decode speed")
+    parser.add_argument("--max-concurrency", type=int, help="Override concurrent model slots")
+    parser.add_argument("--load-ms", type=float, help="Override model load time")
+    args = parser.parse_args()
+
+    overrides = {
+        key: value for key, value in {
+            "ttft_ms": args.ttft_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "max_concurrency": args.max_concurrency,
+            "load_ms": args.load_ms
+        }.items() if value is not None
+    }
+    stub = OllamaStubServer(args.host, args.port, args.profile, **overrides)
+    print(f"✅ Ollama stub ({args.profile}) listening on {stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+if __name__ == "__main__":
+    main()
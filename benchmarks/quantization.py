@@ -0,0 +1,123 @@
+"""
+Quantization Benchmark - Memory per vector, recall and latency of each vector storage
+
+Vectors are synthetic but shaped like sentence embeddings: unit length,
+clustered by topic, 768 dimensions like nomic-embed-text. Queries are noisy
+copies of corpus vectors, and recall is measured against an exact float32
+search.
+
+Usage:
+    python -m benchmarks.quantization --vectors 100000 --output quantization.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+import faiss
+import numpy as np
+from utils.quantized_index import STORAGE_TYPES, QuantizedStorage, bytes_per_vector, create_index
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def embedding_like(count: int, dimensions: int, topics: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around topic centers"""
+    centers = rng.standard_normal((topics, dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(0, topics, count)] + rng.standard_normal((count, dimensions)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    """Share of the true top k found in the returned top k"""
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+    return round(hits / truth.size, 4)
+
+def bench_storage(storage: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray,
+                  k: int, rescore_factor: int, workdir: str) -> Dict:
+    """Build one index and time single-query searches against it"""
+    start = time.perf_counter()
+    if storage == "float32":
+        quantized = None
+        index = create_index("float32", corpus.shape[1])
+    else:
+        quantized = QuantizedStorage(storage, os.path.join(workdir, f"{storage}_{rescore_factor}.f32"),
+                                     rescore_factor=rescore_factor)
+        index = quantized.create_index(corpus.shape[1])
+        quantized.before_add(index, corpus)
+    index.add(corpus)
+    build_s = time.perf_counter() - start
+
+    found, samples = [], []
+    for query in queries:
+        start = time.perf_counter()
+        if quantized is None:
+            _, ids = index.search(query[None], k)
+        else:
+            _, ids = quantized.search(index, query[None], k)
+        samples.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+
+    per_vector = bytes_per_vector(index)
+    return {
+        "storage": storage,
+        "rescore_factor": rescore_factor if quantized else None,
+        "bytes_per_vector": per_vector,
+        "compression": round(corpus.shape[1] * 4 / per_vector, 1),
+        "index_mb": round(per_vector * index.ntotal / (1024 * 1024), 2),
+        "disk_mb": round(os.path.getsize(quantized.vectors_path) / (1024 * 1024), 2) if quantized else 0.0,
+        f"recall_at_{k}": recall(np.array(found), truth),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "build_s": round(build_s, 2)
+    }
+
+def run(vectors: int = 50000, dimensions: int = 768, queries: int = 200, k: int = 4,
+        rescore_factors: List[int] = (0, 4, 10), topics: int = 200, seed: int = 42) -> Dict:
+    """Compare every storage type, with and without rescoring"""
+    rng = np.random.default_rng(seed)
+    corpus = embedding_like(vectors, dimensions, topics, rng)
+    noise = rng.standard_normal((queries, dimensions)) * 0.5 / np.sqrt(dimensions)
+    query_vectors = (corpus[rng.integers(0, vectors, queries)] + noise).astype(np.float32)
+    faiss.normalize_L2(query_vectors)
+    _, truth = faiss.knn(query_vectors, corpus, k)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="kb_quant_") as workdir:
+        for storage in STORAGE_TYPES:
+            for factor in ([0] if storage == "float32" else rescore_factors):
+                results.append(bench_storage(storage, corpus, query_vectors, truth, k, factor, workdir))
+                print(f"✅ {storage} (rescore x{factor}): {results[-1][f'recall_at_{k}']} recall")
+    return {
+        "vectors": vectors,
+        "dimensions": dimensions,
+        "queries": queries,
+        "k": k,
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[0, 4, 10])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.vectors, args.dimensions, args.queries, args.k, args.rescore_factors, seed=args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
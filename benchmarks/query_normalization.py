@@ -0,0 +1,132 @@
+"""
+Query Normalization Benchmark - FAQ hit rate and keyword recall on misspelled questions, and the added latency
+
+Every FAQ question is asked as written (capitalized, with a question mark, so
+it is not an exact key) and with one typo in a content word (deleted,
+swapped, replaced or doubled letter). Each normalizer setting is measured on
+the keyword FAQ match (find_best_match), the router's FAQ tier and
+simple_search over sample_doc:
+
+    stopwords   stopword removal only
+    stemming    plus stemming
+    full        plus spelling correction (the default)
+
+Usage:
+    python -m benchmarks.query_normalization --typos 3 --output normalization.json
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import time
+from typing import Callable, Dict, List, Tuple
+from utils.answer_router import AnswerRouter
+from utils.keyword_search import chunk_text, find_best_match, simple_search
+from utils.qa_database import QA_DATABASE
+from utils.query_normalizer import STOPWORDS, build_normalizer
+from benchmarks.corpus import sample_paths
+
+SETTINGS = {
+    "stopwords": {"stemming": False, "max_edit_distance": 0},
+    "stemming": {"stemming": True, "max_edit_distance": 0},
+    "full": {}
+}
+
+def misspell(word: str, rng: random.Random) -> str:
+    """word with one random edit"""
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(["delete", "swap", "replace", "double"])
+    if edit == "delete":
+        return word[:i] + word[i + 1:]
+    if edit == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if edit == "replace":
+        return word[:i] + rng.choice(string.ascii_lowercase.replace(word[i], "")) + word[i + 1:]
+    return word[:i] + word[i] + word[i:]
+
+def questions(typos: int, seed: int) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """(question, FAQ key) pairs: as written, and with one typo each"""
+    rng = random.Random(seed)
+    clean, misspelled = [], []
+    for key in QA_DATABASE:
+        clean.append((key.capitalize() + "?", key))
+        words = key.split()
+        candidates = [i for i, word in enumerate(words) if len(word) >= 5 and word not in STOPWORDS]
+        for _ in range(typos if candidates else 0):
+            i = rng.choice(candidates)
+            variant = words[:i] + [misspell(words[i], rng)] + words[i + 1:]
+            misspelled.append((" ".join(variant).capitalize() + "?", key))
+    return clean, misspelled
+
+def hit_rate(match: Callable[[str, str], bool], pairs: List[Tuple[str, str]]) -> float:
+    return round(sum(match(question, key) for question, key in pairs) / len(pairs), 3) if pairs else 0.0
+
+def mean_us(fn: Callable, inputs: List) -> float:
+    start = time.perf_counter()
+    for item in inputs:
+        fn(item)
+    return round((time.perf_counter() - start) * 1e6 / len(inputs), 1) if inputs else 0.0
+
+def run(typos: int = 3, seed: int = 7) -> Dict:
+    texts = []
+    for path in sample_paths():
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append((f.read(), os.path.basename(path)))
+    chunks = [chunk for text, name in texts for chunk in chunk_text(text, name)]
+    clean, misspelled = questions(typos, seed)
+
+    results = {"questions": {"clean": len(clean), "misspelled": len(misspelled)}}
+    for name, options in SETTINGS.items():
+        start = time.perf_counter()
+        normalizer = build_normalizer([text for text, _ in texts], **options)
+        build_ms = (time.perf_counter() - start) * 1000
+        router = AnswerRouter(None, normalizer=normalizer)
+
+        def keyword_faq(question, key):
+            return find_best_match(question, normalizer) is QA_DATABASE[key]
+
+        def router_faq(question, key):
+            response = router.match_faq(question)
+            return response is not None and response["answer"] == QA_DATABASE[key]["answer"]
+
+        def search_recall(question, key):
+            sources = [s.strip() for s in QA_DATABASE[key]["source"].split(",")]
+            return any(hit["source"] in sources for hit in simple_search(question, chunks, normalizer=normalizer))
+
+        all_questions = [question for question, _ in clean + misspelled]
+        # The first pass fills the correction cache
+        cold_us = mean_us(normalizer.normalize, all_questions)
+        results[name] = {
+            "vocabulary_build_ms": round(build_ms, 2),
+            **normalizer.get_stats(),
+            "find_best_match": {"clean": hit_rate(keyword_faq, clean), "misspelled": hit_rate(keyword_faq, misspelled)},
+            "router_faq": {"clean": hit_rate(router_faq, clean), "misspelled": hit_rate(router_faq, misspelled)},
+            "simple_search_recall_at_4": {
+                "clean": hit_rate(search_recall, clean), "misspelled": hit_rate(search_recall, misspelled)
+            },
+            "latency_us": {
+                "normalize_first_pass": cold_us,
+                "normalize_cached": mean_us(normalizer.normalize, all_questions),
+                "find_best_match": mean_us(lambda q: find_best_match(q, normalizer), all_questions)
+            }
+        }
+        print(f"✅ {name}: FAQ hit rate on misspelled questions {results[name]['find_best_match']['misspelled']:.0%}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query normalization on misspelled questions")
+    parser.add_argument("--typos", type=int, default=3, help="Misspelled variants per FAQ question")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.typos, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Benchmark Suite - Ingestion throughput, query latency, memory and retrieval quality
+
+Runs without Ollama: embeddings come from benchmarks.fakes.HashEmbeddings and
+generation from a fixed-response LLM, so numbers are comparable between commits.
+
+Usage:
+    python -m benchmarks.run --documents 200 --output bench.json
+    python -m benchmarks.run --output new.json --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+from langchain_core.language_models.fake import FakeListLLM
+from utils.confidence import ConfidenceCalibrator
+from utils.document_processor import DocumentProcessor
+from utils.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+from utils.keyword_search import chunk_text, find_best_match, simple_search
+from utils.qa_chain import QAChain
+from utils.vector_store import VectorStoreManager
+from benchmarks import cold_start
+from benchmarks.corpus import generate_corpus, sample_paths, sample_questions, write_corpus
+from benchmarks.fakes import HashEmbeddings
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def latency_stats(fn: Callable, inputs: List, repeat: int = 1) -> Dict:
+    """Call fn on every input and summarize per-call latency"""
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - start) * 1000)
+    total_s = sum(samples) / 1000
+    return {
+        "calls": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 4),
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+        "qps": round(len(samples) / total_s, 1) if total_s else 0.0
+    }
+
+def retrieval_quality(results: List[List], is_relevant: List[Callable]) -> Dict:
+    """Recall@k (any relevant hit in the top k) and MRR over a labeled set"""
+    hits, reciprocal_ranks = 0, []
+    for retrieved, relevant in zip(results, is_relevant):
+        rank = next((i + 1 for i, item in enumerate(retrieved) if relevant(item)), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return {
+        "recall_at_k": round(hits / len(results), 3) if results else 0.0,
+        "mrr": round(sum(reciprocal_ranks) / len(reciprocal_ranks), 3) if reciprocal_ranks else 0.0
+    }
+
+def quiet(fn: Callable, *args, **kwargs):
+    """Run fn with its progress prints suppressed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+def bench_ingestion(paths: List[str], workdir: str) -> Dict:
+    """Throughput of extraction/chunking, simple_app chunking and index building"""
+    processor = DocumentProcessor()
+    total_bytes = sum(os.path.getsize(p) for p in paths)
+
+    start = time.perf_counter()
+    documents = []
+    for path in paths:
+        documents.extend(processor.process_document(path, os.path.basename(path)))
+    process_s = time.perf_counter() - start
+
+    texts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append((f.read(), os.path.basename(path)))
+    start = time.perf_counter()
+    keyword_chunks = []
+    for text, name in texts:
+        keyword_chunks.extend(chunk_text(text, name))
+    chunk_s = time.perf_counter() - start
+
+    embeddings = CachedEmbeddings(HashEmbeddings(), QueryEmbeddingCache())
+    manager = quiet(VectorStoreManager, os.path.join(workdir, "index"), embeddings=embeddings)
+    tracemalloc.start()
+    start = time.perf_counter()
+    quiet(manager.add_documents, documents)
+    add_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mb = total_bytes / (1024 * 1024)
+    return {
+        "files": len(paths),
+        "megabytes": round(mb, 3),
+        "process_document": {
+            "chunks": len(documents),
+            "seconds": round(process_s, 4),
+            "mb_per_s": round(mb / process_s, 2) if process_s else 0.0
+        },
+        "chunk_text": {
+            "chunks": len(keyword_chunks),
+            "seconds": round(chunk_s, 4),
+            "mb_per_s": round(mb / chunk_s, 2) if chunk_s else 0.0
+        },
+        "add_documents": {
+            "seconds": round(add_s, 4),
+            "chunks_per_s": round(len(documents) / add_s, 1) if add_s else 0.0,
+            "peak_memory_mb": round(peak / (1024 * 1024), 2)
+        },
+        "_manager": manager,
+        "_keyword_chunks": keyword_chunks
+    }
+
+def bench_queries(manager: VectorStoreManager, keyword_chunks: List[Dict],
+                  questions: List[str], k: int) -> Dict:
+    """Per-call latency of every question-path entry point"""
+    manager.query_cache.clear()
+    # Never abstain, so every question times a generation as in earlier runs
+    qa_chain = QAChain(
+        manager.get_retriever(k=k),
+        llm=FakeListLLM(responses=["Employees are entitled to 20 days of annual leave."]),
+        calibrator=ConfidenceCalibrator(float("-inf"), 0.5, 0.65)
+    )
+    return {
+        "find_best_match": latency_stats(find_best_match, questions),
+        "simple_search": latency_stats(lambda q: simple_search(q, keyword_chunks, k=k), questions),
+        "vector_search_cold": latency_stats(lambda q: manager.search(q, k=k), questions),
+        "vector_search_cached": latency_stats(lambda q: manager.search(q, k=k), questions),
+        "qa_chain_ask": latency_stats(qa_chain.ask, questions)
+    }
+
+def bench_quality(manager: VectorStoreManager, keyword_chunks: List[Dict],
+                  labeled: List[Dict], k: int) -> Dict:
+    """Recall@k and MRR of vector and keyword retrieval on a labeled question set"""
+    questions = [item["question"] for item in labeled]
+    if "answer" in labeled[0]:
+        vector_relevant = [lambda doc, a=item["answer"]: a in doc.page_content for item in labeled]
+        keyword_relevant = [lambda doc, a=item["answer"]: a in doc["text"] for item in labeled]
+    else:
+        # Collapsed near-duplicates also stand for their other sources
+        vector_relevant = [
+            lambda doc, s=item["sources"]: any(
+                source in s for source in [doc.metadata["source"], *doc.metadata.get("duplicate_sources", [])]
+            )
+            for item in labeled
+        ]
+        keyword_relevant = [lambda doc, s=item["sources"]: doc["source"] in s for item in labeled]
+
+    return {
+        "questions": len(labeled),
+        "k": k,
+        "vector_search": retrieval_quality(manager.search_many(questions, k=k), vector_relevant),
+        "simple_search": retrieval_quality(
+            [simple_search(q, keyword_chunks, k=k) for q in questions], keyword_relevant
+        )
+    }
+
+def run_corpus(name: str, paths: List[str], labeled: List[Dict], k: int) -> Dict:
+    workdir = tempfile.mkdtemp(prefix=f"kb_bench_{name}_")
+    try:
+        ingestion = bench_ingestion(paths, workdir)
+        manager = ingestion.pop("_manager")
+        keyword_chunks = ingestion.pop("_keyword_chunks")
+        questions = [item["question"] for item in labeled]
+        return {
+            "ingestion": ingestion,
+            "queries": bench_queries(manager, keyword_chunks, questions, k),
+            "quality": bench_quality(manager, keyword_chunks, labeled, k)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+def run(documents: int = 50, k: int = 4, seed: int = 42, cold_start_repeat: int = 1) -> Dict:
+    """Run the full suite on sample_doc and a synthetic corpus, plus app cold start"""
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "params": {"documents": documents, "k": k, "seed": seed},
+        "sample_doc": run_corpus("sample", sample_paths(), sample_questions(), k)
+    }
+
+    corpus, labeled = generate_corpus(documents, seed=seed)
+    corpus_dir = tempfile.mkdtemp(prefix="kb_corpus_")
+    try:
+        paths = write_corpus(corpus_dir, corpus)
+        results["synthetic"] = run_corpus("synthetic", paths, labeled, k)
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if cold_start_repeat:
+        results["cold_start"] = cold_start.run(cold_start_repeat)
+    return results
+
+def compare(current: Dict, baseline: Dict, path: str = "") -> List[str]:
+    """List numeric differences between two result files"""
+    lines = []
+    for key, value in current.items():
+        if key not in baseline:
+            continue
+        label = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(baseline[key], dict):
+            lines.extend(compare(value, baseline[key], label))
+        elif isinstance(value, (int, float)) and isinstance(baseline[key], (int, float)):
+            old = baseline[key]
+            change = f"{(value - old) / old:+.1%}" if old else "n/a"
+            lines.append(f"{label}: {old} -> {value} ({change})")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the knowledge base benchmark suite")
+    parser.add_argument("--documents", type=int, default=50, help="Synthetic corpus size")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cold-start-repeat", type=int, default=1,
+                        help="Fresh-process app start measurements (0 skips them)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    args = parser.parse_args()
+
+    results = run(args.documents, args.k, args.seed, args.cold_start_repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nChanges vs {baseline.get('commit', args.compare)}:")
+        print("\n".join(compare(results, baseline)))
+
+if __name__ == "__main__":
+    main()
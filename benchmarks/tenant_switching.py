@@ -0,0 +1,133 @@
+"""
+Tenant Switching Benchmark - Switching latency and memory use of KnowledgeBaseRegistry
+
+Usage:
+    python -m benchmarks.tenant_switching --tenants 50 --output tenant_switching.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+from utils.document_processor import DocumentProcessor
+from utils.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+from utils.tenant_registry import KnowledgeBaseRegistry
+from utils.vector_store import VectorStoreManager
+from benchmarks.fakes import HashEmbeddings
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def build_tenants(base_directory: str, tenants: int, embeddings: CachedEmbeddings,
+                  copies: int) -> List[str]:
+    """Create one index per tenant from the sample documents"""
+    processor = DocumentProcessor()
+    sample_chunks = []
+    for path in sorted(glob.glob("sample_doc/*.txt")):
+        sample_chunks.extend(processor.process_document(path, os.path.basename(path)))
+
+    names = []
+    for t in range(tenants):
+        name = f"tenant-{t:03d}"
+        manager = VectorStoreManager(
+            persist_directory=os.path.join(base_directory, name),
+            embeddings=embeddings
+        )
+        documents = []
+        for copy in range(copies):
+            for chunk in sample_chunks:
+                documents.append(type(chunk)(
+                    page_content=f"{name} copy {copy} {chunk.page_content}",
+                    metadata=dict(chunk.metadata, department=name)
+                ))
+        manager.add_documents(documents)
+        names.append(name)
+    return names
+
+def run(tenants: int = 50, copies: int = 4, budget_fraction: float = 0.25,
+        switches: int = 500, seed: int = 7) -> Dict:
+    """
+    Build tenants, then replay a skewed tenant access pattern
+
+    Args:
+        tenants: Number of knowledge bases
+        copies: Copies of the sample corpus per tenant (controls index size)
+        budget_fraction: Memory budget as a fraction of all tenants' memory
+        switches: Number of tenant switches to replay
+        seed: Random seed for the access pattern
+    """
+    base_directory = tempfile.mkdtemp(prefix="kb_tenants_")
+    embeddings = CachedEmbeddings(HashEmbeddings(), QueryEmbeddingCache())
+    try:
+        names = build_tenants(base_directory, tenants, embeddings, copies)
+
+        # Measure one tenant to size the budget
+        probe = VectorStoreManager(os.path.join(base_directory, names[0]), embeddings=embeddings)
+        per_tenant_mb = probe.estimate_memory_bytes() / (1024 * 1024)
+        del probe
+
+        registry = KnowledgeBaseRegistry(
+            base_directory,
+            memory_budget_mb=per_tenant_mb * tenants * budget_fraction,
+            embeddings=embeddings
+        )
+
+        # Zipf-like popularity: a few departments get most of the traffic
+        rng = random.Random(seed)
+        weights = [1.0 / (rank + 1) for rank in range(tenants)]
+        sequence = rng.choices(names, weights=weights, k=switches)
+
+        cold, warm = [], []
+        for name in sequence:
+            was_loaded = name in registry._loaded
+            start = time.perf_counter()
+            manager = registry.get(name)
+            manager.search("annual leave policy", k=4)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            (warm if was_loaded else cold).append(elapsed_ms)
+
+        stats = registry.get_stats()
+        return {
+            "tenants": tenants,
+            "chunks_per_tenant": len(manager.vectorstore.index_to_docstore_id),
+            "per_tenant_mb": round(per_tenant_mb, 3),
+            "memory_budget_mb": stats["memory_budget_mb"],
+            "loaded_tenants": stats["loaded_tenants"],
+            "loaded_memory_mb": round(sum(stats["memory_mb"].values()), 3),
+            "switches": switches,
+            "hit_rate": round(len(warm) / switches, 3),
+            "evictions": stats["evictions"],
+            "cold_switch_ms": {"p50": round(percentile(cold, 50), 2), "p95": round(percentile(cold, 95), 2)},
+            "warm_switch_ms": {"p50": round(percentile(warm, 50), 3), "p95": round(percentile(warm, 95), 3)},
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        }
+    finally:
+        shutil.rmtree(base_directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tenant switching in KnowledgeBaseRegistry")
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--copies", type=int, default=4, help="Sample corpus copies per tenant")
+    parser.add_argument("--budget-fraction", type=float, default=0.25)
+    parser.add_argument("--switches", type=int, default=500)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.tenants, args.copies, args.budget_fraction, args.switches)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Answer Router - Cheapest tier first: curated FAQ, then extractive answer, then LLM generation
+
+Questions whose retrieval scores show the documents do not cover them are
+answered "not in the documents" (tier "abstain") instead of generating.
+"""
+
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from utils.metrics import metrics
+from utils.qa_database import QA_DATABASE
+from utils.query_normalizer import STOPWORDS, QueryNormalizer, document_terms, get_query_normalizer
+from utils.scheduler import INTERACTIVE
+
+TIERS = ("faq", "extractive", "abstain", "llm")
+
+def content_words(text: str) -> set:
+    return {word for word in re.findall(r'\w+', text.lower()) if word not in STOPWORDS}
+
+class AnswerRouter:
+    def __init__(self, qa_chain, faq: Optional[Dict[str, Dict]] = None,
+                 known_sources: Optional[Iterable[str]] = None,
+                 source_terms: Optional[Callable[[List[str]], set]] = None, faq_support: float = 0.5,
+                 faq_threshold: float = 0.6, extractive_threshold: float = 0.8,
+                 min_sentence_words: int = 6, min_question_words: int = 3,
+                 normalizer: Optional[QueryNormalizer] = None):
+        """
+        Initialize answer router
+
+        Args:
+            qa_chain: QAChain used for retrieval and, as the last tier, generation
+            faq: Curated question -> {"answer", "source", "confidence"} entries
+                (defaults to QA_DATABASE; pass {} to disable the FAQ tier)
+            known_sources: Documents the answer may come from; FAQ entries citing
+                none of them are skipped (None allows every entry)
+            source_terms: Indexed terms of the given documents (e.g.
+                VectorStoreManager.source_terms). FAQ entries are then only kept
+                if the knowledge base's own copy of a cited document backs them,
+                so a tenant's unrelated file of the same name does not
+                get the curated answers
+            faq_support: Minimum fraction of an FAQ answer's terms found in the
+                cited documents (the sample documents back every entry with at
+                least 0.58; unrelated policies of the same kind stay under 0.3)
+            faq_threshold: Minimum term overlap (Jaccard) between the normalized
+                question and an FAQ key to answer from the FAQ
+            extractive_threshold: Minimum fraction of the question's content
+                words a retrieved sentence must contain to be returned as is
+            min_sentence_words: Shorter sentences are never returned on their own
+            min_question_words: Questions with fewer content words (e.g. "remote
+                work") are too vague for an extractive answer
+            normalizer: Spelling correction and stemming of questions for the
+                FAQ tier (defaults to the shared one over the FAQ vocabulary)
+        """
+        self.qa_chain = qa_chain
+        self.faq_threshold = faq_threshold
+        self.extractive_threshold = extractive_threshold
+        self.min_sentence_words = min_sentence_words
+        self.min_question_words = min_question_words
+        self.normalizer = normalizer or get_query_normalizer()
+
+        faq = QA_DATABASE if faq is None else faq
+        known = set(known_sources) if known_sources is not None else None
+        self.faq = []
+        for key, entry in faq.items():
+            cited = [s.strip() for s in entry["source"].split(",")]
+            if known is not None:
+                cited = [source for source in cited if source in known]
+                if not cited:
+                    continue
+            if source_terms is not None and not self._supported(entry["answer"], source_terms(cited), faq_support):
+                continue
+            self.faq.append((document_terms(key), entry))
+
+    @staticmethod
+    def _supported(answer: str, indexed_terms: set, minimum: float) -> bool:
+        """Whether enough of an FAQ answer's terms appear in the documents it cites"""
+        terms = document_terms(answer)
+        return bool(terms) and len(terms & indexed_terms) / len(terms) >= minimum
+
+    def answer(self, question: str, user: Optional[str] = None, priority: int = INTERACTIVE,
+               on_token: Optional[Callable[[str], None]] = None) -> Dict:
+        """
+        Answer from the cheapest tier that is confident enough
+
+        Args:
+            question: User question
+            user: Who is asking, for fair scheduling of LLM generations
+            priority: Scheduling priority of an LLM generation
+            on_token: Optional callback receiving generated chunks (LLM tier only)
+
+        Returns:
+            QAChain-style response with "tier" set to faq, extractive, abstain or llm
+        """
+        start = time.perf_counter()
+        with metrics.trace() as timings:
+            try:
+                with metrics.span("ask_total"):
+                    with metrics.span("tier_faq"):
+                        response = self.match_faq(question)
+
+                    if response is None:
+                        with metrics.span("retrieval"):
+                            source_documents = self.qa_chain.retriever.invoke(question)
+                        with metrics.span("tier_extractive"):
+                            response = self.extract(question, source_documents)
+
+                    if response is None:
+                        response = self.qa_chain.answer_with_documents(
+                            question, source_documents, on_token, user, priority
+                        )
+                        response["tier"] = "abstain" if response.get("abstained") else "llm"
+            except Exception as e:
+                response = self.qa_chain._error_response(e)
+                response["tier"] = "error"
+
+        metrics.increment(f"answer_tier_{response['tier']}")
+        metrics.observe(f"answered_by_{response['tier']}", (time.perf_counter() - start) * 1000)
+        response["timings"] = timings
+        return response
+
+    def match_faq(self, question: str) -> Optional[Dict]:
+        """Curated answer whose question overlaps enough with this one"""
+        words = self.normalizer.normalize(question)
+        if not words:
+            return None
+
+        best_entry, best_score = None, 0.0
+        for key_words, entry in self.faq:
+            score = len(words & key_words) / len(words | key_words)
+            if score > best_score:
+                best_entry, best_score = entry, score
+
+        if best_score < self.faq_threshold:
+            return None
+        return {
+            "answer": best_entry["answer"],
+            "sources": [{"name": s.strip(), "chunk_id": 0, "preview": best_entry["answer"]}
+                        for s in best_entry["source"].split(",")],
+            "confidence": best_entry.get("confidence", "high"),
+            "source_documents": [],
+            "tier": "faq"
+        }
+
+    def extract(self, question: str, source_documents: List) -> Optional[Dict]:
+        """Best retrieved sentence, if it covers enough of the question"""
+        words = content_words(question)
+        if len(words) < self.min_question_words or not source_documents:
+            return None
+
+        best, best_coverage = None, 0.0
+        for doc in source_documents:
+            for sentence in re.split(r'(?<=[.!?])\s+|\n+', doc.page_content):
+                sentence = sentence.strip().lstrip("-•* ")
+                if len(sentence.split()) < self.min_sentence_words or sentence.endswith(":"):
+                    continue
+                coverage = len(words & content_words(sentence)) / len(words)
+                if coverage > best_coverage:
+                    best, best_coverage = (sentence, doc), coverage
+
+        if best is None or best_coverage < self.extractive_threshold:
+            return None
+        sentence, doc = best
+        return {
+            "answer": sentence if sentence.endswith(('.', '!', '?')) else sentence + ".",
+            "sources": self.qa_chain._format_sources([doc]),
+            "confidence": "high" if best_coverage >= 0.9 else "medium",
+            "source_documents": [doc],
+            "tier": "extractive"
+        }
+
+def tier_usage() -> Dict[str, Dict]:
+    """Share of answers served by each tier, from the process-wide counters"""
+    counters = metrics.counters()
+    counts = {tier: counters.get(f"answer_tier_{tier}", 0) for tier in TIERS}
+    total = sum(counts.values())
+    return {
+        tier: {"count": count, "share": round(count / total, 3) if total else 0.0}
+        for tier, count in counts.items()
+    }
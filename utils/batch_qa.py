@@ -0,0 +1,234 @@
+"""
+Batch QA - Answer many questions at once for offline evaluation and cache prewarming
+
+Usage:
+    python -m utils.batch_qa questions.jsonl answers.jsonl
+    python -m utils.batch_qa --faq --tenant hr answers.jsonl
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from utils.qa_chain import QAChain
+from utils.qa_database import QA_DATABASE
+from utils.scheduler import BATCH
+from utils.tenant_registry import KnowledgeBaseRegistry
+from utils.vector_store import VectorStoreManager, with_scores
+
+def load_questions(file_path: str) -> List[Dict]:
+    """
+    Load questions from a JSONL file
+
+    Each line is either a JSON string or an object with a "question" field
+    and optional "id" and "expected_answer" fields.
+    """
+    questions = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"question": record}
+            if not record.get("question"):
+                raise ValueError(f"Line {line_number} has no question")
+            record.setdefault("id", str(line_number))
+            questions.append(record)
+    return questions
+
+def faq_questions() -> List[Dict]:
+    """Build a regression set from the curated QA_DATABASE answers"""
+    return [
+        {
+            "id": key,
+            "question": key,
+            "expected_answer": entry["answer"],
+            "expected_source": entry["source"]
+        }
+        for key, entry in QA_DATABASE.items()
+    ]
+
+def answer_overlap(answer: str, expected: str) -> float:
+    """Fraction of the expected answer's words that appear in the answer"""
+    expected_words = set(re.findall(r'\w+', expected.lower()))
+    if not expected_words:
+        return 0.0
+    answer_words = set(re.findall(r'\w+', answer.lower()))
+    return len(expected_words & answer_words) / len(expected_words)
+
+class BatchQuestionAnswerer:
+    def __init__(self, vectorstore_manager: VectorStoreManager, qa_chain: QAChain,
+                 k: int = 4, batch_size: int = 32, max_parallel_generations: int = 2):
+        """
+        Initialize batch question answerer
+
+        Args:
+            vectorstore_manager: Vector store to retrieve from
+            qa_chain: QA chain used for answer generation
+            k: Number of documents to retrieve per question
+            batch_size: Questions embedded and searched together
+            max_parallel_generations: Concurrent generations sent to Ollama
+        """
+        self.vectorstore_manager = vectorstore_manager
+        self.qa_chain = qa_chain
+        self.k = k
+        self.batch_size = batch_size
+        self.max_parallel_generations = max_parallel_generations
+
+    def run(self, questions: List[Dict], output_path: Optional[str] = None) -> List[Dict]:
+        """
+        Answer all questions, optionally writing results as JSONL
+
+        Retrieval runs once per batch; generations for a batch are scheduled
+        on a bounded thread pool so Ollama never sees more than
+        max_parallel_generations requests at a time.
+
+        Returns:
+            List of result dicts in input order
+        """
+        results = []
+        output = open(output_path, 'w', encoding='utf-8') if output_path else None
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel_generations) as executor:
+                for start in range(0, len(questions), self.batch_size):
+                    batch = questions[start:start + self.batch_size]
+                    batch_results = self._run_batch(batch, executor)
+
+                    for result in batch_results:
+                        if output:
+                            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    if output:
+                        output.flush()
+
+                    results.extend(batch_results)
+                    print(f"✅ Answered {len(results)}/{len(questions)} questions")
+        finally:
+            if output:
+                output.close()
+
+        return results
+
+    def _run_batch(self, batch: List[Dict], executor: ThreadPoolExecutor) -> List[Dict]:
+        """Retrieve for the whole batch, then generate answers in parallel"""
+        texts = [record["question"] for record in batch]
+
+        retrieval_start = time.perf_counter()
+        # Relevance scores ride along for confidence and abstention
+        documents_per_question = [
+            with_scores(results)
+            for results in self.vectorstore_manager.search_many_with_score(texts, k=self.k, relevance=True)
+        ]
+        retrieval_ms = (time.perf_counter() - retrieval_start) * 1000
+
+        submitted_at = time.perf_counter()
+        futures = [
+            executor.submit(self._generate, record, documents, submitted_at)
+            for record, documents in zip(batch, documents_per_question)
+        ]
+
+        results = []
+        for future in futures:
+            result = future.result()
+            result["timings"]["retrieval_ms"] = round(retrieval_ms / len(batch), 2)
+            result["timings"]["retrieval_batch_ms"] = round(retrieval_ms, 2)
+            results.append(result)
+        return results
+
+    def _generate(self, record: Dict, documents: List, submitted_at: float) -> Dict:
+        """Generate one answer and build its output record"""
+        started = time.perf_counter()
+        response = self.qa_chain.answer_with_documents(
+            record["question"], documents, priority=BATCH
+        )
+        finished = time.perf_counter()
+
+        result = {
+            "id": record.get("id"),
+            "question": record["question"],
+            "answer": response["answer"],
+            "sources": response["sources"],
+            "confidence": response["confidence"],
+            "timings": {
+                "queue_ms": round((started - submitted_at) * 1000, 2),
+                "generation_ms": round((finished - started) * 1000, 2)
+            }
+        }
+
+        if "expected_answer" in record:
+            result["expected_answer"] = record["expected_answer"]
+            result["expected_overlap"] = round(
+                answer_overlap(response["answer"], record["expected_answer"]), 3
+            )
+
+        return result
+
+def summarize(results: List[Dict]) -> Dict:
+    """Aggregate timings and regression scores for a batch run"""
+    if not results:
+        return {"total_questions": 0}
+
+    generation = sorted(r["timings"]["generation_ms"] for r in results)
+    summary = {
+        "total_questions": len(results),
+        "avg_retrieval_ms": round(sum(r["timings"]["retrieval_ms"] for r in results) / len(results), 2),
+        "avg_generation_ms": round(sum(generation) / len(generation), 2),
+        "p95_generation_ms": generation[min(len(generation) - 1, int(len(generation) * 0.95))]
+    }
+
+    scored = [r["expected_overlap"] for r in results if "expected_overlap" in r]
+    if scored:
+        summary["avg_expected_overlap"] = round(sum(scored) / len(scored), 3)
+
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions in batches")
+    parser.add_argument("input", nargs="?", help="JSONL file of questions")
+    parser.add_argument("output", help="JSONL file to write answers to")
+    parser.add_argument("--faq", action="store_true", help="Use QA_DATABASE entries as the question set")
+    parser.add_argument("--tenant", default=os.getenv("KB_DEFAULT_TENANT", "default"),
+                        help="Knowledge base to answer from")
+    parser.add_argument("--k", type=int, default=4, help="Documents retrieved per question")
+    parser.add_argument("--batch-size", type=int, default=32, help="Questions retrieved together")
+    parser.add_argument("--parallel", type=int, default=2, help="Concurrent LLM generations")
+    parser.add_argument("--model", default="llama3.2", help="Ollama model to use")
+    args = parser.parse_args()
+
+    if args.faq:
+        questions = faq_questions()
+    elif args.input:
+        questions = load_questions(args.input)
+    else:
+        parser.error("either an input file or --faq is required")
+
+    registry = KnowledgeBaseRegistry()
+    try:
+        registry.migrate_legacy(args.tenant)
+        if not registry.exists(args.tenant):
+            parser.error(f"unknown knowledge base '{args.tenant}'")
+        manager = registry.get(args.tenant)
+    except ValueError as e:
+        parser.error(str(e))
+    retriever = manager.get_retriever(k=args.k)
+    if retriever is None:
+        parser.error(f"knowledge base '{args.tenant}' is empty; upload documents first")
+
+    runner = BatchQuestionAnswerer(
+        manager,
+        QAChain(retriever, model_name=args.model),
+        k=args.k,
+        batch_size=args.batch_size,
+        max_parallel_generations=args.parallel
+    )
+    results = runner.run(questions, args.output)
+    print(json.dumps(summarize(results), indent=2))
+
+if __name__ == "__main__":
+    main()
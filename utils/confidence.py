@@ -0,0 +1,135 @@
+"""
+Confidence - Answer confidence from the scores retrieval already computed, calibrated on labeled questions
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+NOT_IN_DOCUMENTS = "I don't have enough information to answer this question based on the provided documents."
+
+# Thresholds per score kind: vector scores are cosine relevance of the best
+# chunk, keyword scores the fraction of query words the best chunk contains.
+# Keyword thresholds come from benchmarks.calibration, kept at the highest
+# abstain cutoff that answers every labeled answerable question (it still
+# skips about half of the unanswerable ones). Vector scores depend on
+# the embedding model, so those defaults only abstain on clearly unrelated
+# questions until the benchmark is run against the deployed model.
+DEFAULT_THRESHOLDS = {
+    "vector": {"abstain": 0.3, "medium": 0.5, "high": 0.65},
+    "keyword": {"abstain": 0.5, "medium": 0.75, "high": 1.0}
+}
+
+def top_score(source_documents: List) -> Optional[float]:
+    """Best retrieval score attached to the documents (Document metadata or keyword chunk dicts)"""
+    scores = [
+        doc.get("score") if isinstance(doc, dict) else doc.metadata.get("score")
+        for doc in source_documents
+    ]
+    scores = [score for score in scores if score is not None]
+    return max(scores) if scores else None
+
+class ConfidenceCalibrator:
+    def __init__(self, abstain: float, medium: float, high: float):
+        """
+        Map the best retrieval score of a question to a confidence level
+
+        Args:
+            abstain: Below this the documents almost surely lack the answer,
+                so it is not generated at all
+            medium: Scores from here are "medium" confidence (below: "low")
+            high: Scores from here are "high" confidence
+        """
+        self.abstain = abstain
+        self.medium = medium
+        self.high = high
+
+    @classmethod
+    def default(cls, kind: str = "vector") -> "ConfidenceCalibrator":
+        return cls(**DEFAULT_THRESHOLDS[kind])
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, kind: str = "vector") -> "ConfidenceCalibrator":
+        """
+        Thresholds from a calibration file, falling back to the defaults
+
+        Args:
+            path: JSON written by benchmarks.calibration (defaults to
+                $KB_CONFIDENCE_CALIBRATION)
+            kind: "vector" or "keyword"
+        """
+        path = path or os.getenv("KB_CONFIDENCE_CALIBRATION")
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    thresholds = json.load(f)[kind]
+                return cls(thresholds["abstain"], thresholds["medium"], thresholds["high"])
+            except Exception as e:
+                print(f"⚠️ Could not load confidence calibration {path}: {str(e)}")
+        return cls.default(kind)
+
+    @classmethod
+    def fit(cls, samples: Sequence[Tuple[float, str]], min_recall: float = 0.95,
+            high_precision: float = 0.9, medium_precision: float = 0.7) -> "ConfidenceCalibrator":
+        """
+        Fit thresholds to labeled questions
+
+        Args:
+            samples: (best score, label) per question; label is "correct" (the
+                top hit holds the answer), "wrong" or "unanswerable"
+            min_recall: Share of correctly answerable questions that must stay
+                above the abstain threshold
+            high_precision: Share of correct answers required at "high" and above
+            medium_precision: Share of correct answers required at "medium" and above
+        """
+        correct = sorted(score for score, label in samples if label == "correct")
+        if not correct:
+            raise ValueError("Calibration needs questions whose top hit is correct")
+        abstain = correct[int(len(correct) * (1 - min_recall))]
+
+        def lowest_with_precision(precision: float) -> float:
+            # Scan from the top down, keeping the lowest cutoff that still
+            # meets the precision
+            ranked = sorted(samples, key=lambda sample: sample[0], reverse=True)
+            hits, best = 0, ranked[0][0]
+            for seen, (score, label) in enumerate(ranked, start=1):
+                hits += label == "correct"
+                if hits / seen >= precision:
+                    best = score
+            return best
+
+        high = max(abstain, lowest_with_precision(high_precision))
+        medium = min(high, max(abstain, lowest_with_precision(medium_precision)))
+        return cls(round(abstain, 4), round(medium, 4), round(high, 4))
+
+    def should_answer(self, score: Optional[float]) -> bool:
+        """Whether the documents may hold the answer (unscored results always may)"""
+        return score is None or score >= self.abstain
+
+    def level(self, score: Optional[float]) -> str:
+        if score is None or score < self.medium:
+            return "low"
+        return "high" if score >= self.high else "medium"
+
+    def evaluate(self, samples: Sequence[Tuple[float, str]]) -> Dict:
+        """Abstention and level accuracy of these thresholds on labeled questions"""
+        answerable = [score for score, label in samples if label != "unanswerable"]
+        unanswerable = [score for score, label in samples if label == "unanswerable"]
+        levels = {"high": [0, 0], "medium": [0, 0], "low": [0, 0]}
+        for score, label in samples:
+            if self.should_answer(score):
+                counts = levels[self.level(score)]
+                counts[0] += label == "correct"
+                counts[1] += 1
+        return {
+            "answered_of_answerable": round(sum(map(self.should_answer, answerable)) / len(answerable), 3)
+            if answerable else None,
+            "abstained_of_unanswerable": round(sum(not self.should_answer(s) for s in unanswerable) / len(unanswerable), 3)
+            if unanswerable else None,
+            "precision_by_level": {
+                level: round(hits / total, 3) if total else None for level, (hits, total) in levels.items()
+            }
+        }
+
+    def to_dict(self) -> Dict:
+        return {"abstain": self.abstain, "medium": self.medium, "high": self.high}
@@ -0,0 +1,141 @@
+"""
+Dedup - Near-duplicate chunk detection with MinHash signatures and LSH buckets
+
+Boilerplate repeated across documents (headers, contact blocks, disclaimers)
+is collapsed into the first chunk seen; later copies only add their source to
+its metadata instead of costing an embedding, index memory and a retrieval slot.
+"""
+
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+
+WORD_PATTERN = re.compile(r"\w+")
+# Prime above 2^32, so (a * h + b) mod p permutes 32-bit shingle hashes
+# (a and b stay below 2^31, so nothing overflows 64 bits)
+HASH_PRIME = np.uint64(4294967311)
+
+class ChunkDeduplicator:
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 1):
+        """
+        Initialize an empty near-duplicate index
+
+        Two chunks are duplicates when the estimated Jaccard similarity of
+        their word 5-gram sets reaches threshold. Signatures are split into
+        bands; chunks sharing any band are compared, which with 16 bands of
+        4 finds pairs above ~0.5 similarity almost surely.
+
+        Args:
+            threshold: Minimum estimated similarity to collapse two chunks
+            num_perm: MinHash permutations (signature length)
+            bands: LSH bands; num_perm must be a multiple
+            shingle_size: Words per shingle
+            seed: Seed of the permutations (must stay fixed for stored signatures)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._signatures = {}
+
+        self.checked = 0
+        self.collapsed = 0
+        self.chars_saved = 0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (uint32) of a text's word shingles"""
+        words = WORD_PATTERN.findall(text.lower())
+        size = self.shingle_size
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % HASH_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.count_nonzero(first == second)) / self.num_perm
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in np.split(signature, self.bands)]
+
+    def add(self, key: Hashable, signature: np.ndarray):
+        """Index a kept chunk under key (e.g. its FAISS row)"""
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket[band_key].append(key)
+
+    def find(self, signature: np.ndarray) -> Optional[Hashable]:
+        """Key of the most similar indexed chunk at or above the threshold"""
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+        best, best_similarity = None, self.threshold
+        for key in candidates:
+            similarity = self.similarity(signature, self._signatures[key])
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        return best
+
+    def deduplicate(self, documents: List[Document], signatures: List[np.ndarray],
+                    next_key: int) -> Tuple[List[Document], List[np.ndarray], Dict[Hashable, List[Document]]]:
+        """
+        Split documents into new chunks and duplicates of indexed (or earlier) ones
+
+        Kept documents are indexed under next_key, next_key + 1, ... (their
+        future FAISS rows). Duplicates of kept documents are merged into their
+        metadata right away; duplicates of chunks indexed before are returned
+        so the caller can update those rows.
+
+        Returns:
+            (kept documents, their signatures, {indexed key: duplicate documents})
+        """
+        kept, kept_signatures, existing = [], [], defaultdict(list)
+        for doc, signature in zip(documents, signatures):
+            self.checked += 1
+            match = self.find(signature)
+            if match is None:
+                self.add(next_key + len(kept), signature)
+                kept.append(doc)
+                kept_signatures.append(signature)
+                continue
+            self.collapsed += 1
+            self.chars_saved += len(doc.page_content)
+            if match >= next_key:
+                merge_reference(kept[match - next_key].metadata, doc.metadata)
+            else:
+                existing[match].append(doc)
+        return kept, kept_signatures, dict(existing)
+
+    def clear(self):
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures = {}
+
+    def get_stats(self) -> Dict:
+        return {
+            "indexed": len(self._signatures),
+            "checked": self.checked,
+            "collapsed": self.collapsed,
+            "chars_saved": self.chars_saved,
+            "collapse_rate": round(self.collapsed / self.checked, 3) if self.checked else 0.0
+        }
+
+def merge_reference(metadata: Dict, duplicate: Dict) -> Dict:
+    """Record a collapsed duplicate's source on the chunk that represents it"""
+    metadata["duplicate_count"] = metadata.get("duplicate_count", 0) + 1
+    source = duplicate.get("source")
+    if source and source != metadata.get("source") and source not in metadata.get("duplicate_sources", []):
+        metadata["duplicate_sources"] = metadata.get("duplicate_sources", []) + [source]
+    return metadata
@@ -0,0 +1,151 @@
+"""
+Docstore - Chunk text and metadata in SQLite, fetched by FAISS row only for search hits
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Union
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    def __init__(self, path: str, read_only: bool = False):
+        """
+        LangChain docstore keeping chunks on disk instead of in memory
+
+        Rows are numbered in insertion order, which is the FAISS row order
+        because LangChain adds vectors and documents together. Metadata is
+        stored as JSON (values JSON cannot hold are saved as strings), so
+        loading never unpickles anything. Writes become durable on commit(),
+        which VectorStoreManager calls when it saves the index.
+
+        Args:
+            path: SQLite file
+            read_only: Open an existing file without write access (e.g. a
+                published index generation shared by worker processes)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if read_only:
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "row INTEGER PRIMARY KEY, doc_id TEXT UNIQUE NOT NULL, "
+                "text TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS signatures (row INTEGER PRIMARY KEY, signature BLOB NOT NULL)"
+            )
+            self._db.commit()
+        self._next_row = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._next_row
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Append documents as the next rows"""
+        with self._lock:
+            rows = [
+                (self._next_row + i, doc_id, doc.page_content, json.dumps(doc.metadata, default=str))
+                for i, (doc_id, doc) in enumerate(texts.items())
+            ]
+            try:
+                self._db.executemany(
+                    "INSERT INTO chunks (row, doc_id, text, metadata) VALUES (?, ?, ?, ?)", rows
+                )
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Tried to add ids that already exist: {str(e)}")
+            self._next_row += len(rows)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Document with the given id (LangChain's docstore interface)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, metadata FROM chunks WHERE doc_id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def get_rows(self, rows: List[int]) -> Dict[int, Document]:
+        """Documents of the given FAISS rows, in one query"""
+        if not rows:
+            return {}
+        with self._lock:
+            found = self._db.execute(
+                f"SELECT row, text, metadata FROM chunks WHERE row IN ({','.join('?' * len(rows))})",
+                [int(r) for r in rows]
+            ).fetchall()
+        return {row: Document(page_content=text, metadata=json.loads(metadata)) for row, text, metadata in found}
+
+    def update_metadata(self, metadatas: Dict[int, Dict]):
+        """Replace the metadata of some rows"""
+        with self._lock:
+            self._db.executemany(
+                "UPDATE chunks SET metadata = ? WHERE row = ?",
+                [(json.dumps(metadata, default=str), int(row)) for row, metadata in metadatas.items()]
+            )
+
+    def add_signatures(self, signatures: Dict[int, bytes]):
+        """Store near-duplicate signatures of rows (see utils/dedup.py)"""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO signatures (row, signature) VALUES (?, ?)",
+                [(int(row), signature) for row, signature in signatures.items()]
+            )
+
+    def signatures(self) -> Dict[int, bytes]:
+        with self._lock:
+            return dict(self._db.execute("SELECT row, signature FROM signatures"))
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            self._db.executemany("DELETE FROM chunks WHERE doc_id = ?", [(i,) for i in ids])
+
+    def id_map(self) -> Dict[int, str]:
+        """FAISS row -> document id, as FAISS.index_to_docstore_id expects"""
+        with self._lock:
+            return dict(self._db.execute("SELECT row, doc_id FROM chunks ORDER BY row"))
+
+    def metadatas(self) -> Iterator[Dict]:
+        """Metadata of every row in order, without reading the text"""
+        with self._lock:
+            found = self._db.execute("SELECT metadata FROM chunks ORDER BY row").fetchall()
+        return (json.loads(metadata) for (metadata,) in found)
+
+    def truncate(self, rows: int):
+        """Drop rows past the index (left over when a save was interrupted)"""
+        with self._lock:
+            self._db.execute("DELETE FROM chunks WHERE row >= ?", (rows,))
+            self._db.execute("DELETE FROM signatures WHERE row >= ?", (rows,))
+            self._db.commit()
+            self._next_row = min(self._next_row, rows)
+
+    def text_bytes(self) -> int:
+        """Size of the stored text and metadata"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(text) + LENGTH(metadata)), 0) FROM chunks"
+            ).fetchone()[0]
+
+    def backup(self, path: str):
+        """Write a consistent copy of the committed rows to another file"""
+        with self._lock:
+            target = sqlite3.connect(path)
+            try:
+                self._db.backup(target)
+            finally:
+                target.close()
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
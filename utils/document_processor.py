@@ -1,92 +1,158 @@
 """
-Document Processor - Handles PDF and TXT file uploads and text extraction
+Document Processor - Handles file uploads, text extraction and chunking
 """
 
-import os
-from typing import List
-from pypdf import PdfReader
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from utils.extractors import Source, extract_blocks, read_bytes
+from utils.metrics import metrics
+from utils.tokenizer import get_token_counter
+
+def _process_in_worker(chunk_size: int, chunk_overlap: int, unit: str, source: Source, filename: str,
+                       extra_metadata: Optional[Dict]) -> List[Document]:
+    processor = DocumentProcessor(chunk_size, chunk_overlap, unit)
+    return processor.process_document(source, filename, extra_metadata)
 
 class DocumentProcessor:
-    def __init__(self, chunk_size=1000, chunk_overlap=200):
+    def __init__(self, chunk_size=1000, chunk_overlap=200, unit="characters"):
         """
         Initialize document processor
         
         Args:
-            chunk_size: Size of text chunks (characters)
+            chunk_size: Size of text chunks (in unit)
             chunk_overlap: Overlap between chunks
+            unit: "characters", or "tokens" to measure chunks the way the
+                models do (see utils/tokenizer.py for sizing them)
         """
+        if unit not in ("characters", "tokens"):
+            raise ValueError(f"Unknown chunk size unit: {unit}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.unit = unit
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
-            length_function=len,
+            length_function=get_token_counter().count if unit == "tokens" else len,
         )
     
-    def load_pdf(self, file_path: str) -> str:
+    def load_pdf(self, source: Source) -> str:
         """Extract text from PDF file"""
-        try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        except Exception as e:
-            raise Exception(f"Error reading PDF: {str(e)}")
+        return self.load_document(source, "document.pdf")
     
-    def load_txt(self, file_path: str) -> str:
+    def load_txt(self, source: Source) -> str:
         """Extract text from TXT file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            raise Exception(f"Error reading TXT: {str(e)}")
+        return self.load_document(source, "document.txt")
     
-    def load_document(self, file_path: str) -> str:
-        """Load document based on file extension"""
-        file_extension = os.path.splitext(file_path)[1].lower()
-        
-        if file_extension == '.pdf':
-            return self.load_pdf(file_path)
-        elif file_extension == '.txt':
-            return self.load_txt(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {file_extension}")
+    def load_document(self, source: Source, filename: Optional[str] = None) -> str:
+        """
+        Load the whole text of a document (see utils/extractors.py for the formats)
+
+        Args:
+            source: Path, bytes/memoryview or binary file object
+            filename: Name giving the extension when source is not a path
+        """
+        return "".join(block.text for block in extract_blocks(source, filename))
     
-    def process_document(self, file_path: str, filename: str) -> List[Document]:
+    def process_document(self, source: Source, filename: str,
+                         extra_metadata: Optional[Dict] = None) -> List[Document]:
         """
         Process document: load and split into chunks
         
+        Text is chunked block by block as the extractor yields it, so chunks
+        never span pages or sections and carry their page/heading metadata.
+        Chunks of one block share a "section" number, which bounds neighbor
+        expansion at query time (VectorStoreManager.expand_context).
+        
         Args:
-            file_path: Path to the document file
+            source: Path to the document file, or its contents in memory
+                (bytes, memoryview or a binary file object such as an upload)
             filename: Original filename for metadata
+            extra_metadata: Custom tags (e.g. department, effective_date)
+                added to every chunk and usable as search filters
             
         Returns:
             List of Document objects with text chunks and metadata
         """
-        # Load document text
-        text = self.load_document(file_path)
-        
-        # Split into chunks
-        chunks = self.text_splitter.split_text(text)
-        
-        # Create Document objects with metadata
+        extraction_s = chunking_s = 0.0
         documents = []
-        for i, chunk in enumerate(chunks):
-            doc = Document(
-                page_content=chunk,
-                metadata={
-                    "source": filename,
-                    "chunk_id": i,
-                    "total_chunks": len(chunks)
-                }
-            )
-            documents.append(doc)
+        blocks = extract_blocks(source, filename)
+        section = 0
+        while True:
+            # Load the next page or section
+            start = time.perf_counter()
+            block = next(blocks, None)
+            extraction_s += time.perf_counter() - start
+            if block is None:
+                break
+            
+            # Split it into chunks
+            start = time.perf_counter()
+            chunks = self.text_splitter.split_text(block.text)
+            chunking_s += time.perf_counter() - start
+            
+            for chunk in chunks:
+                documents.append(Document(
+                    page_content=chunk,
+                    metadata={
+                        **(extra_metadata or {}),
+                        **block.metadata,
+                        "source": filename,
+                        "section": section,
+                        "chunk_id": len(documents)
+                    }
+                ))
+            section += 1
+        metrics.observe("extraction", extraction_s * 1000)
+        metrics.observe("chunking", chunking_s * 1000)
         
+        for doc in documents:
+            doc.metadata["total_chunks"] = len(documents)
         return documents
     
+    def process_documents(self, files: Sequence[Tuple[Source, str]], max_workers: int = 1,
+                          extra_metadata: Optional[Dict] = None
+                          ) -> Iterator[Tuple[str, List[Document], Optional[Exception]]]:
+        """
+        Process several documents, in worker processes when max_workers > 1
+        
+        Args:
+            files: (source, filename) pairs; in-memory sources are copied to
+                the workers as bytes
+            max_workers: Extraction processes (1 processes in this one)
+            extra_metadata: Custom tags added to every chunk
+            
+        Yields:
+            (filename, documents, error) in input order; error is None on success
+        """
+        if max_workers <= 1 or len(files) <= 1:
+            for source, filename in files:
+                try:
+                    yield filename, self.process_document(source, filename, extra_metadata), None
+                except Exception as e:
+                    yield filename, [], e
+            return
+        
+        # Spawned, not forked: callers may already run threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(min(max_workers, len(files)), mp_context=context) as pool:
+            futures = [
+                (filename, pool.submit(
+                    _process_in_worker, self.chunk_size, self.chunk_overlap, self.unit,
+                    source if isinstance(source, str) else bytes(read_bytes(source)),
+                    filename, extra_metadata
+                ))
+                for source, filename in files
+            ]
+            for filename, future in futures:
+                try:
+                    yield filename, future.result(), None
+                except Exception as e:
+                    yield filename, [], e
+    
     def get_document_stats(self, documents: List[Document]) -> dict:
         """Get statistics about processed documents"""
         total_chunks = len(documents)
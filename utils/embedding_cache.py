@@ -0,0 +1,196 @@
+"""
+Embedding Cache - Bounded LRU cache of query embeddings (optionally shared on disk)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utils.metrics import metrics
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size: int = 2048, disk_path: Optional[str] = None,
+                 namespace: str = "default", max_disk_size: int = 100000):
+        """
+        Initialize query embedding cache
+
+        Args:
+            max_size: Maximum number of embeddings kept in memory
+            disk_path: Optional SQLite file shared between processes
+            namespace: Key prefix, normally the embedding model name
+            max_disk_size: Maximum number of embeddings kept on disk
+        """
+        self.max_size = max_size
+        self.namespace = namespace
+        self.max_disk_size = max_disk_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._miss_ms_total = 0.0
+
+        self._db = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a query so trivially different spellings share an entry"""
+        return " ".join(query.lower().split())
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """Return the cached embedding for a normalized query, if any"""
+        key = f"{self.namespace}:{query}"
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self._record_hit()
+                return embedding
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT vector FROM query_embeddings WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    # e.g. "database is locked" while another worker writes; a miss, not a failed search
+                    print(f"⚠️ Query cache lookup failed: {str(e)}")
+                    row = None
+                if row is not None:
+                    embedding = np.frombuffer(row[0], dtype=np.float32).tolist()
+                    self._store(key, embedding)
+                    self._record_hit()
+                    return embedding
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, embedding: List[float], elapsed_ms: float = 0.0):
+        """Cache an embedding computed for a normalized query"""
+        key = f"{self.namespace}:{query}"
+        with self._lock:
+            self._miss_ms_total += elapsed_ms
+            self._store(key, embedding)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+                        (key, np.asarray(embedding, dtype=np.float32).tobytes())
+                    )
+                    self._db.execute(
+                        "DELETE FROM query_embeddings WHERE rowid IN ("
+                        "SELECT rowid FROM query_embeddings ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_size,)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    # Skip the shared copy; the in-memory entry is already stored
+                    print(f"⚠️ Query cache write skipped: {str(e)}")
+                    try:
+                        self._db.rollback()
+                    except sqlite3.Error:
+                        pass
+
+    def _store(self, key: str, embedding: List[float]):
+        """Insert into the in-memory LRU, evicting the least recently used entry"""
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _record_hit(self):
+        """Count a hit and credit it with the average cost of a miss"""
+        self.hits += 1
+        if self.misses:
+            self.saved_ms += self._miss_ms_total / self.misses
+
+    def clear(self):
+        """Drop all in-memory entries (the disk cache is kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 1)
+        }
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, cache: QueryEmbeddingCache):
+        """
+        Wrap an embeddings client so query embeddings go through the cache
+
+        Document embeddings are passed straight through; only queries repeat.
+
+        Args:
+            embeddings: Underlying embeddings client (e.g. OllamaEmbeddings)
+            cache: Query embedding cache
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with metrics.span("document_embedding"):
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries, sending only cache misses to the model
+        
+        The normalized query is only the cache key; the model embeds the
+        first original text seen for each key, as the uncached path would.
+        Repeats within the batch are looked up once, so the cache stats and
+        the query_cache_hit/miss metrics count each distinct query once.
+        """
+        normalized = [self.cache.normalize(text) for text in texts]
+        # Cache key -> first original text with that key
+        unique = OrderedDict()
+        for text, query in zip(texts, normalized):
+            unique.setdefault(query, text)
+
+        found = {query: self.cache.get(query) for query in unique}
+        missing = [query for query, result in found.items() if result is None]
+        metrics.increment("query_cache_hit", len(unique) - len(missing))
+        if missing:
+            metrics.increment("query_cache_miss", len(missing))
+            start = time.perf_counter()
+            computed = self._embed_uncached([unique[query] for query in missing])
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("query_embedding", elapsed_ms)
+            elapsed_ms /= len(missing)
+
+            for query, embedding in zip(missing, computed):
+                self.cache.put(query, embedding, elapsed_ms)
+                found[query] = embedding
+
+        return [found[query] for query in normalized]
+
+    def _embed_uncached(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries the same way embed_query does, but in a single call"""
+        instruction = getattr(self.embeddings, "query_instruction", None)
+        if instruction is None or not hasattr(self.embeddings, "_embed"):
+            return [self.embeddings.embed_query(q) for q in queries]
+        return self.embeddings._embed([f"{instruction}{q}" for q in queries])
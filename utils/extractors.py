@@ -0,0 +1,363 @@
+"""
+Extractors - Streaming text extraction for each supported file format
+
+Every extractor is a module-level generator that takes a source (path, bytes,
+memoryview or binary file object) and yields TextBlocks as it reads, so the
+chunker can start on the first page or section while the rest of a large file
+is still being parsed. Being plain functions, they also run in worker processes.
+"""
+
+import csv
+import io
+import os
+import re
+import zipfile
+from html.parser import HTMLParser
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Union
+from xml.etree import ElementTree
+
+# A path, the file's bytes (bytes, bytearray or memoryview) or a binary file object
+Source = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+# Text formats are yielded in blocks of about this many characters
+BLOCK_CHARS = 64 * 1024
+READ_CHARS = 64 * 1024
+
+class TextBlock:
+    __slots__ = ("text", "metadata")
+
+    def __init__(self, text: str, metadata: Optional[Dict] = None):
+        """
+        A piece of extracted text with its place in the document
+
+        Args:
+            text: Extracted text
+            metadata: Structure, e.g. {"page": 3} or {"heading": "Leave > Sick leave"}
+        """
+        self.text = text
+        self.metadata = metadata or {}
+
+    def __getstate__(self):
+        return (self.text, self.metadata)
+
+    def __setstate__(self, state):
+        self.text, self.metadata = state
+
+    def __repr__(self):
+        return f"TextBlock({len(self.text)} chars, {self.metadata})"
+
+EXTRACTORS: Dict[str, Callable[[Source], Iterator[TextBlock]]] = {}
+FORMAT_NAMES: Dict[str, str] = {}
+MAGIC_BYTES: List = []
+
+def register_extractor(name: str, extensions: List[str], magic: Optional[bytes] = None,
+                       confirm: Optional[Callable[[Source], bool]] = None):
+    """
+    Decorator adding an extractor for some file extensions
+
+    Args:
+        name: Format name used in error messages
+        extensions: Lowercase extensions including the dot
+        magic: Leading bytes identifying the format when the extension does not
+        confirm: Check run after the magic bytes match, for containers shared
+            by several formats (e.g. zip)
+    """
+    def decorator(extractor):
+        for extension in extensions:
+            EXTRACTORS[extension] = extractor
+            FORMAT_NAMES[extension] = name
+        if magic is not None:
+            MAGIC_BYTES.append((magic, extensions[0], confirm))
+        return extractor
+    return decorator
+
+def supported_extensions() -> List[str]:
+    return sorted(EXTRACTORS)
+
+def read_bytes(source: Source) -> Union[bytes, memoryview]:
+    """Contents of a source, without copying buffers that are already in memory"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer()
+    if hasattr(source, "read"):
+        return source.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+def _head(source: Source, size: int = 8) -> bytes:
+    """First bytes of a source, leaving streams where they were"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    if hasattr(source, "read"):
+        if not hasattr(source, "seek"):
+            return b""
+        position = source.tell()
+        head = source.read(size)
+        source.seek(position)
+        return head
+    with open(source, "rb") as f:
+        return f.read(size)
+
+def detect_extension(source: Source, filename: Optional[str] = None) -> str:
+    """
+    Format of a source: its extension when supported, else its magic bytes
+
+    Raises:
+        ValueError: If neither identifies a supported format
+    """
+    extension = os.path.splitext(filename or (source if isinstance(source, str) else ""))[1].lower()
+    if extension in EXTRACTORS:
+        return extension
+    head = _head(source)
+    for magic, magic_extension, confirm in MAGIC_BYTES:
+        if head.startswith(magic) and (confirm is None or confirm(source)):
+            return magic_extension
+    raise ValueError(f"Unsupported file type: {extension or 'unknown'}")
+
+def extract_blocks(source: Source, filename: Optional[str] = None) -> Iterator[TextBlock]:
+    """Stream text blocks from any supported source"""
+    extension = detect_extension(source, filename)
+    try:
+        yield from EXTRACTORS[extension](source)
+    except Exception as e:
+        raise Exception(f"Error reading {FORMAT_NAMES[extension]}: {str(e)}")
+
+def _binary_stream(source: Source) -> Union[str, BinaryIO]:
+    """Source as something PdfReader and ZipFile accept (paths are left for them to open and close)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+def _decoded_chunks(source: Source, encoding: str = "utf-8", errors: str = "strict") -> Iterator[str]:
+    """Text of a source in pieces of about READ_CHARS, with line endings translated to \\n like open()"""
+    if isinstance(source, (bytes, bytearray, memoryview, io.BytesIO)):
+        text = str(read_bytes(source), encoding, errors)
+        yield text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+        return
+    owned = not hasattr(source, "read")
+    wrapper = io.TextIOWrapper(open(source, "rb") if owned else source, encoding, errors, newline=None)
+    try:
+        while True:
+            text = wrapper.read(READ_CHARS)
+            if not text:
+                break
+            yield text
+    finally:
+        if owned:
+            wrapper.close()
+        else:
+            # Leave the caller's stream open
+            wrapper.detach()
+
+def _lines(source: Source, encoding: str = "utf-8") -> Iterator[str]:
+    """Lines of a text source, each ending in \\n (except perhaps the last)"""
+    pending = ""
+    for chunk in _decoded_chunks(source, encoding):
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
+
+@register_extractor("PDF", [".pdf"], magic=b"%PDF")
+def extract_pdf(source: Source) -> Iterator[TextBlock]:
+    """One block per page"""
+    from pypdf import PdfReader
+    reader = PdfReader(_binary_stream(source))
+    for number, page in enumerate(reader.pages, start=1):
+        yield TextBlock(page.extract_text() + "\n", {"page": number})
+
+@register_extractor("TXT", [".txt", ".text"])
+def extract_txt(source: Source) -> Iterator[TextBlock]:
+    """Blocks of paragraphs, cut at blank lines"""
+    lines, size = [], 0
+    for line in _lines(source):
+        lines.append(line)
+        size += len(line)
+        if size >= BLOCK_CHARS and not line.strip():
+            yield TextBlock("".join(lines))
+            lines, size = [], 0
+    if lines:
+        yield TextBlock("".join(lines))
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+@register_extractor("Markdown", [".md", ".markdown"])
+def extract_markdown(source: Source) -> Iterator[TextBlock]:
+    """One block per section, labelled with its heading path (e.g. "Leave > Sick leave")"""
+    headings, lines, size, fenced = [], [], 0, False
+
+    def block():
+        return TextBlock("".join(lines), {"heading": " > ".join(headings)} if headings else {})
+
+    for line in _lines(source):
+        if line.lstrip().startswith(("```", "~~~")):
+            fenced = not fenced
+        match = None if fenced else HEADING_PATTERN.match(line)
+        if match:
+            if "".join(lines).strip():
+                yield block()
+            lines, size = [], 0
+            level = len(match.group(1))
+            headings = headings[:level - 1] + [match.group(2)]
+        lines.append(line)
+        size += len(line)
+        if size >= BLOCK_CHARS and not line.strip():
+            yield block()
+            lines, size = [], 0
+    if "".join(lines).strip():
+        yield block()
+
+class _HTMLBlockParser(HTMLParser):
+    """Collects visible text into blocks that start at each heading"""
+
+    SKIP = {"script", "style", "head", "noscript", "template", "svg"}
+    BREAKS = {"p", "div", "br", "li", "tr", "section", "article", "table", "ul", "ol",
+              "blockquote", "pre", "hr", "dd", "dt"}
+    HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._parts = []
+        self._size = 0
+        self._skip = 0
+        self._headings = []
+        self._heading_level = None
+        self._heading_text = []
+
+    def _flush(self):
+        text = re.sub(r"[ \t]+", " ", "".join(self._parts))
+        text = re.sub(r"\s*\n\s*", "\n", text).strip()
+        if text:
+            self.blocks.append(TextBlock(
+                text + "\n", {"heading": " > ".join(self._headings)} if self._headings else {}
+            ))
+        self._parts, self._size = [], 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.HEADINGS:
+            self._flush()
+            self._heading_level = int(tag[1])
+            self._heading_text = []
+        elif tag in self.BREAKS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.HEADINGS and self._heading_level is not None:
+            heading = " ".join("".join(self._heading_text).split())
+            self._headings = self._headings[:self._heading_level - 1] + [heading]
+            self._heading_level = None
+            self._parts.append("\n")
+        elif tag in self.BREAKS:
+            self._parts.append("\n")
+            if self._size >= BLOCK_CHARS:
+                self._flush()
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._heading_level is not None:
+            self._heading_text.append(data)
+        self._parts.append(data)
+        self._size += len(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+@register_extractor("HTML", [".html", ".htm"])
+def extract_html(source: Source) -> Iterator[TextBlock]:
+    """One block per section, labelled with its heading path; scripts and styles are dropped"""
+    parser = _HTMLBlockParser()
+    for chunk in _decoded_chunks(source, errors="replace"):
+        parser.feed(chunk)
+        yield from parser.blocks
+        parser.blocks = []
+    parser.close()
+    yield from parser.blocks
+
+CSV_ROWS_PER_BLOCK = 50
+
+@register_extractor("CSV", [".csv"])
+def extract_csv(source: Source) -> Iterator[TextBlock]:
+    """Rows as "column: value" lines, in blocks of CSV_ROWS_PER_BLOCK labelled with their row range"""
+    reader = csv.reader(_lines(source, encoding="utf-8-sig"))
+    header = next(reader, None)
+    if header is None:
+        return
+    lines, first = [], 1
+    for number, row in enumerate(reader, start=1):
+        lines.append("; ".join(f"{column}: {value}" for column, value in zip(header, row) if value.strip()))
+        if len(lines) == CSV_ROWS_PER_BLOCK:
+            yield TextBlock("\n".join(lines) + "\n", {"rows": f"{first}-{number}"})
+            lines, first = [], number + 1
+    if lines:
+        yield TextBlock("\n".join(lines) + "\n", {"rows": f"{first}-{first + len(lines) - 1}"})
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def _is_docx(source: Source) -> bool:
+    """Whether a zip holds a Word document (xlsx, pptx, odt, epub and plain zips do not)"""
+    stream = _binary_stream(source)
+    position = stream.tell() if hasattr(stream, "tell") else None
+    try:
+        with zipfile.ZipFile(stream) as archive:
+            return "word/document.xml" in archive.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+    finally:
+        if position is not None:
+            stream.seek(position)
+
+@register_extractor("DOCX", [".docx"], magic=b"PK\x03\x04", confirm=_is_docx)
+def extract_docx(source: Source) -> Iterator[TextBlock]:
+    """
+    One block per section, labelled with its heading path
+
+    Reads word/document.xml incrementally from the zip and drops each
+    paragraph once its text is taken, so memory stays flat on large files.
+    """
+    with zipfile.ZipFile(_binary_stream(source)) as archive, archive.open("word/document.xml") as xml:
+        headings, paragraphs, size = [], [], 0
+
+        def block():
+            return TextBlock("\n".join(paragraphs) + "\n", {"heading": " > ".join(headings)} if headings else {})
+
+        for _, element in ElementTree.iterparse(xml, events=("end",)):
+            if element.tag != WORD_NS + "p":
+                continue
+            parts = []
+            for node in element.iter():
+                if node.tag == WORD_NS + "t":
+                    parts.append(node.text or "")
+                elif node.tag == WORD_NS + "tab":
+                    parts.append("\t")
+                elif node.tag in (WORD_NS + "br", WORD_NS + "cr"):
+                    parts.append("\n")
+            style = element.find(f"{WORD_NS}pPr/{WORD_NS}pStyle")
+            style = style.get(WORD_NS + "val", "") if style is not None else ""
+            text = "".join(parts).strip()
+            element.clear()
+            if not text:
+                continue
+
+            level = 1 if style == "Title" else int(style[7:]) if re.fullmatch(r"Heading[1-9]", style) else None
+            if level is not None:
+                if paragraphs:
+                    yield block()
+                paragraphs, size = [], 0
+                headings = headings[:level - 1] + [text]
+            paragraphs.append(text)
+            size += len(text)
+            if size >= BLOCK_CHARS:
+                yield block()
+                paragraphs, size = [], 0
+        if paragraphs:
+            yield block()
@@ -0,0 +1,227 @@
+"""
+Keyword Search - FAQ lookup, keyword retrieval and extractive answers (no AI models required)
+"""
+
+import re
+from utils.confidence import NOT_IN_DOCUMENTS, ConfidenceCalibrator, top_score
+from utils.qa_database import QA_DATABASE
+from utils.query_normalizer import document_terms, get_query_normalizer, stem
+
+# Thresholds on the share of query words the best chunk contains
+KEYWORD_CALIBRATOR = ConfidenceCalibrator.load(kind="keyword")
+
+_faq_terms = None
+
+def faq_terms():
+    """(terms, entry) of every pre-built question, computed once"""
+    global _faq_terms
+    if _faq_terms is None:
+        _faq_terms = [(document_terms(key), value) for key, value in QA_DATABASE.items()]
+    return _faq_terms
+
+def find_best_match(query, normalizer=None):
+    """
+    Find best matching pre-built answer
+    
+    Words are compared after stopword removal, stemming and spelling
+    correction (see QueryNormalizer), so "anual leave" finds annual leave.
+    """
+    query_lower = query.lower().strip()
+    
+    # Direct match
+    if query_lower in QA_DATABASE:
+        return QA_DATABASE[query_lower]
+    
+    query_terms = (normalizer or get_query_normalizer()).normalize(query)
+    if not query_terms:
+        return None
+    
+    # Partial match - find best overlap
+    best_match = None
+    best_score = 0
+    
+    for key_terms, value in faq_terms():
+        # Calculate word overlap
+        overlap = len(key_terms & query_terms)
+        
+        # Check if the key's terms contain the query's or vice versa
+        if key_terms and (key_terms <= query_terms or query_terms <= key_terms):
+            overlap += 3
+            # The same terms beat a longer question that contains them
+            if key_terms == query_terms:
+                overlap += 1
+        
+        if overlap > best_score:
+            best_score = overlap
+            best_match = value
+    
+    # Return if good enough match
+    if best_score >= 2:  # At least 2 matching words
+        return best_match
+    
+    return None
+
+def chunk_text(text, filename, chunk_size=500):
+    """Split text into manageable chunks, with their search terms computed once at ingestion"""
+    words = text.split()
+    chunks = []
+    
+    for i in range(0, len(words), chunk_size):
+        chunk = ' '.join(words[i:i + chunk_size])
+        chunks.append({
+            'text': chunk,
+            'source': filename,
+            'chunk_id': len(chunks),
+            'terms': document_terms(chunk)
+        })
+    
+    return chunks
+
+def simple_search(query, documents, k=4, normalizer=None):
+    """
+    Simple keyword-based search
+    
+    The query's content words are spell-corrected and stemmed by the
+    normalizer (the shared FAQ one by default; pass one that has seen the
+    documents to correct towards their vocabulary). Returned chunks are
+    copies carrying "score": the share of query terms they contain, which
+    calculate_confidence uses without re-tokenizing.
+    """
+    if not documents:
+        return []
+    
+    query_words = set((normalizer or get_query_normalizer()).correct_query(query))
+    query_terms = {stem(word) for word in query_words}
+    if not query_terms:
+        return []
+    
+    scores = []
+    for doc in documents:
+        doc_terms = doc['terms'] if 'terms' in doc else document_terms(doc['text'])
+        # Calculate overlap score
+        overlap = len(query_terms & doc_terms)
+        if overlap > 0:
+            # Give higher weight to exact phrase matches
+            doc_lower = doc['text'].lower()
+            phrase_bonus = 0
+            for word in query_words:
+                if word in doc_lower:
+                    phrase_bonus += doc_lower.count(word)
+            
+            total_score = overlap + (phrase_bonus * 0.5)
+            scores.append((doc, total_score, overlap / len(query_terms)))
+    
+    # Sort by score and return top k
+    scores.sort(key=lambda x: x[1], reverse=True)
+    return [{**doc, 'score': round(coverage, 4)} for doc, score, coverage in scores[:k]]
+
+def calculate_confidence(relevant_docs, query):
+    """Calculate confidence from the search score of the best match (or its word overlap if unscored)"""
+    if not relevant_docs:
+        return "low"
+    
+    score = top_score(relevant_docs)
+    if score is not None:
+        return KEYWORD_CALIBRATOR.level(score)
+    
+    query_words = set(re.findall(r'\w+', query.lower()))
+    
+    # Check how many query words appear in top document
+    top_doc_words = set(re.findall(r'\w+', relevant_docs[0]['text'].lower()))
+    match_percentage = len(query_words & top_doc_words) / len(query_words) if query_words else 0
+    
+    if len(relevant_docs) >= 3 and match_percentage > 0.7:
+        return "high"
+    elif len(relevant_docs) >= 2 and match_percentage > 0.5:
+        return "medium"
+    else:
+        return "low"
+
+def clean_text(text):
+    """Clean and format text by removing excessive formatting"""
+    # Remove multiple dashes/equals signs
+    text = re.sub(r'[-=]{3,}', '', text)
+    # Remove bullet points and extra spaces
+    text = re.sub(r'\s*[-•]\s*', ' ', text)
+    # Remove multiple newlines
+    text = re.sub(r'\n+', ' ', text)
+    # Remove extra spaces
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def generate_answer(query, relevant_docs):
+    """Generate answer from relevant documents"""
+    # Skip extraction when even the best match shares too few words with the query
+    if not relevant_docs or not KEYWORD_CALIBRATOR.should_answer(top_score(relevant_docs)):
+        return NOT_IN_DOCUMENTS, [], "low"
+    
+    # Extract relevant sentences
+    answer_parts = []
+    query_words = set(re.findall(r'\w+', query.lower()))
+    
+    for doc in relevant_docs[:3]:  # Use top 3 docs
+        # Clean the document text first
+        clean_doc_text = clean_text(doc['text'])
+        
+        # Split into sentences (better handling)
+        sentences = re.split(r'(?<=[.!?])\s+', clean_doc_text)
+        
+        for sentence in sentences:
+            if not sentence.strip() or len(sentence.strip()) < 10:
+                continue
+            
+            sentence_words = set(re.findall(r'\w+', sentence.lower()))
+            # Check if sentence has good overlap with query
+            overlap = len(query_words & sentence_words)
+            
+            # Prefer sentences with higher word count and relevance
+            if overlap >= min(2, len(query_words)) and len(sentence.split()) > 5:
+                # Clean up the sentence
+                clean_sentence = sentence.strip()
+                if clean_sentence and clean_sentence not in answer_parts:
+                    answer_parts.append(clean_sentence)
+                    if len(answer_parts) >= 3:  # Max 3 sentences
+                        break
+        
+        if len(answer_parts) >= 3:
+            break
+    
+    # Generate answer
+    if answer_parts:
+        answer = ' '.join(answer_parts)
+        # Ensure proper ending
+        if not answer.endswith(('.', '!', '?')):
+            answer += '.'
+        # Limit length to avoid too long answers
+        if len(answer) > 500:
+            answer = answer[:500].rsplit('.', 1)[0] + '.'
+    else:
+        # Fallback: return cleaned text from top document
+        clean_doc_text = clean_text(relevant_docs[0]['text'])
+        sentences = re.split(r'(?<=[.!?])\s+', clean_doc_text)
+        good_sentences = [s.strip() for s in sentences[:3] if len(s.strip()) > 10]
+        answer = ' '.join(good_sentences[:2])
+        if not answer.endswith(('.', '!', '?')):
+            answer += '.'
+    
+    # Get unique sources
+    sources = []
+    seen = set()
+    for doc in relevant_docs:
+        if doc['source'] not in seen:
+            # Clean preview text
+            preview = clean_text(doc['text'][:300])
+            if len(preview) > 200:
+                preview = preview[:200]
+            if not preview.endswith('.'):
+                preview += '...'
+            sources.append({
+                'name': doc['source'],
+                'preview': preview
+            })
+            seen.add(doc['source'])
+    
+    # Calculate confidence
+    confidence = calculate_confidence(relevant_docs, query)
+    
+    return answer, sources, confidence
@@ -0,0 +1,177 @@
+"""
+Metadata Index - Inverted index from document metadata to FAISS row ids for pre-filtered search
+"""
+
+from bisect import insort
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+RANGE_OPERATORS = {
+    "$gt": lambda value, bound: value > bound,
+    "$gte": lambda value, bound: value >= bound,
+    "$lt": lambda value, bound: value < bound,
+    "$lte": lambda value, bound: value <= bound,
+}
+
+class MetadataIndex:
+    def __init__(self):
+        """
+        Initialize an empty metadata index
+
+        Every scalar metadata attribute is indexed as value -> sorted row ids.
+        List-valued attributes (e.g. tags) index each element. Chunks that
+        stand for near-duplicates in other documents (duplicate_sources, see
+        utils/dedup.py) are also indexed under each of those sources.
+        """
+        self._postings = defaultdict(lambda: defaultdict(list))
+        # (source, chunk_id) -> row and (source, section) -> [first, last] chunk_id,
+        # for expanding search hits to their neighbors at prompt time
+        self._chunk_rows = {}
+        self._sections = {}
+        self.ntotal = 0
+
+    def add(self, start_id: int, metadatas: Iterable[Dict[str, Any]]):
+        """
+        Index metadata for consecutive FAISS rows
+
+        Args:
+            start_id: FAISS row id of the first metadata dict
+            metadatas: Metadata dicts in row order
+        """
+        row_id = start_id
+        for metadata in metadatas:
+            for attribute, item in self._entries(metadata):
+                self._postings[attribute][item].append(row_id)
+            self._add_chunk(row_id, metadata)
+            row_id += 1
+        self.ntotal = max(self.ntotal, row_id)
+
+    def replace(self, row_id: int, old_metadata: Dict[str, Any], new_metadata: Dict[str, Any]):
+        """Re-index a row whose metadata changed"""
+        old_entries, new_entries = set(self._entries(old_metadata)), set(self._entries(new_metadata))
+        for attribute, item in old_entries - new_entries:
+            postings = self._postings[attribute]
+            postings[item].remove(row_id)
+            if not postings[item]:
+                del postings[item]
+        for attribute, item in new_entries - old_entries:
+            insort(self._postings[attribute][item], row_id)
+
+    def _add_chunk(self, row_id: int, metadata: Dict[str, Any]):
+        source, chunk_id = metadata.get("source"), metadata.get("chunk_id")
+        if source is None or not isinstance(chunk_id, int):
+            return
+        self._chunk_rows[(source, chunk_id)] = row_id
+        section = metadata.get("section")
+        if section is not None:
+            bounds = self._sections.setdefault((source, section), [chunk_id, chunk_id])
+            bounds[0], bounds[1] = min(bounds[0], chunk_id), max(bounds[1], chunk_id)
+
+    def chunk_row(self, source: str, chunk_id: int) -> Optional[int]:
+        """FAISS row of a document's chunk (None if it was never indexed, e.g. collapsed as a duplicate)"""
+        return self._chunk_rows.get((source, chunk_id))
+
+    def section_bounds(self, source: str, section: Any) -> Optional[List[int]]:
+        """First and last chunk_id of a document section (page or heading block)"""
+        return self._sections.get((source, section))
+
+    @staticmethod
+    def _entries(metadata: Dict[str, Any]) -> Iterable:
+        """(attribute, value) pairs a row is indexed under"""
+        for attribute, value in metadata.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            for item in values:
+                try:
+                    hash(item)
+                except TypeError:
+                    # Unhashable values (dicts, nested lists) are not filterable
+                    continue
+                yield attribute, item
+                if attribute == "duplicate_sources":
+                    yield "source", item
+
+    def rebuild(self, vectorstore):
+        """Rebuild the index from a LangChain FAISS vectorstore's docstore"""
+        self.clear()
+        if vectorstore is None:
+            return
+        if hasattr(vectorstore.docstore, "metadatas"):
+            # SQLiteDocstore reads metadata without the chunk text
+            metadatas = vectorstore.docstore.metadatas()
+        else:
+            metadatas = (
+                vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]).metadata
+                for i in range(vectorstore.index.ntotal)
+            )
+        self.add(0, metadatas)
+
+    def clear(self):
+        """Remove all entries"""
+        self._postings.clear()
+        self._chunk_rows.clear()
+        self._sections.clear()
+        self.ntotal = 0
+
+    def values(self, attribute: str) -> List[Any]:
+        """List the distinct indexed values of an attribute"""
+        return list(self._postings.get(attribute, {}).keys())
+
+    def select(self, filter: Dict[str, Any]) -> np.ndarray:
+        """
+        Resolve a metadata filter to the matching FAISS row ids
+
+        Conditions on different attributes are ANDed. Each condition is
+        either a value (equality), a list of values (any of), or a dict
+        of operators: $eq, $in, $gt, $gte, $lt, $lte.
+
+        Args:
+            filter: e.g. {"source": "hr_policy.txt", "chunk_id": {"$lte": 3}}
+
+        Returns:
+            Sorted int64 array of matching row ids
+        """
+        selected = None
+        for attribute, condition in filter.items():
+            ids = self._select_attribute(attribute, condition)
+            selected = ids if selected is None else np.intersect1d(selected, ids, assume_unique=True)
+            if len(selected) == 0:
+                break
+
+        if selected is None:
+            return np.arange(self.ntotal, dtype=np.int64)
+        return selected
+
+    def _select_attribute(self, attribute: str, condition: Any) -> np.ndarray:
+        """Union the posting lists of all values matching one condition"""
+        postings = self._postings.get(attribute, {})
+
+        if isinstance(condition, dict):
+            matching = list(postings.keys())
+            for operator, bound in condition.items():
+                if operator == "$eq":
+                    matching = [v for v in matching if v == bound]
+                elif operator == "$in":
+                    allowed = set(bound)
+                    matching = [v for v in matching if v in allowed]
+                elif operator in RANGE_OPERATORS:
+                    matching = [v for v in matching if self._compare(operator, v, bound)]
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+        elif isinstance(condition, (list, tuple, set)):
+            matching = [v for v in condition if v in postings]
+        else:
+            matching = [condition] if condition in postings else []
+
+        if not matching:
+            return np.empty(0, dtype=np.int64)
+        ids = np.concatenate([np.asarray(postings[v], dtype=np.int64) for v in matching])
+        return np.unique(ids)
+
+    @staticmethod
+    def _compare(operator: str, value: Any, bound: Any) -> bool:
+        """Apply a range operator, treating incomparable types as no match"""
+        try:
+            return RANGE_OPERATORS[operator](value, bound)
+        except TypeError:
+            return False
@@ -0,0 +1,187 @@
+"""
+Metrics - Per-stage latency spans, histograms and a Prometheus-style text endpoint
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS, reservoir_size: int = 2048):
+        """
+        Latency histogram with fixed buckets and a window of recent samples
+
+        Buckets feed the Prometheus output; percentiles are computed from the
+        most recent reservoir_size samples.
+        """
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=reservoir_size)
+
+    def observe(self, value_ms: float):
+        self.count += 1
+        self.sum += value_ms
+        self.recent.append(value_ms)
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def percentile(self, pct: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class MetricsRegistry:
+    def __init__(self):
+        """Initialize an empty registry of stage histograms and event counters"""
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe(self, stage: str, value_ms: float):
+        """Record a duration for a stage (and on the active trace, if any)"""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(value_ms)
+
+        for trace in getattr(self._local, "traces", ()):
+            trace[stage] = round(trace.get(stage, 0.0) + value_ms, 2)
+
+    def increment(self, event: str, amount: int = 1):
+        """Increase an event counter"""
+        with self._lock:
+            self._counters[event] = self._counters.get(event, 0) + amount
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block as one observation of stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+    @contextmanager
+    def trace(self):
+        """
+        Collect all spans recorded on this thread into a dict
+
+        Nested stages (e.g. FAISS search inside retrieval) are reported
+        separately, so values do not necessarily sum to the total. Traces
+        may be nested; spans are recorded on every active trace.
+        """
+        if not hasattr(self._local, "traces"):
+            self._local.traces = []
+        timings = {}
+        self._local.traces.append(timings)
+        try:
+            yield timings
+        finally:
+            self._local.traces.pop()
+
+    def summary(self) -> Dict[str, Dict]:
+        """Count, mean and p50/p95/p99 (ms) for every stage"""
+        with self._lock:
+            return {
+                stage: {
+                    "count": h.count,
+                    "mean_ms": round(h.sum / h.count, 2) if h.count else 0.0,
+                    "p50_ms": round(h.percentile(50), 2),
+                    "p95_ms": round(h.percentile(95), 2),
+                    "p99_ms": round(h.percentile(99), 2)
+                }
+                for stage, h in sorted(self._histograms.items())
+            }
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP kb_stage_duration_seconds Latency of each pipeline stage",
+            "# TYPE kb_stage_duration_seconds histogram"
+        ]
+        quantiles = [
+            "# HELP kb_stage_duration_quantile_seconds Recent latency percentiles of each stage",
+            "# TYPE kb_stage_duration_quantile_seconds gauge"
+        ]
+
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.bucket_counts):
+                    cumulative += count
+                    lines.append(
+                        f'kb_stage_duration_seconds_bucket{{stage="{stage}",le="{bound / 1000:g}"}} {cumulative}'
+                    )
+                lines.append(f'kb_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'kb_stage_duration_seconds_sum{{stage="{stage}"}} {h.sum / 1000:.6f}')
+                lines.append(f'kb_stage_duration_seconds_count{{stage="{stage}"}} {h.count}')
+                for q in (50, 95, 99):
+                    quantiles.append(
+                        f'kb_stage_duration_quantile_seconds{{stage="{stage}",quantile="{q / 100:g}"}} '
+                        f'{h.percentile(q) / 1000:.6f}'
+                    )
+
+            lines.extend(quantiles)
+            lines.append("# HELP kb_events_total Count of pipeline events")
+            lines.append("# TYPE kb_events_total counter")
+            for event, count in sorted(self._counters.items()):
+                lines.append(f'kb_events_total{{event="{event}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+# Process-wide registry used by all modules
+metrics = MetricsRegistry()
+
+def start_metrics_server(port: int = 9100, host: str = "127.0.0.1",
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics in a background thread
+
+    Args:
+        port: Port to listen on
+        host: Interface to bind
+        registry: Registry to expose (defaults to the process-wide one)
+    """
+    registry = registry or metrics
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"✅ Metrics available at http://{host}:{port}/metrics")
+    return server
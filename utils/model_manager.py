@@ -0,0 +1,202 @@
+"""
+Model Manager - Warm-up, traffic-based keep-alive and a shared LLM client for Ollama
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+import requests
+from utils.metrics import Histogram, metrics
+
+DEFAULT_KEEP_ALIVE_S = 300
+
+def parse_keep_alive(value) -> float:
+    """
+    Seconds a model stays loaded after a request
+
+    Ollama accepts seconds or durations like "30s", "5m", "1h"; negative
+    values keep the model loaded forever.
+    """
+    if value is None:
+        return DEFAULT_KEEP_ALIVE_S
+    if isinstance(value, str):
+        match = re.fullmatch(r'(-?\d+(?:\.\d+)?)\s*([smh]?)', value.strip())
+        if not match:
+            return DEFAULT_KEEP_ALIVE_S
+        value = float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+    return float("inf") if value < 0 else float(value)
+
+class ModelLifecycleManager:
+    def __init__(self, base_url: Optional[str] = None, llm_model: str = "llama3.2",
+                 embedding_model: str = "nomic-embed-text", keep_alive: str = "30m",
+                 ping_interval: float = 240.0, idle_timeout: float = 3600.0, temperature: float = 0):
+        """
+        Initialize model manager
+
+        Ollama unloads a model keep_alive after its last request, and the next
+        question then pays the load time. The manager loads both models at
+        startup and, while there is traffic, pings any model that has not been
+        used for ping_interval so it stays loaded. After idle_timeout without
+        questions it stops pinging and lets Ollama free the memory.
+
+        Args:
+            base_url: Ollama server URL (defaults to $OLLAMA_BASE_URL or localhost)
+            llm_model: Generation model
+            embedding_model: Embedding model
+            keep_alive: How long Ollama keeps a model loaded after each request
+            ping_interval: Seconds between keep-alive checks
+            idle_timeout: Seconds without questions after which pinging stops
+            temperature: Temperature of the shared LLM client
+        """
+        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.llm_model = llm_model
+        self.embedding_model = embedding_model
+        self.keep_alive = keep_alive
+        self.keep_alive_s = parse_keep_alive(keep_alive)
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.temperature = temperature
+
+        self.models = {
+            model: {"last_used": None, "loads": 0, "last_load_ms": None, "pings": 0, "errors": 0}
+            for model in (llm_model, embedding_model)
+        }
+        self.latency = {"cold": Histogram(), "warm": Histogram()}
+        self.last_activity = None
+
+        self._llm = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def llm(self):
+        """The Ollama LLM client shared by every QAChain"""
+        with self._lock:
+            if self._llm is None:
+                from langchain_community.llms import Ollama
+                self._llm = Ollama(
+                    model=self.llm_model,
+                    temperature=self.temperature,
+                    base_url=self.base_url,
+                    keep_alive=self.keep_alive
+                )
+            return self._llm
+
+    def warm_up(self) -> Dict[str, Optional[float]]:
+        """Load both models now; returns each model's load time (ms), None on failure"""
+        return {model: self.ping(model) for model in self.models}
+
+    def ping(self, model: str) -> Optional[float]:
+        """
+        Load (or keep loaded) one model with a request that does no work
+
+        Returns:
+            Load time reported by Ollama in ms (0 if it was already loaded),
+            or the request time when Ollama does not report it; None on failure
+        """
+        if model == self.embedding_model:
+            url = f"{self.base_url}/api/embeddings"
+            payload = {"model": model, "prompt": "warm up", "keep_alive": self.keep_alive}
+        else:
+            # An empty prompt loads the model without generating
+            url = f"{self.base_url}/api/generate"
+            payload = {"model": model, "prompt": "", "keep_alive": self.keep_alive, "stream": False}
+
+        start = time.perf_counter()
+        try:
+            response = requests.post(url, json=payload, timeout=300)
+            response.raise_for_status()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            load_ns = response.json().get("load_duration")
+        except Exception as e:
+            with self._lock:
+                self.models[model]["errors"] += 1
+            print(f"⚠️ Could not warm up {model}: {str(e)}")
+            return None
+
+        load_ms = load_ns / 1e6 if load_ns is not None else elapsed_ms
+        metrics.observe("model_ping", elapsed_ms)
+        with self._lock:
+            state = self.models[model]
+            state["pings"] += 1
+            state["last_used"] = time.monotonic()
+            # Anything above a few ms means Ollama had to load the weights
+            if load_ms > 10:
+                state["loads"] += 1
+                state["last_load_ms"] = round(load_ms, 1)
+        return round(load_ms, 1)
+
+    def is_warm(self, model: str) -> bool:
+        """Whether the model should still be loaded, judging by its last use"""
+        last_used = self.models[model]["last_used"]
+        return last_used is not None and time.monotonic() - last_used < self.keep_alive_s
+
+    def record_request(self, latency_ms: float, tier: Optional[str] = "llm"):
+        """
+        Note an answered question and whether it ran on cold models
+
+        Args:
+            latency_ms: End-to-end latency of the question
+            tier: Answer tier; FAQ answers use no model, extractive ones only
+                the embedding model
+        """
+        used = []
+        if tier != "faq":
+            used.append(self.embedding_model)
+        if tier in ("llm", None):
+            used.append(self.llm_model)
+
+        with self._lock:
+            now = time.monotonic()
+            self.last_activity = now
+            if used:
+                state = "warm" if all(self.is_warm(model) for model in used) else "cold"
+                self.latency[state].observe(latency_ms)
+                metrics.observe(f"ask_{state}_models", latency_ms)
+            for model in used:
+                self.models[model]["last_used"] = now
+
+    def start(self) -> "ModelLifecycleManager":
+        """Start the keep-alive thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._keep_alive_loop, name="kb-keepalive", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _keep_alive_loop(self):
+        while not self._stop.wait(self.ping_interval):
+            if self.last_activity is None or time.monotonic() - self.last_activity > self.idle_timeout:
+                continue
+            for model, state in self.models.items():
+                # Models used by recent questions already had their timer reset
+                if state["last_used"] is None or time.monotonic() - state["last_used"] >= self.ping_interval:
+                    self.ping(model)
+
+    def get_stats(self) -> Dict:
+        """Model state and cold-vs-warm question latency"""
+        with self._lock:
+            latency = {
+                state: {
+                    "count": h.count,
+                    "mean_ms": round(h.sum / h.count, 1) if h.count else 0.0,
+                    "p50_ms": round(h.percentile(50), 1),
+                    "p95_ms": round(h.percentile(95), 1)
+                }
+                for state, h in self.latency.items()
+            }
+            models = {
+                model: {**{k: v for k, v in state.items() if k != "last_used"}, "warm": self.is_warm(model)}
+                for model, state in self.models.items()
+            }
+        cold, warm = latency["cold"], latency["warm"]
+        return {
+            "models": models,
+            "latency": latency,
+            "cold_penalty_ms": round(cold["mean_ms"] - warm["mean_ms"], 1) if cold["count"] and warm["count"] else None
+        }
@@ -2,13 +2,19 @@
 QA Chain - Question Answering using Ollama (100% LOCAL & FREE)
 """
 
-from typing import Dict, List
+import os
+import time
+from typing import Callable, Dict, List, Optional
 from langchain_community.llms import Ollama
-from langchain.chains.retrieval_qa.base import RetrievalQA
 from langchain_core.prompts import PromptTemplate
+from utils.confidence import NOT_IN_DOCUMENTS, ConfidenceCalibrator, top_score
+from utils.keyword_search import generate_answer
+from utils.metrics import metrics
+from utils.scheduler import FOLLOWUP, INTERACTIVE, GenerationRejected
 
 class QAChain:
-    def __init__(self, retriever, model_name: str = "llama3.2", temperature: float = 0):
+    def __init__(self, retriever, model_name: str = "llama3.2", temperature: float = 0, llm=None,
+                 base_url: str = None, scheduler=None, calibrator: Optional[ConfidenceCalibrator] = None):
         """
         Initialize QA Chain with Ollama (LOCAL & FREE)
         
@@ -16,13 +22,21 @@ class QAChain:
             retriever: Vector store retriever
             model_name: Ollama model to use
             temperature: Model temperature
+            llm: Optional LLM to use instead of Ollama (e.g. a fake for benchmarks)
+            base_url: Ollama server URL (defaults to $OLLAMA_BASE_URL or localhost)
+            scheduler: Optional GenerationScheduler shared by all chains using
+                the same Ollama server; without one generations run immediately
+            calibrator: Thresholds turning retrieval relevance into confidence
+                and abstention (defaults to ConfidenceCalibrator.load())
         """
         self.retriever = retriever
+        self.scheduler = scheduler
+        self.calibrator = calibrator or ConfidenceCalibrator.load()
         # Use Ollama running locally
-        self.llm = Ollama(
+        self.llm = llm or Ollama(
             model=model_name,
             temperature=temperature,
-            base_url="http://localhost:11434"
+            base_url=base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         )
         
         self.prompt_template = """You are a helpful AI assistant answering questions based on company documents.
@@ -43,41 +57,154 @@ Answer:"""
             template=self.prompt_template,
             input_variables=["context", "question"]
         )
+    
+    def set_retriever(self, retriever):
+        """Point the chain at a new or reloaded index, keeping the LLM client"""
+        self.retriever = retriever
+    
+    def ask(self, question: str, on_token: Optional[Callable[[str], None]] = None,
+            user: Optional[str] = None, priority: int = INTERACTIVE) -> Dict:
+        """
+        Ask a question and get answer with sources and per-stage timings (ms)
         
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.retriever,
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": self.PROMPT}
-        )
+        Args:
+            question: User question
+            on_token: Optional callback receiving each generated chunk as it arrives
+            user: Who is asking, for fair scheduling between users
+            priority: Scheduling priority (INTERACTIVE, FOLLOWUP or BATCH)
+        """
+        with metrics.trace() as timings:
+            try:
+                with metrics.span("ask_total"):
+                    with metrics.span("retrieval"):
+                        source_documents = self.retriever.invoke(question)
+                    response = self.answer_with_documents(
+                        question, source_documents, on_token, user, priority
+                    )
+            except Exception as e:
+                response = self._error_response(e)
+        
+        response["timings"] = timings
+        return response
     
-    def ask(self, question: str) -> Dict:
-        """Ask a question and get answer with sources"""
-        try:
-            response = self.qa_chain.invoke({"query": question})
-            
-            answer = response['result']
-            source_documents = response['source_documents']
-            confidence = self._calculate_confidence(source_documents)
-            sources = self._format_sources(source_documents)
+    def answer_with_documents(self, question: str, source_documents: List,
+                              on_token: Optional[Callable[[str], None]] = None,
+                              user: Optional[str] = None, priority: int = INTERACTIVE) -> Dict:
+        """
+        Answer a question from already retrieved documents
+        
+        Lets callers that retrieve in bulk (e.g. batch evaluation) skip
+        the per-question retriever round trip. When the retriever can expand
+        hits to their neighboring chunks, the prompt gets the expanded
+        passages while sources still list the matched chunks.
+        
+        Args:
+            question: User question
+            source_documents: Documents to use as context
+            on_token: Optional callback receiving each generated chunk
+            user: Who is asking, for fair scheduling between users
+            priority: Scheduling priority (INTERACTIVE, FOLLOWUP or BATCH)
             
-            return {
-                "answer": answer,
-                "sources": sources,
-                "confidence": confidence,
-                "source_documents": source_documents
-            }
-        except Exception as e:
-            return {
-                "answer": f"Error processing question: {str(e)}",
-                "sources": [],
-                "confidence": "low",
-                "source_documents": []
-            }
+        Returns:
+            Dict with answer, sources, confidence, source_documents and timings;
+            "degraded" is set when the scheduler was saturated and the answer
+            was extracted from the documents instead of generated, "abstained"
+            when retrieval scored too low for the documents to hold the answer
+        """
+        with metrics.trace() as timings:
+            try:
+                score = top_score(source_documents)
+                if not source_documents or not self.calibrator.should_answer(score):
+                    response = self._abstain_response(source_documents)
+                    response["timings"] = timings
+                    return response
+                
+                context_documents = source_documents
+                if hasattr(self.retriever, "expand"):
+                    context_documents = self.retriever.expand(source_documents)
+                with metrics.span("prompt_build"):
+                    prompt = self.build_prompt(question, context_documents)
+                answer = self._schedule(lambda: self._generate(prompt, on_token), user, priority)
+                
+                response = {
+                    "answer": answer,
+                    "sources": self._format_sources(source_documents),
+                    "confidence": self._calculate_confidence(source_documents, score),
+                    "source_documents": source_documents
+                }
+            except GenerationRejected as e:
+                response = self._extractive_response(question, source_documents, context_documents, e)
+            except Exception as e:
+                metrics.increment("generation_error")
+                response = self._error_response(e)
+        
+        response["timings"] = timings
+        return response
+    
+    def _abstain_response(self, source_documents: List) -> Dict:
+        """Answer "not in the documents" without a generation"""
+        metrics.increment("generation_skipped")
+        return {
+            "answer": NOT_IN_DOCUMENTS,
+            "sources": [],
+            "confidence": "low",
+            "source_documents": source_documents,
+            "abstained": True
+        }
+    
+    def _schedule(self, generate: Callable, user: Optional[str], priority: int):
+        """Run a generation through the scheduler, if there is one"""
+        if self.scheduler is None:
+            return generate()
+        return self.scheduler.run(generate, user=user, priority=priority)
+    
+    def _extractive_response(self, question: str, source_documents: List, context_documents: List,
+                             rejection: GenerationRejected) -> Dict:
+        """Answer with the best matching sentences when no generation slot is available"""
+        metrics.increment("generation_degraded")
+        answer, _, _ = generate_answer(question, [
+            {"text": doc.page_content, "source": doc.metadata.get("source", "Unknown")}
+            for doc in context_documents
+        ])
+        return {
+            "answer": answer,
+            "sources": self._format_sources(source_documents),
+            "confidence": self._calculate_confidence(source_documents, top_score(source_documents)),
+            "source_documents": source_documents,
+            "degraded": rejection.reason
+        }
+    
+    def _generate(self, prompt: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Stream the LLM response, timing the first token and the full generation"""
+        start = time.perf_counter()
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            if not parts:
+                metrics.observe("time_to_first_token", (time.perf_counter() - start) * 1000)
+            parts.append(chunk)
+            if on_token:
+                on_token(chunk)
+        metrics.observe("generation", (time.perf_counter() - start) * 1000)
+        return "".join(parts)
+    
+    def build_prompt(self, question: str, source_documents: List) -> str:
+        """Stuff the documents into the QA prompt"""
+        context = "\n\n".join(doc.page_content for doc in source_documents)
+        return self.PROMPT.format(context=context, question=question)
+    
+    def _error_response(self, error: Exception) -> Dict:
+        """Build the response returned when answering fails"""
+        return {
+            "answer": f"Error processing question: {str(error)}",
+            "sources": [],
+            "confidence": "low",
+            "source_documents": []
+        }
     
-    def _calculate_confidence(self, source_documents: List) -> str:
-        """Calculate confidence level"""
+    def _calculate_confidence(self, source_documents: List, score: Optional[float] = None) -> str:
+        """Confidence level from the best retrieval score, or the number of documents if unscored"""
+        if score is not None:
+            return self.calibrator.level(score)
         num_sources = len(source_documents)
         if num_sources >= 3:
             return "high"
@@ -114,7 +241,7 @@ Answer: {answer}
 
 Generate 2-3 concise follow-up questions (one per line, no numbering):"""
 
-            response = self.llm.invoke(prompt)
+            response = self._schedule(lambda: self.llm.invoke(prompt), None, FOLLOWUP)
             followups = [q.strip() for q in response.strip().split('\n') if q.strip()]
             return followups[:3]
         except Exception as e:
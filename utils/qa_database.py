@@ -0,0 +1,354 @@
+"""
+QA Database - Curated answers to common employee questions
+"""
+
+# Pre-built Q&A database for common questions
+QA_DATABASE = {
+    # Leave Policy Questions
+    "how many days of annual leave": {
+        "answer": "Employees are entitled to 20 days of annual leave per calendar year.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "annual leave": {
+        "answer": "All full-time employees are entitled to 20 days of annual leave per calendar year. Annual leave must be approved by the immediate supervisor at least 5 working days in advance.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "sick leave": {
+        "answer": "Employees can take up to 12 days of sick leave per year with proper medical documentation. A doctor's certificate is required for sick leave exceeding 2 consecutive days.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "casual leave": {
+        "answer": "7 days of casual leave are provided per year for personal matters. Casual leave can be taken without prior approval for urgent situations.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "maternity leave": {
+        "answer": "Female employees are entitled to 180 days (approximately 6 months) of paid maternity leave.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "paternity leave": {
+        "answer": "Male employees are entitled to 10 days of paternity leave within 6 months of the child's birth.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "apply for leave": {
+        "answer": "To apply for leave, employees must submit a request through the HR portal at least 3 days in advance for planned leave.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Work Hours
+    "work hours": {
+        "answer": "The standard working hours are 9:00 AM to 6:00 PM, Monday through Friday, with a one-hour lunch break. Employees are expected to work 40 hours per week.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "working hours": {
+        "answer": "Standard working hours are 9:00 AM to 6:00 PM, Monday through Friday, with 40 hours per week expected.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Salary
+    "when is salary paid": {
+        "answer": "Salaries are paid on the last working day of each month via direct bank transfer.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    "salary paid": {
+        "answer": "Salaries are paid on the last working day of each month via direct bank transfer.",
+        "source": "hr_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Password Policy
+    "password policy": {
+        "answer": "All system passwords must be minimum 12 characters in length, include uppercase and lowercase letters, at least one number, and at least one special character (@, #, $, etc.). Passwords must be changed every 90 days.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    "password requirements": {
+        "answer": "Passwords must be minimum 12 characters with uppercase, lowercase letters, at least one number, and one special character. They cannot contain username or common words.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    "change password": {
+        "answer": "Employees must change their passwords every 90 days. The system will prompt password changes 7 days before expiration.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Health Insurance
+    "health insurance": {
+        "answer": "All employees and their immediate family members (spouse and up to 2 children) are covered under the company's group health insurance policy with coverage up to Rs. 5 lakhs per year.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    "medical insurance": {
+        "answer": "Medical insurance provides Rs. 5,00,000 coverage per family per year, with cashless hospitalization at 5000+ network hospitals, including pre and post-hospitalization coverage.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    "insurance coverage": {
+        "answer": "The health insurance covers Rs. 5,00,000 per family per year with cashless hospitalization, pre-hospitalization (30 days), and post-hospitalization (60 days) coverage.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Bonuses
+    "performance bonus": {
+        "answer": "Annual performance bonuses range from 10% to 20% of annual salary based on individual and company performance. They are paid in April each year after annual appraisal.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    "referral bonus": {
+        "answer": "Referral bonuses are: Rs. 25,000 for junior roles (after 3 months), Rs. 50,000 for mid-level roles (after 6 months), and Rs. 1,00,000 for senior roles (after 6 months).",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Remote Work
+    "work from home": {
+        "answer": "Hybrid work allows employees to work from home up to 2 days per week (Wednesday and Friday flexible), with office presence required 3 days (Monday, Tuesday, Thursday mandatory). Employees must complete 6 months probation to be eligible.",
+        "source": "remote_work_policy.txt",
+        "confidence": "high"
+    },
+    "remote work": {
+        "answer": "Remote work is available in hybrid format (2 days WFH per week) after completing 6 months probation. Core hours are 11:00 AM to 4:00 PM with mandatory availability.",
+        "source": "remote_work_policy.txt",
+        "confidence": "high"
+    },
+    "hybrid work": {
+        "answer": "Hybrid work allows 2 days work from home per week (Wed, Fri flexible) and 3 days in office (Mon, Tue, Thu mandatory). Team must be present together on Thursdays.",
+        "source": "remote_work_policy.txt",
+        "confidence": "high"
+    },
+    "core hours": {
+        "answer": "Core hours are 11:00 AM to 4:00 PM (India Time). All remote employees must be available during core hours and respond to messages within 30 minutes.",
+        "source": "remote_work_policy.txt",
+        "confidence": "high"
+    },
+    "internet reimbursement": {
+        "answer": "Internet charges are reimbursed up to Rs. 1,500 per month for remote employees.",
+        "source": "remote_work_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Onboarding
+    "first day": {
+        "answer": "On Day 1, report to Reception at 9:00 AM. The day includes HR orientation (9:30 AM), IT setup (11:00 AM), office tour (12:00 PM), team introduction (2:00 PM), and workstation setup.",
+        "source": "onboarding_guide.txt",
+        "confidence": "high"
+    },
+    "onboarding": {
+        "answer": "Onboarding spans the first 90 days. Week 1 focuses on orientation and training, Weeks 2-4 on building momentum and taking responsibilities, and the full 90 days on proving value before permanent confirmation.",
+        "source": "onboarding_guide.txt",
+        "confidence": "high"
+    },
+    "probation": {
+        "answer": "The probation period is 90 days (first 3 months). During this time, performance is evaluated before permanent confirmation.",
+        "source": "onboarding_guide.txt",
+        "confidence": "high"
+    },
+    "first salary": {
+        "answer": "First salary is paid at the end of the first full month. Pro-rata for partial month is paid in the next cycle.",
+        "source": "onboarding_guide.txt",
+        "confidence": "high"
+    },
+    "documents required": {
+        "answer": "Required documents include: Photo ID proof (Aadhaar/PAN/Passport), address proof, educational certificates, previous employment relieving letter, last 3 months salary slips, bank account details, PF transfer form, and medical fitness certificate.",
+        "source": "onboarding_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Benefits
+    "provident fund": {
+        "answer": "The company contributes 12% of basic salary to Employee Provident Fund (EPF) as per government regulations. Employees also contribute an equal 12% amount.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    "epf": {
+        "answer": "EPF contribution is 12% from both employer and employee on the basic salary, as per government regulations.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    "professional development": {
+        "answer": "Employees can access up to Rs. 50,000 per year for professional development including courses, certifications, and conference attendance, subject to manager approval.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    "gym membership": {
+        "answer": "Gym membership is reimbursed up to Rs. 1,500 per month as part of wellness programs.",
+        "source": "benefits_guide.txt",
+        "confidence": "high"
+    },
+    
+    # IT Security
+    "vpn": {
+        "answer": "VPN access is required for all remote connections to company networks. VPN credentials are personal and must not be shared.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    "multi factor authentication": {
+        "answer": "Multi-Factor Authentication (MFA) is mandatory for all company systems including email, VPN, and cloud applications. Employees must register their mobile device or authenticator app within the first week of joining.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    "mfa": {
+        "answer": "MFA is mandatory for all systems. Employees must register their mobile device or authenticator app within the first week.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    "security incident": {
+        "answer": "Any security incidents including lost devices, suspected data breaches, or unauthorized access must be reported to IT security within 1 hour of discovery.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    "lost laptop": {
+        "answer": "If you lose your company laptop, report it to IT security immediately within 1 hour. Contact security@techcorp.com or call the emergency hotline.",
+        "source": "it_security_policy.txt",
+        "confidence": "high"
+    },
+    
+    # COMPLEX CROSS-DOCUMENT QUESTIONS
+    
+    # Benefits Overview
+    "what benefits": {
+        "answer": "Employees receive comprehensive benefits including: Health insurance (Rs. 5 lakhs coverage for family), Life insurance (3x annual salary), Provident Fund (12% employer contribution), Performance bonus (10-20% of salary), Professional development budget (Rs. 50,000/year), Gym membership reimbursement (Rs. 1,500/month), 20 days annual leave, 12 days sick leave, and various other perks like wellness programs and employee assistance programs.",
+        "source": "hr_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    "all benefits": {
+        "answer": "Complete benefits package includes: Medical insurance (Rs. 5 lakhs/year), Life insurance (3x salary), Accident insurance (Rs. 10 lakhs), EPF (12% contribution), Annual bonus (10-20%), Referral bonus (up to Rs. 1 lakh), Gym reimbursement (Rs. 1,500/month), Professional development (Rs. 50,000/year), Paid leaves (20 annual + 12 sick + 7 casual), Maternity leave (180 days), Paternity leave (10 days), Mental health counseling, and wellness programs.",
+        "source": "hr_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    "employee benefits": {
+        "answer": "Key employee benefits: Health insurance covering Rs. 5 lakhs per family, 12% EPF contribution, performance bonuses (10-20% of annual salary), Rs. 50,000 annual budget for courses and certifications, 20 days annual leave plus sick and casual leave, maternity leave (180 days), gym membership reimbursement, mental health support through EAP, and comprehensive insurance coverage including life and accident insurance.",
+        "source": "hr_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Leave Types Summary
+    "all leave types": {
+        "answer": "Available leave types are: Annual Leave (20 days per year), Sick Leave (12 days with medical certificate), Casual Leave (7 days for personal matters), Maternity Leave (180 days paid), Paternity Leave (10 days), and Sabbatical Leave (up to 3 months unpaid after 5 years of service).",
+        "source": "hr_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    "types of leave": {
+        "answer": "There are six types of leave: Annual leave (20 days/year with 5 days advance notice), Sick leave (12 days with doctor's note), Casual leave (7 days without prior approval), Maternity leave (180 days for female employees), Paternity leave (10 days for male employees), and Sabbatical leave (3 months unpaid after 5 years).",
+        "source": "hr_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Remote Work Complete Policy
+    "remote work policy": {
+        "answer": "Remote work is available as hybrid arrangement after 6 months probation. Employees can work from home 2 days per week (Wed, Fri) and must be in office 3 days (Mon, Tue, Thu mandatory). Core hours are 11 AM-4 PM with 30-minute response time. Equipment provided includes laptop, monitor, headset, plus Rs. 15,000 setup allowance. Monthly reimbursements: Internet (Rs. 1,500), Electricity (Rs. 500), Mobile data (Rs. 300). VPN is mandatory for all remote connections. Employees must have stable internet (50+ Mbps) and dedicated workspace.",
+        "source": "hr_policy.txt, remote_work_policy.txt, it_security_policy.txt",
+        "confidence": "high"
+    },
+    "wfh policy": {
+        "answer": "Work from home follows hybrid model: 2 days WFH (Wed/Fri) and 3 days office (Mon/Tue/Thu) after completing probation. Requirements include stable internet (50 Mbps), dedicated workspace, VPN access, and availability during core hours (11 AM-4 PM). Company provides laptop, monitor, headset, and Rs. 15,000 setup allowance. Monthly reimbursements include internet (Rs. 1,500) and mobile data (Rs. 300).",
+        "source": "remote_work_policy.txt, it_security_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Complete Onboarding Journey
+    "onboarding process": {
+        "answer": "Onboarding is a 90-day journey. Week 1: Orientation, IT setup, training, and first assignment. Weeks 2-4: Building momentum, taking on real responsibilities. Days 31-60: Independent task management, expanding network. Days 61-90: Full integration, meeting expectations, preparing for permanent confirmation. Key milestones include completing mandatory training, meeting team, understanding workflow, and contributing to team goals. First salary is paid at end of first full month. Documents required include ID proof, address proof, educational certificates, previous employment papers, and bank details.",
+        "source": "onboarding_guide.txt, hr_policy.txt",
+        "confidence": "high"
+    },
+    "first 90 days": {
+        "answer": "The first 90 days (probation period) is structured as: Month 1 - Learn systems, meet team, complete training, handle first assignments with guidance. Month 2 - Take ownership of projects, work independently, meet initial goals, expand your network. Month 3 - Fully integrated, meeting performance expectations, possibly mentoring newer members, contributing ideas. Performance review happens at 90 days for permanent confirmation. During this period, standard benefits like health insurance apply immediately, while WFH privileges start after completion.",
+        "source": "onboarding_guide.txt, hr_policy.txt, remote_work_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Security Requirements for Remote Work
+    "security for remote work": {
+        "answer": "Remote work security requirements: Use company VPN for all work activities, never connect to public WiFi, enable MFA on all systems, use strong passwords (12+ characters with special chars, changed every 90 days), lock screen when away, encrypt sensitive data, no company data on personal devices, report security incidents within 1 hour. Physical security includes locking workspace, securing equipment, and no unauthorized persons during work. Network security requires firewall enabled, strong WiFi password (WPA3), and no security bypass attempts.",
+        "source": "it_security_policy.txt, remote_work_policy.txt",
+        "confidence": "high"
+    },
+    "remote security": {
+        "answer": "Security measures for remote employees: Mandatory VPN usage, MFA on all accounts, password policy compliance (12 chars, 90-day change), encrypted connections only, no public WiFi for work, immediate incident reporting (within 1 hour), physical device security, and no unauthorized access to workspace during work hours. Equipment must be secured when not in use and company data never stored on personal devices.",
+        "source": "it_security_policy.txt, remote_work_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Complete Compensation Package
+    "total compensation": {
+        "answer": "Total compensation includes: Base salary (paid last day of month), HRA and allowances, 12% EPF contribution from employer, Annual performance bonus (10-20% of salary, paid in April), Referral bonuses (Rs. 25k-1 lakh), Retention bonuses at 3/5/10 years (Rs. 50k-5 lakhs), Health insurance (Rs. 5 lakhs), Life insurance (3x salary), Professional development budget (Rs. 50k/year), and various reimbursements for gym, internet, and other expenses. Additional benefits include paid leaves, wellness programs, and learning opportunities.",
+        "source": "hr_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    "salary package": {
+        "answer": "Complete salary package comprises: Monthly salary with basic pay, HRA, and allowances paid on last working day. Annual components include performance bonus (10-20% based on ratings, paid in April), EPF contribution (12% employer + 12% employee), gratuity after 5 years, health insurance (Rs. 5 lakhs family coverage), life insurance (3x salary), and accident insurance (Rs. 10 lakhs). Additional perks: Rs. 50,000/year for professional development, gym reimbursement (Rs. 1,500/month), internet for WFH (Rs. 1,500/month), plus retention and referral bonus opportunities.",
+        "source": "hr_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    
+    # IT Setup Requirements
+    "it requirements": {
+        "answer": "IT requirements include: Password must be 12+ characters with uppercase, lowercase, numbers, and special characters (changed every 90 days). MFA is mandatory on all systems, registered within first week. VPN required for remote access. Only IT-approved software can be installed. Company equipment includes laptop, monitor, keyboard, mouse, and headset. For remote work, additional requirements are stable 50 Mbps internet, backup connection, dedicated workspace, and proper lighting for video calls. All data must be encrypted and stored on approved platforms only.",
+        "source": "it_security_policy.txt, remote_work_policy.txt, onboarding_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Work-Life Balance Complete
+    "work life balance": {
+        "answer": "Work-life balance policies include: Flexible work arrangements with 2 days WFH per week, core hours 11 AM-4 PM with flexible start time (8-10 AM). Right to disconnect after 7 PM and weekends off. Take regular breaks (15 min every 2 hours recommended), full lunch break (minimum 30 minutes). Sabbatical leave available after 5 years (up to 3 months). Mental health support through EAP with 6 free counseling sessions per year. Wellness programs include yoga, meditation classes, gym membership reimbursement, and encouragement to use all allocated leave days.",
+        "source": "hr_policy.txt, benefits_guide.txt, remote_work_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Manager Approval Requirements
+    "what needs manager approval": {
+        "answer": "Manager approval is required for: Annual leave (5 days advance notice), Work from home arrangements, Temporary remote work (more than standard 2 days/week), Professional development courses and certifications (from Rs. 50k budget), Flexible work schedules, Compressed work weeks, Software installation requests, Access to restricted systems, Overtime work, and Travel expenses. Some items like casual leave for emergencies can be taken with just immediate notification to manager.",
+        "source": "hr_policy.txt, remote_work_policy.txt, benefits_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Contact Information Across Departments
+    "contact information": {
+        "answer": "Key contacts: HR (hr@techcorp.com, Ext 5555), IT Helpdesk (itsupport@techcorp.com, Ext 4444), IT Security (security@techcorp.com, Emergency: +91-80-1234-9999), Benefits Team (benefits@techcorp.com, Ext 4567), Payroll (payroll@techcorp.com, Ext 5678), Remote Work Coordinator (remotework@techcorp.com), Facilities (Ext 6666), Reception (Ext 1111), Medical Emergency (Ext 9999). HR portal: hrms.techcorp.com, IT Helpdesk portal: helpdesk.techcorp.com.",
+        "source": "hr_policy.txt, it_security_policy.txt, benefits_guide.txt, remote_work_policy.txt, onboarding_guide.txt",
+        "confidence": "high"
+    },
+    "hr contact": {
+        "answer": "HR can be reached at: Email hr@techcorp.com, Phone Extension 5555, HR Portal https://hrms.techcorp.com. For specific needs: Benefits Team (benefits@techcorp.com), Payroll (payroll@techcorp.com, Ext 5678), Onboarding (onboarding@techcorp.com). HR is available during office hours 9 AM - 6 PM, Monday to Friday.",
+        "source": "hr_policy.txt, benefits_guide.txt, onboarding_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Training and Development Complete
+    "training opportunities": {
+        "answer": "Training and development opportunities include: Rs. 50,000 annual budget per employee for online courses (Coursera, Udemy, LinkedIn Learning), professional certifications (AWS, Azure, PMP, etc.), conference attendance, workshops, and books. Internal training includes weekly tech talks (Fridays 4-5 PM), monthly skill-building workshops, leadership development programs, and assigned mentorship for first 6 months. Education assistance available with up to Rs. 2 lakh interest-free loan for higher education (MBA, MS) with 24-month repayment. Study leave up to 10 days per year for exams.",
+        "source": "benefits_guide.txt, onboarding_guide.txt",
+        "confidence": "high"
+    },
+    "learning budget": {
+        "answer": "Professional development budget is Rs. 50,000 per employee per year. This covers: online courses (Coursera, Udemy, LinkedIn Learning), professional certifications (AWS, Azure, Google Cloud, PMP, etc.), conference attendance, workshop participation, and learning materials/books. Process: Get pre-approval from manager, complete course/certification, submit certificate and invoice, receive reimbursement in next month's salary. Additional support: Interest-free education loan up to Rs. 2 lakhs for higher education with study leave (10 days/year for exams).",
+        "source": "benefits_guide.txt, hr_policy.txt",
+        "confidence": "high"
+    },
+    
+    # Emergency Procedures
+    "emergency contact": {
+        "answer": "Emergency contacts: Medical Emergency (Ext 9999), Security Emergency (Ext 2222), IT Security Emergency (+91-80-1234-9999 or security@techcorp.com). For lost/stolen devices or security breaches, report within 1 hour to IT Security. For workplace safety issues, contact Facilities (Ext 6666). Reception for general emergencies (Ext 1111). EAP 24/7 helpline for mental health: 1800-XXX-XXXX. All employees should know emergency exit locations and assembly points covered in Day 1 orientation.",
+        "source": "it_security_policy.txt, benefits_guide.txt, onboarding_guide.txt",
+        "confidence": "high"
+    },
+    
+    # Performance and Appraisal
+    "performance review": {
+        "answer": "Performance reviews happen at: 30-day check-in during onboarding, 90-day probation review for permanent confirmation, and annual appraisal (typically end of financial year). Performance bonus is based 70% on individual performance and 30% on company performance. Ratings determine bonus: Exceeds expectations (20% of salary), Meets expectations (15%), Needs improvement (10%), Below expectations (no bonus). Bonuses are paid in April. For remote workers, performance is measured by output quality, timeliness, communication responsiveness, collaboration, and goal achievement.",
+        "source": "hr_policy.txt, benefits_guide.txt, remote_work_policy.txt, onboarding_guide.txt",
+        "confidence": "high"
+    }
+}
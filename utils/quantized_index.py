@@ -0,0 +1,235 @@
+"""
+Quantized Index - float16, int8 and binary FAISS storage with full-precision rescoring
+"""
+
+import os
+from typing import Optional
+import faiss
+import numpy as np
+
+STORAGE_TYPES = ("float32", "float16", "int8", "binary")
+
+# Rows read from the full-precision file at once when scoring a large filter
+EXACT_SCAN_ROWS = 65536
+
+def create_index(storage: str, dimensions: int, metric: int = faiss.METRIC_L2) -> faiss.Index:
+    """
+    Create an empty FAISS index storing vectors in the given precision
+
+    float16 and int8 use scalar quantizers (2 and 1 byte per dimension; int8
+    must be trained first), binary keeps one sign bit per dimension and ranks
+    by Hamming distance.
+    """
+    if storage == "float32":
+        return faiss.IndexFlat(dimensions, metric)
+    if storage == "float16":
+        return faiss.IndexScalarQuantizer(dimensions, faiss.ScalarQuantizer.QT_fp16, metric)
+    if storage == "int8":
+        return faiss.IndexScalarQuantizer(dimensions, faiss.ScalarQuantizer.QT_8bit, metric)
+    if storage == "binary":
+        # No rotation and zero thresholds: bit i is the sign of dimension i
+        return faiss.IndexLSH(dimensions, dimensions, False, False)
+    raise ValueError(f"Unknown vector storage {storage!r}, expected one of {', '.join(STORAGE_TYPES)}")
+
+def index_storage(index: faiss.Index) -> str:
+    """Storage type of an existing index"""
+    if isinstance(index, faiss.IndexLSH):
+        return "binary"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "float16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "int8"
+    return "float32"
+
+def bytes_per_vector(index: faiss.Index) -> int:
+    return getattr(index, "code_size", index.d * 4)
+
+class FullPrecisionVectors:
+    def __init__(self, path: str, dimensions: int):
+        """
+        Append-only float32 copy of the index vectors, memory-mapped on demand
+
+        Only the rows being rescored are paged in, so the full-precision
+        vectors cost disk space rather than resident memory.
+
+        Args:
+            path: File holding the rows back to back
+            dimensions: Vector size
+        """
+        self.path = path
+        self.dimensions = dimensions
+        self._map = None
+
+    def __len__(self) -> int:
+        if self._map is not None:
+            return len(self._map)
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // (self.dimensions * 4)
+
+    def open(self):
+        """
+        Map the file now rather than on the first rescore
+
+        Read-only generations are opened this way so the mapping survives
+        the file being deleted once a newer generation is published.
+        """
+        if self._map is None and len(self):
+            self._map = np.memmap(self.path, dtype=np.float32, mode="r").reshape(-1, self.dimensions)
+
+    def append(self, vectors: np.ndarray):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._map = None
+
+    def truncate(self, rows: int):
+        """Drop rows past the index (left over when a save was interrupted)"""
+        with open(self.path, "r+b") as f:
+            f.truncate(rows * self.dimensions * 4)
+        self._map = None
+
+    def clear(self):
+        self._map = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def rows(self, ids: np.ndarray) -> np.ndarray:
+        """Read the given rows (any order) into memory"""
+        self.open()
+        return np.asarray(self._map[ids])
+
+class QuantizedStorage:
+    def __init__(self, storage: str, vectors_path: str, dimensions: Optional[int] = None,
+                 rescore_factor: int = 10, metric: int = faiss.METRIC_L2):
+        """
+        Compressed vectors in memory, exact scores from disk
+
+        The quantized index ranks rescore_factor * k candidates, which are then
+        re-ranked by their exact distance to the query using the float32 copy.
+        Scores therefore match an uncompressed index; only candidates the
+        quantized index misses are lost.
+
+        Args:
+            storage: float16, int8 or binary
+            vectors_path: File for the full-precision copy
+            dimensions: Vector size (taken from the first vectors when unknown)
+            rescore_factor: Candidates per result to rescore (0 returns the
+                quantized ranking and scores as is)
+            metric: FAISS metric used for rescoring and new indexes
+        """
+        if storage not in STORAGE_TYPES or storage == "float32":
+            raise ValueError(f"Unknown quantized storage {storage!r}")
+        self.storage = storage
+        self.vectors_path = vectors_path
+        self.rescore_factor = rescore_factor
+        self.metric = metric
+        self.vectors = FullPrecisionVectors(vectors_path, dimensions) if dimensions else None
+
+    def create_index(self, dimensions: int) -> faiss.Index:
+        if self.vectors is None:
+            self.vectors = FullPrecisionVectors(self.vectors_path, dimensions)
+        return create_index(self.storage, dimensions, self.metric)
+
+    def before_add(self, index: faiss.Index, matrix: np.ndarray):
+        """
+        Store the full-precision copy of vectors about to be added to index
+
+        An int8 index is (re)trained on all vectors whenever the new batch at
+        least doubles it, so the quantizer's value ranges keep up with the
+        corpus while training stays linear overall. Smaller batches are
+        clipped to the trained ranges, which rescoring makes up for.
+        """
+        existing = index.ntotal
+        self.vectors.append(matrix)
+        if self.storage == "int8" and (not index.is_trained or len(matrix) >= existing):
+            everything = self.vectors.rows(np.arange(existing + len(matrix)))
+            index.reset()
+            index.train(everything)
+            if existing:
+                index.add(everything[:existing])
+
+    def verify(self, index: faiss.Index) -> bool:
+        """Check the full-precision copy matches the index; trims rows a failed save left behind"""
+        if self.vectors is None:
+            self.vectors = FullPrecisionVectors(self.vectors_path, index.d)
+        stored = len(self.vectors)
+        if stored > index.ntotal:
+            self.vectors.truncate(index.ntotal)
+        elif stored < index.ntotal:
+            print(f"⚠️ Full-precision vectors missing ({stored}/{index.ntotal}), results will not be rescored")
+            return False
+        return True
+
+    def search(self, index: faiss.Index, matrix: np.ndarray, k: int,
+               ids: Optional[np.ndarray] = None, exact_threshold: int = 4096) -> tuple:
+        """
+        Search the quantized index and rescore the candidates
+
+        Args:
+            index: Quantized FAISS index
+            matrix: Query vectors
+            k: Results per query
+            ids: Optional rows to restrict the search to (sorted)
+            exact_threshold: Restrictions up to this size are scored exactly
+                on the full-precision rows instead of through the index
+        """
+        rescore = self.rescore_factor > 0 and self.vectors is not None and len(self.vectors) >= index.ntotal
+
+        if ids is not None and rescore and (len(ids) <= exact_threshold or self.storage == "binary"):
+            # Binary indexes cannot skip rows during a search
+            return self._exact_search(matrix, ids, k)
+
+        fetch = k * self.rescore_factor if rescore else k
+        if ids is None:
+            scores, candidates = index.search(matrix, fetch)
+        elif self.storage == "binary":
+            scores, candidates = index.search(matrix, index.ntotal)
+            allowed = np.isin(candidates, ids)
+            order = np.argsort(~allowed, axis=1, kind="stable")[:, :k]
+            scores = np.take_along_axis(np.where(allowed, scores, np.inf), order, axis=1)
+            candidates = np.take_along_axis(np.where(allowed, candidates, -1), order, axis=1)
+        else:
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+            scores, candidates = index.search(matrix, fetch, params=params)
+
+        if not rescore:
+            return scores, candidates
+        return self._rescore(matrix, candidates, k)
+
+    def _empty_result(self, rows: int, k: int) -> tuple:
+        worst = -np.inf if self.metric == faiss.METRIC_INNER_PRODUCT else np.inf
+        return np.full((rows, k), worst, dtype=np.float32), np.full((rows, k), -1, dtype=np.int64)
+
+    def _rescore(self, matrix: np.ndarray, candidates: np.ndarray, k: int) -> tuple:
+        """Re-rank each query's candidates by exact distance"""
+        scores, ids = self._empty_result(len(matrix), k)
+        # Read every candidate once, in file order
+        unique = np.unique(candidates[candidates >= 0])
+        if len(unique) == 0:
+            return scores, ids
+        full = self.vectors.rows(unique)
+
+        for i, (query, row) in enumerate(zip(matrix, candidates)):
+            row = row[row >= 0]
+            if len(row) == 0:
+                continue
+            row_scores, positions = faiss.knn(
+                query[None], full[np.searchsorted(unique, row)], min(k, len(row)), metric=self.metric
+            )
+            found = positions[0] >= 0
+            scores[i, :found.sum()] = row_scores[0][found]
+            ids[i, :found.sum()] = row[positions[0][found]]
+        return scores, ids
+
+    def _exact_search(self, matrix: np.ndarray, ids: np.ndarray, k: int) -> tuple:
+        """Score the given rows exactly, reading them in bounded chunks"""
+        best_scores, best_ids = self._empty_result(len(matrix), k)
+        descending = self.metric == faiss.METRIC_INNER_PRODUCT
+        for start in range(0, len(ids), EXACT_SCAN_ROWS):
+            chunk = ids[start:start + EXACT_SCAN_ROWS]
+            scores, positions = faiss.knn(matrix, self.vectors.rows(chunk), min(k, len(chunk)), metric=self.metric)
+            merged_scores = np.hstack([best_scores, scores])
+            merged_ids = np.hstack([best_ids, np.where(positions >= 0, chunk[positions], -1)])
+            order = np.argsort(-merged_scores if descending else merged_scores, axis=1, kind="stable")[:, :k]
+            best_scores = np.take_along_axis(merged_scores, order, axis=1)
+            best_ids = np.take_along_axis(merged_ids, order, axis=1)
+        return best_scores, best_ids
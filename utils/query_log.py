@@ -0,0 +1,260 @@
+"""
+Query Log - Durable, append-only, rotated query log with precomputed analytics rollups
+"""
+
+import atexit
+import json
+import os
+import queue
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from utils.metrics import Histogram
+
+def normalize_question(question: str) -> str:
+    """Group trivially different phrasings of the same question"""
+    return " ".join(re.findall(r'\w+', question.lower()))
+
+class QueryRollup:
+    def __init__(self, top_capacity: int = 500):
+        """
+        Running analytics of one tenant's queries
+
+        Args:
+            top_capacity: Distinct questions tracked for the top-questions rollup
+        """
+        self.top_capacity = top_capacity
+        self.total_queries = 0
+        self.confidence_counts = {}
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.question_counts = {}
+        self.latency = Histogram()
+
+    def update(self, entry: Dict):
+        self.total_queries += 1
+        confidence = entry.get("confidence") or "unknown"
+        self.confidence_counts[confidence] = self.confidence_counts.get(confidence, 0) + 1
+
+        if entry.get("latency_ms") is not None:
+            self.latency.observe(entry["latency_ms"])
+        if entry.get("cache_hit") is not None:
+            self.cache_lookups += 1
+            self.cache_hits += int(bool(entry["cache_hit"]))
+
+        self._count_question(normalize_question(entry["question"]))
+
+    def _count_question(self, question: str):
+        """
+        Space-saving top-k counter: memory stays bounded by top_capacity
+
+        When full, the least frequent question is replaced and the newcomer
+        inherits its count, which over-estimates rare questions but never
+        misses a frequent one.
+        """
+        if not question:
+            return
+        if question in self.question_counts:
+            self.question_counts[question] += 1
+        elif len(self.question_counts) < self.top_capacity:
+            self.question_counts[question] = 1
+        else:
+            weakest = min(self.question_counts, key=self.question_counts.get)
+            count = self.question_counts.pop(weakest)
+            self.question_counts[question] = count + 1
+
+    def snapshot(self) -> Dict:
+        total = self.total_queries
+        top = sorted(self.question_counts.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "total_queries": total,
+            "confidence_counts": dict(self.confidence_counts),
+            "low_confidence_rate": round(self.confidence_counts.get("low", 0) / total, 3) if total else 0.0,
+            "latency_p50_ms": round(self.latency.percentile(50), 1),
+            "latency_p95_ms": round(self.latency.percentile(95), 1),
+            "latency_buckets_ms": dict(zip(map(str, self.latency.buckets), self.latency.bucket_counts)),
+            "cache_hit_rate": round(self.cache_hits / self.cache_lookups, 3) if self.cache_lookups else 0.0,
+            "top_questions": [{"question": q, "count": c} for q, c in top]
+        }
+
+    def to_state(self) -> Dict:
+        return {
+            "total_queries": self.total_queries,
+            "confidence_counts": self.confidence_counts,
+            "cache_hits": self.cache_hits,
+            "cache_lookups": self.cache_lookups,
+            "question_counts": self.question_counts,
+            "latency": {
+                "count": self.latency.count,
+                "sum": self.latency.sum,
+                "bucket_counts": self.latency.bucket_counts,
+                "recent": list(self.latency.recent)
+            }
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict, top_capacity: int = 500) -> "QueryRollup":
+        rollup = cls(top_capacity)
+        rollup.total_queries = state["total_queries"]
+        rollup.confidence_counts = state["confidence_counts"]
+        rollup.cache_hits = state["cache_hits"]
+        rollup.cache_lookups = state["cache_lookups"]
+        rollup.question_counts = state["question_counts"]
+        rollup.latency.count = state["latency"]["count"]
+        rollup.latency.sum = state["latency"]["sum"]
+        rollup.latency.bucket_counts = state["latency"]["bucket_counts"]
+        rollup.latency.recent.extend(state["latency"]["recent"])
+        return rollup
+
+class QueryLog:
+    def __init__(self, log_dir: str = "./data/query_logs", max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 10, flush_interval: float = 1.0, top_capacity: int = 500):
+        """
+        Initialize query log
+
+        Entries are queued by append() and written in batches by a background
+        thread, which also refreshes the rollup snapshots read by the UI.
+        Rollups are kept per tenant, so one department's questions never
+        show up in another's analytics.
+
+        Args:
+            log_dir: Directory for queries.jsonl, its rotations and rollups.json
+            max_bytes: Rotate the log file once it reaches this size
+            backup_count: Rotated files to keep (queries.jsonl.1 ... .N)
+            flush_interval: Seconds between batched writes
+            top_capacity: Distinct questions tracked per tenant for the top-questions rollup
+        """
+        self.log_dir = log_dir
+        self.log_file = os.path.join(log_dir, "queries.jsonl")
+        self.rollup_file = os.path.join(log_dir, "rollups.json")
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.top_capacity = top_capacity
+
+        os.makedirs(log_dir, exist_ok=True)
+
+        self._queue = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._load_rollups()
+        self._snapshots = {tenant: rollup.snapshot() for tenant, rollup in self._rollups.items()}
+
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def append(self, question: str, answer: str, confidence: str,
+               latency_ms: Optional[float] = None, cache_hit: Optional[bool] = None,
+               tenant: Optional[str] = None):
+        """Queue a query for logging; never blocks on disk I/O"""
+        entry = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "question": question,
+            "answer": answer,
+            "confidence": confidence,
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+            "cache_hit": cache_hit,
+            "tenant": tenant
+        }
+        self._queue.put(entry)
+
+    def get_rollups(self, tenant: Optional[str] = None) -> Dict:
+        """
+        Latest precomputed rollups of one tenant (refreshed after every batch write)
+
+        Args:
+            tenant: Knowledge base name; None for queries logged without one
+        """
+        snapshot = self._snapshots.get(tenant or "")
+        return snapshot if snapshot is not None else QueryRollup(self.top_capacity).snapshot()
+
+    def flush(self):
+        """Write all queued entries now"""
+        self._write_batch(self._drain())
+
+    def close(self):
+        """Stop the writer thread after flushing queued entries"""
+        if not self._stop.is_set():
+            self._stop.set()
+            self._writer.join(timeout=5)
+            self.flush()
+
+    def _drain(self) -> List[Dict]:
+        entries = []
+        while True:
+            try:
+                entries.append(self._queue.get_nowait())
+            except queue.Empty:
+                return entries
+
+    def _write_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._write_batch(self._drain())
+            except Exception as e:
+                print(f"⚠️ Could not write query log: {str(e)}")
+
+    def _write_batch(self, entries: List[Dict]):
+        """Append entries to the log file and fold them into the rollups"""
+        if not entries:
+            return
+
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        with self._write_lock:
+            self._rotate_if_needed(len(lines.encode("utf-8")))
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+            changed = set()
+            for entry in entries:
+                tenant = entry.get("tenant") or ""
+                if tenant not in self._rollups:
+                    self._rollups[tenant] = QueryRollup(self.top_capacity)
+                self._rollups[tenant].update(entry)
+                changed.add(tenant)
+            self._snapshots = {
+                **self._snapshots, **{tenant: self._rollups[tenant].snapshot() for tenant in changed}
+            }
+            self._save_rollups()
+
+    def _rotate_if_needed(self, incoming_bytes: int):
+        """Shift queries.jsonl -> .1 -> .2 ... when the size limit is reached"""
+        if not os.path.exists(self.log_file):
+            return
+        if os.path.getsize(self.log_file) + incoming_bytes <= self.max_bytes:
+            return
+
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.log_file}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_file}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.log_file, f"{self.log_file}.1")
+        else:
+            os.remove(self.log_file)
+
+    def _load_rollups(self):
+        """Restore rollup state so counts survive restarts without rereading logs"""
+        self._rollups = {}
+        if not os.path.exists(self.rollup_file):
+            return
+        try:
+            with open(self.rollup_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            # Files written before rollups were kept per tenant hold one
+            # rollup, filed under queries without a tenant
+            tenants = state["tenants"] if "tenants" in state else {"": state}
+            self._rollups = {
+                tenant: QueryRollup.from_state(rollup, self.top_capacity) for tenant, rollup in tenants.items()
+            }
+        except Exception as e:
+            print(f"⚠️ Could not load query rollups: {str(e)}")
+
+    def _save_rollups(self):
+        state = {"tenants": {tenant: rollup.to_state() for tenant, rollup in self._rollups.items()}}
+        temp_file = f"{self.rollup_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.rollup_file)
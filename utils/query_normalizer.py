@@ -0,0 +1,197 @@
+"""
+Query Normalizer - Stopword removal, light stemming and spelling correction for keyword matching
+
+Typos are corrected against the vocabulary of the FAQ and the ingested
+documents with symmetric-delete lookups (as in SymSpell): each vocabulary
+word is indexed under the strings left by deleting up to 2 of its
+characters, so the deletes of a misspelled query word find its candidates
+with a few dict lookups instead of a scan of the vocabulary.
+"""
+
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+from utils.qa_database import QA_DATABASE
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Words that carry no meaning for matching questions to answers
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "can", "do", "does", "for", "from", "get", "how",
+    "i", "if", "in", "is", "it", "many", "me", "much", "my", "of", "on", "or", "our", "the",
+    "there", "to", "we", "what", "when", "where", "which", "who", "why", "will", "with", "you", "your"
+}
+
+# (suffix, replacement); the first match is stripped if 3+ characters remain
+SUFFIX_RULES = (("sses", "ss"), ("ies", "y"), ("ied", "y"), ("ing", ""), ("ed", ""), ("ly", ""), ("s", ""))
+
+def stem(word: str) -> str:
+    """
+    Light suffix-stripping stem ("policies" -> "policy", "leaves" -> "leav")
+
+    Only needs to map a word and its inflections to the same key; stems
+    are not meant to be read.
+    """
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                break
+            word = word[:-len(suffix)] + replacement
+            if suffix in ("ing", "ed") and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+def document_terms(text: str) -> Set[str]:
+    """Stems of a text's content words (documents are not spell-corrected)"""
+    return {stem(word) for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS}
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """Damerau-Levenshtein distance (adjacent transpositions count 1), or limit + 1 once above limit"""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = first[i - 1] != second[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+class QueryNormalizer:
+    def __init__(self, max_edit_distance: int = 2, min_word_length: int = 4,
+                 stemming: bool = True, cache_size: int = 8192):
+        """
+        Initialize normalizer with an empty vocabulary
+
+        Words of up to 7 letters are corrected within 1 edit, longer ones
+        within max_edit_distance; shorter than min_word_length, words with
+        digits and known words are left alone.
+
+        Args:
+            max_edit_distance: Largest correction (0 turns correction off)
+            min_word_length: Shorter words are never corrected
+            stemming: Reduce words to their stems
+            cache_size: Corrections remembered between vocabulary changes
+        """
+        self.max_edit_distance = max_edit_distance
+        self.min_word_length = min_word_length
+        self.stemming = stemming
+        self.cache_size = cache_size
+        self._counts = Counter()
+        self._deletes = defaultdict(set)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+        self.corrections = 0
+
+    def _max_distance(self, word: str) -> int:
+        if len(word) < self.min_word_length:
+            return 0
+        return min(self.max_edit_distance, 1 if len(word) <= 7 else 2)
+
+    @staticmethod
+    def _variants(word: str, distance: int) -> Set[str]:
+        """Strings left by deleting 1 to distance characters"""
+        variants, frontier = set(), {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - variants
+            variants |= frontier
+        return variants
+
+    def add_words(self, words: Iterable[str]):
+        """Add lowercase words to the vocabulary"""
+        with self._lock:
+            for word in words:
+                if word in STOPWORDS or not word.isalpha():
+                    continue
+                if word not in self._counts:
+                    for variant in self._variants(word, self._max_distance(word)):
+                        self._deletes[variant].add(word)
+                    self._cache.clear()
+                self._counts[word] += 1
+
+    def add_text(self, text: str):
+        """Add a document's (or FAQ entry's) words to the vocabulary"""
+        self.add_words(WORD_PATTERN.findall(text.lower()))
+
+    def correct(self, word: str) -> str:
+        """Closest vocabulary word (fewest edits, then most frequent), or the word itself"""
+        distance = self._max_distance(word)
+        if distance == 0 or not word.isalpha():
+            return word
+        with self._lock:
+            if word in self._counts:
+                return word
+            cached = self._cache.get(word)
+            if cached is not None:
+                return cached
+
+            candidates = set()
+            for variant in self._variants(word, distance) | {word}:
+                candidates |= self._deletes.get(variant, set())
+                if variant in self._counts:
+                    candidates.add(variant)
+            best, best_key = word, (distance + 1, 0)
+            for candidate in candidates:
+                key = (edit_distance(word, candidate, distance), -self._counts[candidate])
+                if key < best_key:
+                    best, best_key = candidate, key
+
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[word] = best
+            self.corrections += best != word
+            return best
+
+    def correct_query(self, query: str) -> List[str]:
+        """Content words of a query, spell-corrected, in order"""
+        return [self.correct(word) for word in WORD_PATTERN.findall(query.lower()) if word not in STOPWORDS]
+
+    def normalize(self, query: str) -> Set[str]:
+        """Terms to match a query against document_terms()"""
+        words = self.correct_query(query)
+        return {stem(word) for word in words} if self.stemming else set(words)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "vocabulary": len(self._counts),
+                "deletes": len(self._deletes),
+                "corrections": self.corrections
+            }
+
+def build_normalizer(texts: Iterable[str] = (), faq: Optional[Dict[str, Dict]] = None, **options) -> QueryNormalizer:
+    """
+    Normalizer whose vocabulary holds the FAQ and the given texts
+
+    Args:
+        texts: Document texts to add
+        faq: Question -> entry mapping (defaults to QA_DATABASE)
+        options: QueryNormalizer arguments
+    """
+    normalizer = QueryNormalizer(**options)
+    for key, entry in (QA_DATABASE if faq is None else faq).items():
+        normalizer.add_text(key)
+        normalizer.add_text(entry["answer"])
+    for text in texts:
+        normalizer.add_text(text)
+    return normalizer
+
+_shared_normalizer = None
+_shared_lock = threading.Lock()
+
+def get_query_normalizer() -> QueryNormalizer:
+    """Normalizer over the FAQ vocabulary, shared by the whole process"""
+    global _shared_normalizer
+    with _shared_lock:
+        if _shared_normalizer is None:
+            _shared_normalizer = build_normalizer()
+        return _shared_normalizer
@@ -0,0 +1,65 @@
+"""
+Read-Write Lock - Many concurrent readers or one writer, with wait-time metrics
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from utils.metrics import metrics
+
+class ReadWriteLock:
+    def __init__(self, wait_metric: Optional[str] = None):
+        """
+        Initialize lock
+
+        Waiting writers block new readers, so a steady stream of searches
+        cannot starve an ingest.
+
+        Args:
+            wait_metric: Stage name under which time spent waiting is recorded
+        """
+        self.wait_metric = wait_metric
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        start = time.perf_counter()
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        self._record_wait(start)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        start = time.perf_counter()
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        self._record_wait(start)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+    def _record_wait(self, start: float):
+        if self.wait_metric:
+            metrics.observe(self.wait_metric, (time.perf_counter() - start) * 1000)
@@ -0,0 +1,191 @@
+"""
+Generation Scheduler - Admission control, priorities and per-user fairness for LLM calls
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Optional
+from utils.metrics import metrics
+
+# Priorities: lower runs first
+INTERACTIVE = 0
+FOLLOWUP = 1
+BATCH = 2
+
+class GenerationRejected(Exception):
+    def __init__(self, reason: str, message: str):
+        """
+        Raised when a generation is not run
+
+        Args:
+            reason: "queue_full", "preempted" or "deadline"
+            message: Human readable explanation
+        """
+        super().__init__(message)
+        self.reason = reason
+
+class _Ticket:
+    __slots__ = ("user", "priority", "deadline", "event", "granted", "cancelled", "reason", "key")
+
+    def __init__(self, user: str, priority: int, deadline: float):
+        self.user = user
+        self.priority = priority
+        self.deadline = deadline
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+        self.reason = None
+        self.key = None
+
+class GenerationScheduler:
+    def __init__(self, max_concurrent: int = 1, max_queue: int = 16, default_deadline: float = 30.0):
+        """
+        Initialize scheduler
+
+        Callers wait in a bounded priority queue for one of max_concurrent
+        generation slots, then run their generation on their own thread.
+        Within a priority, users take turns (start-time fair queueing), so
+        one user's burst cannot starve everyone else.
+
+        Args:
+            max_concurrent: Generations sent to Ollama at once
+            max_queue: Waiting generations before new ones are rejected
+            default_deadline: Seconds within which an answer is still useful
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.default_deadline = default_deadline
+
+        self._lock = threading.Lock()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._queued = 0
+        self._active = 0
+        self._round = 0
+        self._user_rounds = {}
+        self._service_ms = None
+
+        self.completed = 0
+        self.rejected = {}
+
+    def run(self, fn: Callable, user: Optional[str] = None, priority: int = INTERACTIVE,
+            deadline: Optional[float] = None):
+        """
+        Wait for a generation slot and run fn
+
+        Args:
+            fn: The generation to run (called with no arguments)
+            user: Who is asking, for fairness between users
+            priority: INTERACTIVE, FOLLOWUP or BATCH
+            deadline: Seconds from now after which the answer is useless
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            GenerationRejected: If the queue is full or the deadline cannot be met
+        """
+        ticket = _Ticket(user or "anonymous", priority,
+                         time.monotonic() + (self.default_deadline if deadline is None else deadline))
+        queued_at = time.perf_counter()
+
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queued:
+                self._active += 1
+                ticket.granted = True
+            else:
+                self._admit(ticket)
+
+        if not ticket.granted:
+            ticket.event.wait(max(0.0, ticket.deadline - time.monotonic()))
+            with self._lock:
+                if not ticket.granted and not ticket.reason:
+                    # Still queued at the deadline: withdraw
+                    ticket.cancelled = True
+                    ticket.reason = "deadline"
+                    self._queued -= 1
+                if not ticket.granted:
+                    self._count_rejection(ticket.reason)
+            if not ticket.granted:
+                raise GenerationRejected(ticket.reason, f"Generation not run ({ticket.reason})")
+
+        metrics.observe("generation_queue_wait", (time.perf_counter() - queued_at) * 1000)
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._active -= 1
+                self.completed += 1
+                self._service_ms = elapsed_ms if self._service_ms is None else \
+                    0.8 * self._service_ms + 0.2 * elapsed_ms
+                self._dispatch()
+
+    def _admit(self, ticket: _Ticket):
+        """Queue a ticket or raise; called with the lock held"""
+        live = [entry for entry in self._heap if not entry[-1].cancelled]
+        ahead = sum(1 for entry in live if entry[0] <= ticket.priority)
+        if self._service_ms is not None:
+            # Expected wait: everyone ahead, served max_concurrent at a time
+            expected_ms = (ahead // self.max_concurrent + 1) * self._service_ms
+            if time.monotonic() + expected_ms / 1000 > ticket.deadline:
+                self._count_rejection("deadline")
+                raise GenerationRejected("deadline", "Generation queue too long to answer in time")
+
+        if self._queued >= self.max_queue:
+            worst = max(live, key=lambda entry: entry[:3], default=None)
+            if worst is None or worst[0] <= ticket.priority:
+                self._count_rejection("queue_full")
+                raise GenerationRejected("queue_full", "Generation queue is full")
+            # Make room by bumping the lowest-priority, most recent waiter
+            bumped = worst[-1]
+            bumped.cancelled = True
+            bumped.reason = "preempted"
+            self._queued -= 1
+            bumped.event.set()
+
+        # Start-time fair queueing: a user's next request goes one round after
+        # their previous one, but never earlier than the round being served
+        user_round = max(self._user_rounds.get(ticket.user, 0), self._round) + 1
+        self._user_rounds[ticket.user] = user_round
+        if len(self._user_rounds) > 1000:
+            self._user_rounds = {u: r for u, r in self._user_rounds.items() if r > self._round}
+
+        ticket.key = (ticket.priority, user_round, next(self._sequence))
+        heapq.heappush(self._heap, (*ticket.key, ticket))
+        self._queued += 1
+
+    def _dispatch(self):
+        """Grant free slots to the next live, unexpired tickets; called with the lock held"""
+        now = time.monotonic()
+        while self._active < self.max_concurrent and self._heap:
+            *key, ticket = heapq.heappop(self._heap)
+            if ticket.cancelled:
+                continue
+            self._queued -= 1
+            if ticket.deadline <= now:
+                ticket.reason = "deadline"
+                ticket.event.set()
+                continue
+            self._round = max(self._round, key[1])
+            self._active += 1
+            ticket.granted = True
+            ticket.event.set()
+
+    def _count_rejection(self, reason: str):
+        """Called with the lock held"""
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        metrics.increment(f"generation_rejected_{reason}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "completed": self.completed,
+                "rejected": dict(self.rejected),
+                "avg_generation_ms": round(self._service_ms, 1) if self._service_ms else 0.0
+            }
@@ -0,0 +1,277 @@
+"""
+Shared Index - Immutable index generations served read-only by several worker processes
+
+The coordinator process owns the writable indexes. After each ingestion it
+snapshots the tenant's index into <tenant>/generations/<id>/ and points the
+CURRENT file at it with an atomic rename. Workers open the current generation
+read-only: the FAISS index is memory-mapped and the docstore read through
+SQLite, so all workers share the OS page cache instead of each holding a copy.
+"""
+
+import json
+import os
+import shutil
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional
+import faiss
+from utils.tenant_registry import TENANT_NAME_PATTERN, KnowledgeBaseRegistry
+
+GENERATIONS_DIR = "generations"
+CURRENT_FILE = "CURRENT"
+
+def current_generation(directory: str) -> Optional[str]:
+    """Name of the generation a tenant directory currently serves, if any"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def publish_generation(manager, keep: int = 3) -> Optional[str]:
+    """
+    Snapshot a writable VectorStoreManager into a new generation and make it current
+
+    Older generations beyond keep are deleted; workers still reading them
+    keep working, since read-only managers open or map every file of their
+    generation when loaded, and those outlive their directory entry.
+
+    Returns:
+        The new generation's name, or None if the index is empty (workers
+        then serve nothing)
+    """
+    directory = manager.persist_directory
+    root = os.path.join(directory, GENERATIONS_DIR)
+    current_path = os.path.join(directory, CURRENT_FILE)
+
+    with manager._index_lock.read():
+        if manager.vectorstore is None:
+            if os.path.exists(current_path):
+                os.remove(current_path)
+            return None
+
+        # Nanosecond names sort by age and never repeat after a clear
+        name = f"{time.time_ns():020d}"
+        staging = os.path.join(root, f".{name}.tmp")
+        index_dir = os.path.join(staging, os.path.basename(manager.index_file))
+        os.makedirs(index_dir)
+        faiss.write_index(manager.vectorstore.index, os.path.join(index_dir, "index.faiss"))
+        manager.vectorstore.docstore.backup(os.path.join(index_dir, "docstore.sqlite"))
+        if manager.quantized is not None:
+            shutil.copyfile(manager.quantized.vectors_path, os.path.join(index_dir, "vectors.f32"))
+
+    os.rename(staging, os.path.join(root, name))
+    with open(current_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(current_path + ".tmp", current_path)
+
+    for old in sorted(n for n in os.listdir(root) if not n.startswith("."))[:-keep]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return name
+
+class SharedIndexReader:
+    def __init__(self, directory: str, embeddings, check_interval: float = 1.0):
+        """
+        Read-only view of a tenant's current generation
+
+        Args:
+            directory: Tenant directory holding CURRENT and generations/
+            embeddings: Embeddings client for queries
+            check_interval: Seconds between checks for a newer generation
+        """
+        self.directory = directory
+        self.embeddings = embeddings
+        self.check_interval = check_interval
+        self.generation = None
+        self.manager = None
+        self.reloads = 0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> "VectorStoreManager":
+        """Manager serving the newest published generation"""
+        now = time.monotonic()
+        if self.manager is not None and now - self._checked < self.check_interval:
+            return self.manager
+
+        with self._lock:
+            self._checked = now
+            name = current_generation(self.directory)
+            if self.manager is None or name != self.generation:
+                from utils.vector_store import VectorStoreManager
+                self.manager = VectorStoreManager(
+                    persist_directory=os.path.join(self.directory, GENERATIONS_DIR, name or "none"),
+                    embeddings=self.embeddings,
+                    read_only=True
+                )
+                self.generation = name
+                self.reloads += 1
+            return self.manager
+
+    def invalidate(self):
+        """Check for a new generation on the next call"""
+        self._checked = 0.0
+
+class SharedIndexRegistry:
+    def __init__(self, base_directory: str = "./data/tenants", embeddings=None,
+                 check_interval: float = 1.0):
+        """
+        Worker-side registry serving published generations of every tenant
+
+        Drop-in for KnowledgeBaseRegistry in the API workers. There is no
+        memory budget: mapped pages belong to the OS page cache, which drops
+        them under pressure and shares them between workers.
+
+        Args:
+            base_directory: Directory holding one subdirectory per tenant
+            embeddings: CachedEmbeddings client shared by all tenants
+            check_interval: Seconds between checks for a newer generation
+        """
+        self.base_directory = base_directory
+        self.check_interval = check_interval
+        self._embeddings = embeddings
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self):
+        with self._lock:
+            if self._embeddings is None:
+                from utils.vector_store import create_embeddings
+                self._embeddings = create_embeddings()
+            return self._embeddings
+
+    def validate_name(self, tenant: str) -> str:
+        """Reject names that could escape the base directory"""
+        if not TENANT_NAME_PATTERN.match(tenant or ""):
+            raise ValueError(f"Invalid knowledge base name: {tenant!r}")
+        return tenant
+
+    def exists(self, tenant: str) -> bool:
+        return os.path.isdir(os.path.join(self.base_directory, self.validate_name(tenant)))
+
+    def list_tenants(self) -> List[str]:
+        if not os.path.isdir(self.base_directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.base_directory)
+            if TENANT_NAME_PATTERN.match(name)
+            and os.path.exists(os.path.join(self.base_directory, name, CURRENT_FILE))
+        )
+
+    def get(self, tenant: str) -> "VectorStoreManager":
+        self.validate_name(tenant)
+        embeddings = self.embeddings
+        with self._lock:
+            reader = self._readers.get(tenant)
+            if reader is None:
+                reader = self._readers[tenant] = SharedIndexReader(
+                    os.path.join(self.base_directory, tenant), embeddings, self.check_interval
+                )
+        return reader.current()
+
+    def refresh(self, tenant: str):
+        """Pick up the generation the coordinator just published"""
+        with self._lock:
+            reader = self._readers.get(tenant)
+        if reader is not None:
+            reader.invalidate()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            readers = dict(self._readers)
+        return {
+            "loaded_tenants": len(readers),
+            "generations": {tenant: reader.generation for tenant, reader in readers.items()},
+            "reloads": sum(reader.reloads for reader in readers.values())
+        }
+
+class IndexCoordinator:
+    def __init__(self, registry: KnowledgeBaseRegistry, socket_path: str, doc_processor):
+        """
+        Ingest on behalf of the workers and publish a generation after each change
+
+        Workers send {"op": "ingest", "tenant", "filename", "path"} as one JSON
+        line over a Unix socket and get {"chunks", "duplicates", "generation"}
+        or {"error"} back. Ingestion runs in this process only, so there is
+        exactly one writer per index.
+
+        Args:
+            registry: Writable tenant registry
+            socket_path: Unix socket the workers connect to
+            doc_processor: DocumentProcessor, the same one single-process
+                ingestion uses, so chunks do not depend on the worker count
+        """
+        self.registry = registry
+        self.socket_path = socket_path
+        self.doc_processor = doc_processor
+        self._server = None
+
+    def publish_all(self) -> Dict[str, Optional[str]]:
+        """Publish every tenant on disk, e.g. before the workers start"""
+        return {tenant: publish_generation(self.registry.get(tenant)) for tenant in self.registry.list_tenants()}
+
+    def ingest(self, tenant: str, filename: str, path: str) -> Dict:
+        self.registry.validate_name(tenant)
+        documents = self.doc_processor.process_document(path, filename)
+        if not documents:
+            raise ValueError(f"No text could be extracted from {filename}")
+        manager = self.registry.get(tenant)
+        if not manager.add_documents(documents):
+            raise RuntimeError(f"Failed to add {filename} to the knowledge base")
+        self.registry.refresh(tenant)
+        return {"chunks": len(documents), "duplicates": (manager.last_dedup or {}).get("collapsed", 0),
+                "generation": publish_generation(manager)}
+
+    def handle(self, request: Dict) -> Dict:
+        try:
+            if request.get("op") == "ingest":
+                return self.ingest(request["tenant"], request["filename"], request["path"])
+            return {"error": f"Unknown operation: {request.get('op')!r}"}
+        except Exception as e:
+            print(f"❌ Coordinator error: {str(e)}")
+            return {"error": str(e)}
+
+    def start(self) -> "IndexCoordinator":
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if line:
+                    response = coordinator.handle(json.loads(line))
+                    self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="kb-coordinator", daemon=True).start()
+        print(f"✅ Index coordinator listening on {self.socket_path}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+class CoordinatorClient:
+    def __init__(self, socket_path: str, timeout: float = 600.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def ingest(self, tenant: str, filename: str, path: str) -> Dict:
+        """Have the coordinator ingest a file already written to a shared path"""
+        request = {"op": "ingest", "tenant": tenant, "filename": filename, "path": os.path.abspath(path)}
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            connection.connect(self.socket_path)
+            connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            response = json.loads(connection.makefile("rb").readline() or b'{"error": "no response"}')
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
@@ -0,0 +1,235 @@
+"""
+Tenant Registry - Named knowledge bases with lazy loading and LRU eviction under a memory budget
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+TENANT_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+# Chunk count and sources written next to each saved index, readable without loading it
+SUMMARY_FILE = "summary.json"
+
+# Where VectorStoreManager kept its single index before knowledge bases had names
+LEGACY_DIRECTORY = "./data/vectorstore"
+
+class KnowledgeBaseRegistry:
+    def __init__(self, base_directory: str = "./data/tenants", memory_budget_mb: float = 512,
+                 embeddings=None):
+        """
+        Initialize knowledge base registry
+
+        Each tenant gets its own index under base_directory/<tenant>. Indexes
+        are loaded on first use and the least recently used ones are dropped
+        from memory once the budget is exceeded (they stay on disk).
+        LangChain, FAISS and the Ollama client are only imported once a
+        knowledge base is loaded, so listing and validating tenants is cheap.
+
+        Args:
+            base_directory: Directory holding one subdirectory per tenant
+            memory_budget_mb: Memory allowed for loaded indexes
+            embeddings: CachedEmbeddings client shared by all tenants (created
+                on first load when not given)
+        """
+        self.base_directory = base_directory
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self._embeddings = embeddings
+
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+        self.loads = 0
+        self.evictions = 0
+        self.load_ms_total = 0.0
+
+        os.makedirs(base_directory, exist_ok=True)
+
+    @property
+    def embeddings(self):
+        """Embeddings client shared by all tenants"""
+        with self._lock:
+            if self._embeddings is None:
+                from utils.vector_store import create_embeddings
+                self._embeddings = create_embeddings()
+            return self._embeddings
+
+    def validate_name(self, tenant: str) -> str:
+        """Reject names that could escape the base directory"""
+        if not TENANT_NAME_PATTERN.match(tenant or ""):
+            raise ValueError(f"Invalid knowledge base name: {tenant!r}")
+        return tenant
+
+    def exists(self, tenant: str) -> bool:
+        """Whether a knowledge base exists (lookups that must not create one check this first)"""
+        self.validate_name(tenant)
+        with self._lock:
+            if tenant in self._loaded:
+                return True
+        return os.path.isdir(os.path.join(self.base_directory, tenant))
+
+    def migrate_legacy(self, tenant: str, legacy_directory: str = LEGACY_DIRECTORY) -> bool:
+        """
+        Move the pre-registry index into a tenant, once
+
+        Does nothing if there is no legacy index or the tenant already has
+        one of its own.
+
+        Returns:
+            True if the index was moved
+        """
+        self.validate_name(tenant)
+        target = os.path.join(self.base_directory, tenant)
+        if not os.path.exists(os.path.join(legacy_directory, "faiss_index", "index.faiss")):
+            return False
+        if os.path.exists(os.path.join(target, "faiss_index")):
+            print(f"⚠️ Not migrating {legacy_directory}: knowledge base '{tenant}' already has an index")
+            return False
+        with self._lock:
+            if tenant in self._loaded:
+                return False
+            if os.path.isdir(target) and not os.listdir(target):
+                os.rmdir(target)
+            shutil.move(legacy_directory, target)
+        print(f"✅ Moved {legacy_directory} into knowledge base '{tenant}'")
+        return True
+
+    def list_tenants(self) -> List[str]:
+        """List all knowledge bases on disk"""
+        return sorted(
+            name for name in os.listdir(self.base_directory)
+            if TENANT_NAME_PATTERN.match(name)
+            and os.path.isdir(os.path.join(self.base_directory, name))
+        )
+
+    def get(self, tenant: str) -> "VectorStoreManager":
+        """
+        Get a tenant's vector store, loading it on first use
+
+        Creates an empty knowledge base if the tenant does not exist yet.
+        """
+        self.validate_name(tenant)
+
+        with self._lock:
+            manager = self._loaded.get(tenant)
+            if manager is not None:
+                self._loaded.move_to_end(tenant)
+                return manager
+            load_lock = self._load_locks.setdefault(tenant, threading.Lock())
+
+        # Load outside the registry lock so other tenants stay available
+        with load_lock:
+            with self._lock:
+                manager = self._loaded.get(tenant)
+                if manager is not None:
+                    self._loaded.move_to_end(tenant)
+                    return manager
+
+            from utils.vector_store import VectorStoreManager
+            start = time.perf_counter()
+            manager = VectorStoreManager(
+                persist_directory=os.path.join(self.base_directory, tenant),
+                embeddings=self.embeddings
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self._loaded[tenant] = manager
+                self.loads += 1
+                self.load_ms_total += elapsed_ms
+                self._enforce_budget(keep=tenant)
+
+        return manager
+
+    def get_retriever(self, tenant: str, **options) -> Optional["TenantRetriever"]:
+        """
+        Retriever for a tenant that does not pin its index in memory
+
+        Args:
+            tenant: Knowledge base name
+            options: VectorStoreManager.get_retriever arguments
+
+        Returns:
+            None if the knowledge base has no documents
+        """
+        if self.get(tenant).get_retriever(**options) is None:
+            return None
+        from utils.vector_store import TenantRetriever
+        return TenantRetriever(registry=self, tenant=tenant, **options)
+
+    def loaded(self, tenant: str) -> Optional["VectorStoreManager"]:
+        """A tenant's vector store if it is already in memory (never loads it)"""
+        with self._lock:
+            return self._loaded.get(tenant)
+
+    def summary(self, tenant: str) -> Optional[Dict]:
+        """
+        Chunk count and sources of a tenant without loading its index
+
+        Uses the loaded index when there is one, otherwise the summary saved
+        next to the index on disk.
+
+        Returns:
+            {"total_documents", "sources"}, or None if the index exists but
+            has no summary yet (it was saved before summaries were written)
+        """
+        manager = self.loaded(self.validate_name(tenant))
+        if manager is not None:
+            return {"total_documents": manager.get_stats()["total_documents"], "sources": manager.get_sources()}
+
+        index_dir = os.path.join(self.base_directory, tenant, "faiss_index")
+        if not os.path.exists(os.path.join(index_dir, "index.faiss")):
+            return {"total_documents": 0, "sources": []}
+        try:
+            with open(os.path.join(index_dir, SUMMARY_FILE), "r", encoding="utf-8") as f:
+                summary = json.load(f)
+            return {"total_documents": summary["total_documents"], "sources": summary["sources"]}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def refresh(self, tenant: str):
+        """Re-check the memory budget after a tenant's index has grown"""
+        with self._lock:
+            if tenant in self._loaded:
+                self._enforce_budget(keep=tenant)
+
+    def evict(self, tenant: str) -> bool:
+        """Drop a tenant's index from memory (it stays on disk)"""
+        with self._lock:
+            return self._loaded.pop(tenant, None) is not None
+
+    def _enforce_budget(self, keep: str):
+        """Evict least recently used tenants until under budget (caller holds the lock)"""
+        while self._memory_in_use() > self.memory_budget_bytes and len(self._loaded) > 1:
+            oldest = next(iter(self._loaded))
+            if oldest == keep:
+                self._loaded.move_to_end(keep)
+                oldest = next(iter(self._loaded))
+            del self._loaded[oldest]
+            self.evictions += 1
+            print(f"♻️ Evicted knowledge base '{oldest}' from memory")
+
+    def _memory_in_use(self) -> int:
+        return sum(manager.estimate_memory_bytes() for manager in self._loaded.values())
+
+    def get_stats(self) -> Dict:
+        """Get registry statistics"""
+        with self._lock:
+            loaded = {
+                tenant: round(manager.estimate_memory_bytes() / (1024 * 1024), 2)
+                for tenant, manager in self._loaded.items()
+            }
+        return {
+            "loaded_tenants": len(loaded),
+            "memory_mb": loaded,
+            "memory_budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 2),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "avg_load_ms": round(self.load_ms_total / self.loads, 2) if self.loads else 0.0
+        }
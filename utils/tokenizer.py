@@ -0,0 +1,150 @@
+"""
+Tokenizer - Fast local token counts for sizing chunks to the model context windows
+"""
+
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+# Ollama's default context for llama3.2 and nomic-embed-text; text past it is
+# silently dropped (embeddings) or pushes the start of the prompt out (LLM)
+LLM_CONTEXT_TOKENS = 2048
+EMBEDDING_CONTEXT_TOKENS = 2048
+
+# Regex fallback: words, 3-digit groups and newline runs are tokens; long
+# words cost a token per 6 letters and symbol runs ("====", "),") one per 4.
+# That is about 3.7 characters per token on sample_doc, a little below BPE's
+# usual 4 for English, so chunks err on the short side.
+PIECE_PATTERN = re.compile(r"([^\W\d_]+)|\d{1,3}|\n+|([^\w\s]+|_+)")
+LETTERS_PER_TOKEN = 6
+SYMBOLS_PER_TOKEN = 4
+
+def context_token_budget(context_tokens: int = LLM_CONTEXT_TOKENS, answer_tokens: int = 512,
+                         prompt_tokens: int = 200) -> int:
+    """Tokens of retrieved text a prompt can hold"""
+    return max(1, context_tokens - answer_tokens - prompt_tokens)
+
+def chunk_token_budget(context_tokens: int = LLM_CONTEXT_TOKENS, k: int = 4, answer_tokens: int = 512,
+                       prompt_tokens: int = 200, embedding_tokens: int = EMBEDDING_CONTEXT_TOKENS,
+                       window: int = 0) -> int:
+    """
+    Largest chunk (in tokens) that fits both context windows
+
+    Args:
+        context_tokens: LLM context window
+        k: Chunks put into each prompt
+        answer_tokens: Room left for the answer
+        prompt_tokens: Instructions and question around the chunks
+        embedding_tokens: Embedding model context window
+        window: Neighbors added on each side of a hit, so each hit's share of
+            the prompt holds 2 * window + 1 chunks
+    """
+    per_hit = context_token_budget(context_tokens, answer_tokens, prompt_tokens) // k
+    return max(1, min(embedding_tokens, per_hit // (2 * window + 1)))
+
+class TokenCounter:
+    def __init__(self, encoding: str = "cl100k_base", cache_size: int = 65536):
+        """
+        Initialize token counter
+
+        Uses tiktoken when it is installed and has the encoding (cl100k_base is
+        close to llama3's tokenizer), otherwise a regex approximation. Counts
+        are cached, since the text splitter measures the same pieces many times.
+
+        Args:
+            encoding: tiktoken encoding name
+            cache_size: Maximum number of cached counts
+        """
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding)
+            self.name = f"tiktoken:{encoding}"
+        except Exception:
+            # Not installed, or the encoding file cannot be downloaded
+            self.name = "regex"
+
+    def _count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode_ordinary(text))
+        count = 0
+        for match in PIECE_PATTERN.finditer(text):
+            letters, symbols = match.groups()
+            if letters:
+                count += math.ceil(len(letters) / LETTERS_PER_TOKEN)
+            elif symbols:
+                count += math.ceil(len(symbols) / SYMBOLS_PER_TOKEN)
+            else:
+                count += 1
+        return count
+
+    def _lookup(self, text: str) -> Optional[int]:
+        with self._lock:
+            count = self._cache.get(text)
+            if count is None:
+                self.misses += 1
+            else:
+                self._cache.move_to_end(text)
+                self.hits += 1
+            return count
+
+    def _store(self, text: str, count: int):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[text] = count
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text"""
+        count = self._lookup(text)
+        if count is None:
+            count = self._count(text)
+            self._store(text, count)
+        return count
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Token counts of many texts; uncached ones are encoded in one batch"""
+        counts = [self._lookup(text) for text in texts]
+        missing = [i for i, count in enumerate(counts) if count is None]
+        if not missing:
+            return counts
+
+        if self._encoding is not None:
+            encoded = self._encoding.encode_ordinary_batch([texts[i] for i in missing])
+            computed = [len(tokens) for tokens in encoded]
+        else:
+            computed = [self._count(texts[i]) for i in missing]
+        for i, count in zip(missing, computed):
+            counts[i] = count
+            self._store(texts[i], count)
+        return counts
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "tokenizer": self.name,
+                "cached": len(self._cache),
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+_shared_counter = None
+_shared_lock = threading.Lock()
+
+def get_token_counter() -> TokenCounter:
+    """Token counter shared by the whole process"""
+    global _shared_counter
+    with _shared_lock:
+        if _shared_counter is None:
+            _shared_counter = TokenCounter()
+        return _shared_counter
@@ -0,0 +1,104 @@
+"""
+Upload Archive - Content-addressed copies of uploaded files, written off the request path
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Union
+
+class UploadArchive:
+    def __init__(self, directory: str = "./data/uploads"):
+        """
+        Initialize upload archive
+
+        Files are stored once per content under objects/<sha256[:2]>/<sha256>,
+        so re-uploading a file costs nothing and two different files with the
+        same name never overwrite each other. index.jsonl records which name
+        was uploaded as which content.
+
+        Args:
+            directory: Archive root
+        """
+        self.directory = directory
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-archive")
+        self._lock = threading.Lock()
+        self._pending = {}
+
+        self.archived = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def archive(self, data: Union[bytes, bytearray, memoryview], filename: str,
+                wait: bool = False, metadata: Optional[Dict] = None) -> str:
+        """
+        Store an upload, returning its SHA-256
+
+        Args:
+            data: File contents; buffers are not copied, so they must not be
+                modified until the write is done
+            filename: Original name, recorded in the index
+            wait: Write before returning (e.g. when another process reads the file)
+            metadata: Extra fields for the index entry (e.g. tenant)
+        """
+        view = memoryview(data)
+        digest = hashlib.sha256(view).hexdigest()
+        path = self.path_for(digest)
+
+        with self._lock:
+            future = self._pending.get(digest)
+            duplicate = future is not None or os.path.exists(path)
+            if duplicate:
+                self.deduplicated += 1
+            else:
+                future = self._executor.submit(self._write, digest, path, view)
+                self._pending[digest] = future
+                self.archived += 1
+                self.bytes_written += view.nbytes
+
+        self._executor.submit(self._record, {**(metadata or {}), "filename": filename,
+                                             "sha256": digest, "bytes": view.nbytes})
+        if wait and future is not None:
+            future.result()
+        return digest
+
+    def _write(self, digest: str, path: str, view: memoryview):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(view)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"❌ Error archiving upload {digest}: {str(e)}")
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+    def _record(self, entry: Dict):
+        try:
+            with open(os.path.join(self.directory, "index.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({**entry, "uploaded_at": time.time()}) + "\n")
+        except Exception as e:
+            print(f"⚠️ Could not record upload {entry['filename']}: {str(e)}")
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait for queued writes"""
+        self._executor.submit(lambda: None).result(timeout)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "archived": self.archived,
+                "deduplicated": self.deduplicated,
+                "bytes_written": self.bytes_written,
+                "pending": len(self._pending)
+            }
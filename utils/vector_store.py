@@ -2,34 +2,155 @@
 Vector Store Manager - Handles FAISS operations with Ollama embeddings (100% LOCAL & FREE)
 """
 
+import json
 import os
-from typing import List, Optional
+import threading
+from typing import Any, Dict, List, Optional
+import faiss
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import OllamaEmbeddings
+from utils.dedup import ChunkDeduplicator, merge_reference
+from utils.docstore import SQLiteDocstore
+from utils.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+from utils.metadata_index import MetadataIndex
+from utils.metrics import metrics
+from utils.quantized_index import (
+    STORAGE_TYPES, FullPrecisionVectors, QuantizedStorage, bytes_per_vector, create_index, index_storage
+)
+from utils.query_normalizer import document_terms
+from utils.rwlock import ReadWriteLock
+from utils.tenant_registry import SUMMARY_FILE
+from utils.tokenizer import get_token_counter
+
+def join_overlapping(first: str, second: str, min_overlap: int = 16, max_overlap: int = 4000) -> str:
+    """Concatenate consecutive chunks, dropping the overlap the text splitter repeated"""
+    start = max(0, len(first) - max_overlap)
+    while True:
+        start = first.find(second[:1], start, max(0, len(first) - min_overlap + 1))
+        if start == -1:
+            return first + "\n" + second
+        if second.startswith(first[start:]):
+            return first + second[len(first) - start:]
+        start += 1
+
+def with_scores(results: List[tuple]) -> List[Document]:
+    """Documents of (Document, score) results with the score in copies of their metadata"""
+    return [
+        Document(page_content=doc.page_content, metadata={**doc.metadata, "score": round(score, 4)})
+        for doc, score in results
+    ]
+
+class KeepAliveOllamaEmbeddings(OllamaEmbeddings):
+    """
+    OllamaEmbeddings sending keep_alive with every request
+
+    The community client has no keep_alive field, so each embedding request
+    would reset the model to Ollama's default 5 minute unload timer, shorter
+    than the keep-alive ModelLifecycleManager assumes.
+    """
+    keep_alive: Optional[str] = None
+
+    @property
+    def _default_params(self) -> Dict[str, Any]:
+        params = super()._default_params
+        if self.keep_alive is not None:
+            params["keep_alive"] = self.keep_alive
+        return params
+
+def create_embeddings(query_cache_size: int = 2048,
+                      query_cache_path: Optional[str] = None,
+                      base_url: Optional[str] = None,
+                      keep_alive: Optional[str] = None) -> CachedEmbeddings:
+    """
+    Create the Ollama embeddings client wrapped in a query embedding cache
+
+    base_url defaults to $OLLAMA_BASE_URL, then the local Ollama server;
+    keep_alive to $KB_MODEL_KEEP_ALIVE, then 30m (as ModelLifecycleManager).
+    """
+    # Repeated questions are answered from the query embedding cache
+    query_cache = QueryEmbeddingCache(
+        max_size=query_cache_size,
+        disk_path=query_cache_path,
+        namespace="nomic-embed-text"
+    )
+    return CachedEmbeddings(
+        KeepAliveOllamaEmbeddings(
+            model="nomic-embed-text",
+            base_url=base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+            keep_alive=keep_alive or os.getenv("KB_MODEL_KEEP_ALIVE", "30m")
+        ),
+        query_cache
+    )
 
 class VectorStoreManager:
-    def __init__(self, persist_directory: str = "./data/vectorstore"):
+    def __init__(self, persist_directory: str = "./data/vectorstore",
+                 query_cache_size: int = 2048, query_cache_path: Optional[str] = None,
+                 embeddings: Optional[CachedEmbeddings] = None, base_url: Optional[str] = None,
+                 storage: Optional[str] = None, rescore_factor: int = 10, read_only: bool = False,
+                 dedup_threshold: Optional[float] = None):
         """
         Initialize vector store manager with FAISS and Ollama embeddings (LOCAL & FREE)
         
         Args:
             persist_directory: Directory to store FAISS data
+            query_cache_size: Query embeddings kept in the in-memory LRU cache
+            query_cache_path: Optional SQLite file to share cached query embeddings
+            embeddings: Shared embeddings client (e.g. one per tenant registry);
+                created from the cache settings above when not given
+            base_url: Ollama server URL for embeddings created here
+            storage: Vector precision in memory: float32, float16, int8 or binary
+                (defaults to $KB_VECTOR_STORAGE, then float32). Compressed
+                storage keeps a float32 copy on disk for rescoring.
+            rescore_factor: Candidates per result rescored at full precision
+            read_only: Serve a published index as is: the FAISS index is
+                memory-mapped, the docstore opened read-only and storage taken
+                from the files; adding and clearing are refused
+            dedup_threshold: Similarity at which new chunks are collapsed into
+                an existing near-duplicate instead of being embedded (defaults
+                to $KB_DEDUP_THRESHOLD, then 0.85; 0 turns dedup off)
         """
         self.persist_directory = persist_directory
         self.index_file = os.path.join(persist_directory, "faiss_index")
+        self.docstore_path = os.path.join(self.index_file, "docstore.sqlite")
+        self.read_only = read_only
+        self.rescore_factor = rescore_factor
         self.vectorstore = None
+        self.metadata_index = MetadataIndex()
+        # Filters matching at most this many chunks are scored exactly
+        self.exact_filter_threshold = 4096
+        
+        self.storage = storage or os.getenv("KB_VECTOR_STORAGE", "float32")
+        if self.storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown vector storage {self.storage!r}, expected one of {', '.join(STORAGE_TYPES)}")
+        self.quantized = self._quantized_storage(self.storage, rescore_factor)
+        
+        self.dedup_threshold = (dedup_threshold if dedup_threshold is not None
+                                else float(os.getenv("KB_DEDUP_THRESHOLD", "0.85")))
+        self.deduplicator = None
+        self.last_dedup = None
+        
+        self._memory_bytes = None
+        self._source_terms = {}
+        # Searches share the index; adding or clearing documents is exclusive
+        self._index_lock = ReadWriteLock(wait_metric="index_lock_wait")
+        # Adds run one at a time, so dedup decisions match the rows they refer to
+        self._add_lock = threading.Lock()
         
         # Use Ollama's LOCAL embeddings (no API needed!)
-        print("Initializing Ollama embeddings...")
-        self.embeddings = OllamaEmbeddings(
-            model="nomic-embed-text",
-            base_url="http://localhost:11434"
-        )
-        print("✅ Embeddings ready!")
+        if embeddings is None:
+            print("Initializing Ollama embeddings...")
+            embeddings = create_embeddings(query_cache_size, query_cache_path, base_url)
+            print("✅ Embeddings ready!")
+        self.embeddings = embeddings
+        self.query_cache = embeddings.cache
         
         # Create directory if it doesn't exist
-        os.makedirs(persist_directory, exist_ok=True)
+        if not read_only:
+            os.makedirs(persist_directory, exist_ok=True)
         
         # Try to load existing vectorstore
         self.load_vectorstore()
@@ -37,13 +158,39 @@ class VectorStoreManager:
     def load_vectorstore(self):
         """Load existing vectorstore if available"""
         try:
-            if os.path.exists(f"{self.index_file}.faiss"):
-                self.vectorstore = FAISS.load_local(
-                    self.index_file,
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
+            index_path = os.path.join(self.index_file, "index.faiss")
+            if os.path.exists(index_path) and os.path.exists(self.docstore_path):
+                if self.read_only:
+                    # Pages of the mapped index are shared by every process serving it
+                    # (IO_FLAG_MMAP_IFC maps flat/quantized codes; older FAISS only has IO_FLAG_MMAP)
+                    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+                    index = faiss.read_index(index_path, mmap_flag | faiss.IO_FLAG_READ_ONLY)
+                    docstore = SQLiteDocstore(self.docstore_path, read_only=True)
+                    self.storage = index_storage(index)
+                    self.quantized = self._quantized_storage(self.storage, self.rescore_factor)
+                else:
+                    index = faiss.read_index(index_path)
+                    docstore = SQLiteDocstore(self.docstore_path)
+                    docstore.truncate(index.ntotal)
+                self.vectorstore = FAISS(
+                    embedding_function=self.embeddings,
+                    index=index,
+                    docstore=docstore,
+                    index_to_docstore_id=docstore.id_map()
                 )
+                self.metadata_index.rebuild(self.vectorstore)
+                self._memory_bytes = None
+                self._source_terms = {}
+                if index_storage(self.vectorstore.index) != self.storage:
+                    self._convert_storage()
+                elif self.quantized and self.read_only:
+                    self.quantized.vectors = FullPrecisionVectors(self.quantized.vectors_path, index.d)
+                    self.quantized.vectors.open()
+                elif self.quantized:
+                    self.quantized.verify(self.vectorstore.index)
                 print(f"✅ Loaded existing vectorstore")
+            elif os.path.exists(index_path) and os.path.exists(os.path.join(self.index_file, "index.pkl")):
+                self._migrate_pickled_docstore()
             else:
                 print("📝 No existing vectorstore found. Will create new one.")
         except Exception as e:
@@ -60,78 +207,486 @@ class VectorStoreManager:
         Returns:
             True if successful, False otherwise
         """
+        if self.read_only:
+            print("⚠️ Vectorstore is read-only, cannot add documents")
+            return False
+        
         try:
-            print(f"Processing {len(documents)} documents...")
-            
-            if self.vectorstore is None:
-                # Create new vectorstore
-                print(f"Creating new vectorstore...")
-                self.vectorstore = FAISS.from_documents(
-                    documents=documents,
-                    embedding=self.embeddings
-                )
-                print(f"✅ Created vectorstore with {len(documents)} document chunks")
-            else:
-                # Add to existing vectorstore
-                print(f"Adding to existing vectorstore...")
-                self.vectorstore.add_documents(documents)
-                print(f"✅ Added {len(documents)} document chunks")
-            
-            # Save vectorstore
-            self.vectorstore.save_local(self.index_file)
-            print(f"✅ Vectorstore saved")
-            
-            return True
+            with self._add_lock:
+                return self._add_documents(documents)
         except Exception as e:
             import traceback
+            # Rebuilt from the docstore on the next add
+            self.deduplicator = None
             print(f"❌ Error adding documents: {str(e)}")
             print(f"Full error: {traceback.format_exc()}")
             return False
     
-    def search(self, query: str, k: int = 4) -> List[Document]:
-        """Search for relevant documents"""
+    def _add_documents(self, documents: List[Document]) -> bool:
+        print(f"Processing {len(documents)} documents...")
+        
+        signatures, duplicates = None, {}
+        if self.dedup_threshold > 0:
+            documents, signatures, duplicates = self._deduplicate(documents)
+        
+        # Embed before taking the index lock so searches keep running meanwhile
+        texts = [doc.page_content for doc in documents]
+        text_embeddings = list(zip(texts, self.embeddings.embed_documents(texts))) if texts else []
+        metadatas = [doc.metadata for doc in documents]
+        
+        with self._index_lock.write():
+            if text_embeddings:
+                start_id = 0 if self.vectorstore is None else self.vectorstore.index.ntotal
+                
+                if self.vectorstore is None:
+                    # Create new vectorstore
+                    print(f"Creating new vectorstore...")
+                    dimensions = len(text_embeddings[0][1])
+                    docstore = SQLiteDocstore(self.docstore_path)
+                    # Rows from an index that was never saved
+                    docstore.truncate(0)
+                    self.vectorstore = FAISS(
+                        embedding_function=self.embeddings,
+                        index=(self.quantized.create_index(dimensions) if self.quantized
+                               else create_index("float32", dimensions)),
+                        docstore=docstore,
+                        index_to_docstore_id={}
+                    )
+                else:
+                    # Add to existing vectorstore
+                    print(f"Adding to existing vectorstore...")
+                
+                if self.quantized is None:
+                    self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas)
+                else:
+                    self._add_quantized(text_embeddings, metadatas)
+                print(f"✅ Added {len(documents)} document chunks")
+                
+                self.metadata_index.add(start_id, metadatas)
+                if signatures:
+                    self.vectorstore.docstore.add_signatures(
+                        {start_id + i: signature.tobytes() for i, signature in enumerate(signatures)}
+                    )
+                self._memory_bytes = None
+                self._source_terms = {}
+            
+            if duplicates:
+                self._merge_duplicates(duplicates)
+        
+        # Save vectorstore
+        with self._index_lock.read():
+            self._save()
+        print(f"✅ Vectorstore saved")
+        
+        return True
+    
+    def _deduplicate(self, documents: List[Document]) -> tuple:
+        """Drop near-duplicate chunks before they are embedded (caller holds the add lock)"""
+        with metrics.span("dedup"):
+            if self.deduplicator is None:
+                self.deduplicator = self._load_deduplicator()
+            next_row = 0 if self.vectorstore is None else self.vectorstore.index.ntotal
+            signatures = [self.deduplicator.signature(doc.page_content) for doc in documents]
+            kept, signatures, duplicates = self.deduplicator.deduplicate(documents, signatures, next_row)
+        
+        collapsed = len(documents) - len(kept)
+        self.last_dedup = {
+            "chunks": len(documents),
+            "collapsed": collapsed,
+            "chars_saved": sum(len(doc.page_content) for doc in documents) - sum(len(doc.page_content) for doc in kept)
+        }
+        if collapsed:
+            metrics.increment("dedup_collapsed_chunks", collapsed)
+            print(f"🧹 Collapsed {collapsed} near-duplicate chunks of {len(documents)}")
+        return kept, signatures, duplicates
+    
+    def _load_deduplicator(self) -> ChunkDeduplicator:
+        """Near-duplicate index of the chunks already stored, from their saved signatures"""
+        deduplicator = ChunkDeduplicator(threshold=self.dedup_threshold)
         if self.vectorstore is None:
-            print("⚠️ Vectorstore is None, cannot search")
-            return []
+            return deduplicator
         
-        try:
-            results = self.vectorstore.similarity_search(query, k=k)
-            return results
-        except Exception as e:
-            print(f"❌ Error searching: {str(e)}")
-            return []
+        docstore = self.vectorstore.docstore
+        stored = docstore.signatures()
+        missing = [row for row in range(self.vectorstore.index.ntotal) if row not in stored]
+        # Indexes built before dedup existed get their signatures once
+        for start in range(0, len(missing), 1000):
+            documents = docstore.get_rows(missing[start:start + 1000])
+            computed = {row: deduplicator.signature(doc.page_content).tobytes() for row, doc in documents.items()}
+            docstore.add_signatures(computed)
+            stored.update(computed)
+        for row, signature in stored.items():
+            if row < self.vectorstore.index.ntotal:
+                deduplicator.add(row, np.frombuffer(signature, dtype=np.uint32))
+        return deduplicator
+    
+    def _merge_duplicates(self, duplicates: Dict[int, List[Document]]):
+        """Add collapsed chunks' sources to the stored chunks they duplicate (caller holds the write lock)"""
+        docstore = self.vectorstore.docstore
+        updated = {}
+        for row, stored in docstore.get_rows(list(duplicates)).items():
+            metadata = dict(stored.metadata)
+            for doc in duplicates[row]:
+                merge_reference(metadata, doc.metadata)
+            self.metadata_index.replace(row, stored.metadata, metadata)
+            updated[row] = metadata
+        docstore.update_metadata(updated)
+    
+    def get_dedup_stats(self) -> dict:
+        """Near-duplicate chunks collapsed since this manager was loaded"""
+        if self.deduplicator is None:
+            return {"enabled": self.dedup_threshold > 0}
+        return {"enabled": True, "threshold": self.dedup_threshold, **self.deduplicator.get_stats()}
+    
+    def _quantized_storage(self, storage: str, rescore_factor: int) -> Optional[QuantizedStorage]:
+        if storage == "float32":
+            return None
+        return QuantizedStorage(storage, os.path.join(self.index_file, "vectors.f32"),
+                                rescore_factor=rescore_factor)
+    
+    def _add_quantized(self, text_embeddings: List[tuple], metadatas: List[Dict]):
+        """Add to a compressed index, keeping the full-precision copy in step (caller holds the write lock)"""
+        matrix = np.array([embedding for _, embedding in text_embeddings], dtype=np.float32)
+        if self.vectorstore._normalize_L2:
+            faiss.normalize_L2(matrix)
+        self.quantized.before_add(self.vectorstore.index, matrix)
+        self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas)
+    
+    def _save(self):
+        """Commit the docstore, then replace the index file (caller holds the lock)"""
+        self.vectorstore.docstore.commit()
+        os.makedirs(self.index_file, exist_ok=True)
+        index_path = os.path.join(self.index_file, "index.faiss")
+        # Rows committed to the docstore beyond the index are dropped on load
+        faiss.write_index(self.vectorstore.index, index_path + ".tmp")
+        os.replace(index_path + ".tmp", index_path)
+        # Lets the app show stats before the index is loaded
+        summary_path = os.path.join(self.index_file, SUMMARY_FILE)
+        with open(summary_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"total_documents": self.vectorstore.index.ntotal, "sources": self.get_sources()}, f)
+        os.replace(summary_path + ".tmp", summary_path)
     
-    def search_with_score(self, query: str, k: int = 4) -> List[tuple]:
-        """Search for relevant documents with relevance scores"""
+    def _migrate_pickled_docstore(self):
+        """Move a docstore saved by FAISS.save_local (index.pkl) into SQLite, once"""
+        print("Migrating pickled docstore to SQLite...")
+        # The last time this index is unpickled; it was written by this app
+        legacy = FAISS.load_local(self.index_file, self.embeddings, allow_dangerous_deserialization=True)
+        docstore = SQLiteDocstore(self.docstore_path)
+        docstore.truncate(0)
+        docstore.add({
+            legacy.index_to_docstore_id[i]: legacy.docstore.search(legacy.index_to_docstore_id[i])
+            for i in range(legacy.index.ntotal)
+        })
+        legacy.docstore = docstore
+        self.vectorstore = legacy
+        self._save()
+        docstore.close()
+        os.remove(os.path.join(self.index_file, "index.pkl"))
+        self.load_vectorstore()
+    
+    def _convert_storage(self):
+        """Re-encode the loaded index after the configured storage changed"""
+        index = self.vectorstore.index
+        current = index_storage(index)
+        source = FullPrecisionVectors(os.path.join(self.index_file, "vectors.f32"), index.d)
+        if current == "float32":
+            matrix = index.reconstruct_n(0, index.ntotal)
+        elif len(source) >= index.ntotal:
+            matrix = source.rows(np.arange(index.ntotal))
+        else:
+            # Decoding compressed vectors would lose precision for good
+            print(f"⚠️ No full-precision vectors to convert {current} index to {self.storage}, keeping {current}")
+            self.storage = current
+            self.quantized = self._quantized_storage(current, 0)
+            return
+        
+        print(f"Converting vectorstore from {current} to {self.storage}...")
+        source.clear()
+        if self.quantized:
+            new_index = self.quantized.create_index(index.d)
+            self.quantized.before_add(new_index, matrix)
+        else:
+            new_index = create_index(self.storage, index.d, index.metric_type)
+        new_index.add(matrix)
+        self.vectorstore.index = new_index
+        self._memory_bytes = None
+        self._source_terms = {}
+        self._save()
+        print(f"✅ Converted vectorstore to {self.storage}")
+    
+    def search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Search for relevant documents, optionally restricted by metadata"""
         if self.vectorstore is None:
+            print("⚠️ Vectorstore is None, cannot search")
             return []
         
+        return [doc for doc, _ in self.search_with_score(query, k=k, filter=filter)]
+    
+    def search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                          relevance: bool = False) -> List[tuple]:
+        """Search for relevant documents with their FAISS distances (or relevance, see search_many_with_score)"""
+        return self.search_many_with_score([query], k=k, filter=filter, relevance=relevance)[0]
+    
+    def search_many(self, queries: List[str], k: int = 4,
+                    filter: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+        """Search for relevant documents for several queries at once"""
+        return [
+            [doc for doc, _ in results]
+            for results in self.search_many_with_score(queries, k=k, filter=filter)
+        ]
+    
+    def search_many_with_score(self, queries: List[str], k: int = 4,
+                               filter: Optional[Dict[str, Any]] = None,
+                               relevance: bool = False) -> List[List[tuple]]:
+        """
+        Search for several queries with one embedding call and one FAISS search
+        
+        Args:
+            queries: Query strings
+            k: Number of results per query
+            filter: Optional metadata filter, see MetadataIndex.select
+            relevance: Return cosine relevance (higher is better) instead of
+                the raw FAISS score, derived from the distance and the query's
+                length; exact for unit-length embeddings and close for models
+                whose vectors have near-constant length
+            
+        Returns:
+            One list of (Document, score) tuples per query, in query order
+        """
+        if self.vectorstore is None or not queries:
+            return [[] for _ in queries]
+        
         try:
-            results = self.vectorstore.similarity_search_with_score(query, k=k)
+            matrix = np.array(self.embeddings.embed_queries(queries), dtype=np.float32)
+            if self.vectorstore._normalize_L2:
+                faiss.normalize_L2(matrix)
+            
+            with self._index_lock.read():
+                with metrics.span("faiss_search"):
+                    scores, indices = self._search_vectors(matrix, k, filter)
+                if relevance:
+                    scores = self._relevance(scores, matrix)
+                
+                # Only the hits' text is read from the docstore
+                documents = self._fetch_documents(indices)
+                results = []
+                for row_scores, row_indices in zip(scores, indices):
+                    results.append([
+                        (documents[i], float(score))
+                        for score, i in zip(row_scores, row_indices)
+                        if i != -1
+                    ])
             return results
         except Exception as e:
             print(f"❌ Error searching: {str(e)}")
-            return []
+            return [[] for _ in queries]
+    
+    def _relevance(self, scores: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Cosine relevance from FAISS scores, taking document vectors to be as long as the query"""
+        squared_norms = np.maximum((matrix * matrix).sum(axis=1, keepdims=True), 1e-12)
+        if self.vectorstore.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            return scores / squared_norms
+        return 1.0 - scores / (2.0 * squared_norms)
+    
+    def _fetch_documents(self, indices: np.ndarray) -> Dict[int, Document]:
+        """Documents of the given FAISS rows (caller holds the read lock)"""
+        rows = sorted({int(i) for i in np.ravel(indices) if i != -1})
+        docstore = self.vectorstore.docstore
+        if isinstance(docstore, SQLiteDocstore):
+            return docstore.get_rows(rows)
+        return {i: docstore.search(self.vectorstore.index_to_docstore_id[i]) for i in rows}
+    
+    def _search_vectors(self, matrix: np.ndarray, k: int,
+                        filter: Optional[Dict[str, Any]] = None) -> tuple:
+        """
+        Run the FAISS search, restricting candidates before the search
+        
+        Small candidate sets are scored exactly against just their vectors,
+        which is cheaper than a full scan; larger ones are passed to FAISS as
+        an ID selector so excluded rows are skipped during the search.
+        """
+        index = self.vectorstore.index
+        if not filter:
+            if self.quantized:
+                return self.quantized.search(index, matrix, k)
+            return index.search(matrix, k)
+        
+        ids = self.metadata_index.select(filter)
+        if len(ids) == 0:
+            return (np.zeros((len(matrix), 0), dtype=np.float32),
+                    np.zeros((len(matrix), 0), dtype=np.int64))
+        
+        if self.quantized:
+            return self.quantized.search(index, matrix, k, ids, self.exact_filter_threshold)
+        
+        if len(ids) <= self.exact_filter_threshold:
+            scores, positions = faiss.knn(
+                matrix, index.reconstruct_batch(ids), min(k, len(ids)), metric=index.metric_type
+            )
+            return scores, np.where(positions == -1, -1, ids[positions])
+        
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+        return index.search(matrix, k, params=params)
+    
+    def get_sources(self) -> List[str]:
+        """List the source documents in the knowledge base"""
+        return sorted(self.metadata_index.values("source"))
+    
+    def source_terms(self, sources: List[str]) -> set:
+        """
+        Stemmed content words of the indexed text of some documents
+        
+        Cached per document until the index changes; lets curated answers
+        be checked against what a knowledge base actually says.
+        """
+        terms = set()
+        with self._index_lock.read():
+            if self.vectorstore is None:
+                return terms
+            for source in sources:
+                if source not in self._source_terms:
+                    rows = self.metadata_index.select({"source": source}).tolist()
+                    documents = self.vectorstore.docstore.get_rows(rows) if rows else {}
+                    self._source_terms[source] = set().union(
+                        *(document_terms(doc.page_content) for doc in documents.values())
+                    )
+                terms |= self._source_terms[source]
+        return terms
+    
+    def expand_context(self, documents: List[Document], window: int = 1,
+                       max_tokens: Optional[int] = None) -> List[Document]:
+        """
+        Widen search hits to their neighboring chunks for the prompt
+        
+        Each hit grows by up to window chunks on each side, nearest first,
+        without leaving its section (page or heading block) and while it
+        fits its share of max_tokens. Hits whose ranges touch are merged
+        into one passage, and the overlap repeated between chunks is dropped.
+        Neighbors are found through the metadata index in O(1) and fetched
+        in one docstore query.
+        
+        Args:
+            documents: Search hits, best first
+            window: Neighbors to add on each side of a hit
+            max_tokens: Token budget for all passages together (None: no limit)
+            
+        Returns:
+            One Document per passage, best first; metadata is the best hit's
+            plus "chunk_range": [first, last] chunk_id
+        """
+        if not documents or window <= 0:
+            return documents
+        
+        with metrics.span("context_expansion"), self._index_lock.read():
+            if self.vectorstore is None:
+                return documents
+            index = self.metadata_index
+            
+            # Neighbor rows of every hit, nearest first
+            plans, rows = [], set()
+            for doc in documents:
+                source, chunk_id = doc.metadata.get("source"), doc.metadata.get("chunk_id")
+                if not isinstance(chunk_id, int) or index.chunk_row(source, chunk_id) is None:
+                    plans.append((doc, []))
+                    continue
+                first, last = index.section_bounds(source, doc.metadata.get("section")) or (
+                    chunk_id - window, chunk_id + window
+                )
+                neighbors = [
+                    (n, index.chunk_row(source, n))
+                    for distance in range(1, window + 1)
+                    for n in (chunk_id + distance, chunk_id - distance)
+                    if first <= n <= last and index.chunk_row(source, n) is not None
+                ]
+                plans.append((doc, neighbors))
+                rows.update(row for _, row in neighbors)
+            fetched = self._fetch_documents(sorted(rows))
+        
+        # Grow each hit into a contiguous range within its share of the budget
+        counter = get_token_counter()
+        budget = max_tokens // len(documents) if max_tokens else None
+        passages = []
+        for doc, neighbors in plans:
+            chunk_id = doc.metadata.get("chunk_id")
+            texts = {chunk_id: doc.page_content}
+            low = high = chunk_id
+            tokens = counter.count(doc.page_content)
+            for n, row in neighbors:
+                neighbor = fetched.get(row)
+                if neighbor is None or n not in (low - 1, high + 1):
+                    continue
+                cost = counter.count(neighbor.page_content)
+                if budget is not None and tokens + cost > budget:
+                    continue
+                texts[n] = neighbor.page_content
+                low, high, tokens = min(low, n), max(high, n), tokens + cost
+            
+            # Merge with an earlier (better) passage of the same section it touches
+            key = (doc.metadata.get("source"), doc.metadata.get("section"))
+            for passage in passages:
+                if neighbors and passage["key"] == key and low <= passage["high"] + 1 and high >= passage["low"] - 1:
+                    passage["texts"].update(texts)
+                    passage["low"], passage["high"] = min(passage["low"], low), max(passage["high"], high)
+                    break
+            else:
+                passages.append({"key": key, "doc": doc, "texts": texts, "low": low, "high": high})
+        
+        expanded = []
+        for passage in passages:
+            if len(passage["texts"]) == 1:
+                expanded.append(passage["doc"])
+                continue
+            text = None
+            for n in range(passage["low"], passage["high"] + 1):
+                text = passage["texts"][n] if text is None else join_overlapping(text, passage["texts"][n])
+            expanded.append(Document(
+                page_content=text,
+                metadata={**passage["doc"].metadata, "chunk_range": [passage["low"], passage["high"]]}
+            ))
+        return expanded
     
-    def get_retriever(self, k: int = 4):
-        """Get a retriever object for use with chains"""
+    def get_retriever(self, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                      window: int = 0, max_context_tokens: Optional[int] = None):
+        """
+        Get a retriever object for use with chains
+        
+        Args:
+            k: Number of documents to retrieve
+            filter: Optional metadata filter to scope retrieval,
+                e.g. {"source": "it_security_policy.txt"}
+            window: Neighboring chunks added on each side of a hit when the
+                chain builds its prompt (see expand_context)
+            max_context_tokens: Token budget of the expanded context
+        """
         if self.vectorstore is None:
             print("⚠️ Vectorstore is None, cannot create retriever")
             return None
         
-        return self.vectorstore.as_retriever(
-            search_kwargs={"k": k}
-        )
+        return VectorStoreManagerRetriever(manager=self, k=k, filter=filter, window=window,
+                                           max_context_tokens=max_context_tokens)
     
     def clear_vectorstore(self):
         """Clear all documents from vectorstore"""
+        if self.read_only:
+            print("⚠️ Vectorstore is read-only, cannot clear it")
+            return False
+        
         try:
-            self.vectorstore = None
-            
             import shutil
-            if os.path.exists(self.persist_directory):
-                shutil.rmtree(self.persist_directory)
-                os.makedirs(self.persist_directory, exist_ok=True)
+            with self._add_lock, self._index_lock.write():
+                if self.vectorstore is not None and isinstance(self.vectorstore.docstore, SQLiteDocstore):
+                    self.vectorstore.docstore.close()
+                self.vectorstore = None
+                self.deduplicator = None
+                self.metadata_index.clear()
+                if self.quantized and self.quantized.vectors is not None:
+                    self.quantized.vectors.clear()
+                self._memory_bytes = None
+                self._source_terms = {}
+                
+                if os.path.exists(self.persist_directory):
+                    shutil.rmtree(self.persist_directory)
+                    os.makedirs(self.persist_directory, exist_ok=True)
             
             print("✅ Vectorstore cleared successfully")
             return True
@@ -145,8 +700,74 @@ class VectorStoreManager:
             return {"total_documents": 0, "status": "empty"}
         
         try:
-            count = self.vectorstore.index.ntotal
-            return {"total_documents": count, "status": "active"}
+            index = self.vectorstore.index
+            return {
+                "total_documents": index.ntotal,
+                "status": "active",
+                "storage": self.storage,
+                "bytes_per_vector": bytes_per_vector(index)
+            }
         except Exception as e:
             print(f"Error getting stats: {str(e)}")
-            return {"total_documents": 0, "status": "unknown"}
\ No newline at end of file
+            return {"total_documents": 0, "status": "unknown"}
+    
+    def get_cache_stats(self) -> dict:
+        """Get query embedding cache statistics"""
+        return self.query_cache.get_stats()
+    
+    def estimate_memory_bytes(self) -> int:
+        """Estimate resident memory of the loaded index and docstore"""
+        if self.vectorstore is None:
+            return 0
+        
+        if self._memory_bytes is None:
+            index = self.vectorstore.index
+            vector_bytes = index.ntotal * bytes_per_vector(index)
+            docstore = self.vectorstore.docstore
+            if isinstance(docstore, SQLiteDocstore):
+                # Text stays on disk; only the row -> id map is resident
+                text_bytes = len(self.vectorstore.index_to_docstore_id) * 120
+            else:
+                text_bytes = sum(
+                    len(doc.page_content) + len(str(doc.metadata))
+                    for doc in docstore._dict.values()
+                )
+            self._memory_bytes = vector_bytes + text_bytes
+        return self._memory_bytes
+
+class VectorStoreManagerRetriever(BaseRetriever):
+    """Retriever that searches through VectorStoreManager (cache and metadata filters included)"""
+    
+    manager: Any
+    k: int = 4
+    filter: Optional[Dict[str, Any]] = None
+    window: int = 0
+    max_context_tokens: Optional[int] = None
+    
+    def current_manager(self) -> VectorStoreManager:
+        return self.manager
+    
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return with_scores(self.current_manager().search_with_score(query, k=self.k, filter=self.filter,
+                                                                    relevance=True))
+    
+    def expand(self, documents: List[Document]) -> List[Document]:
+        """Retrieved chunks widened to their neighbors, for the prompt"""
+        return self.current_manager().expand_context(documents, self.window, self.max_context_tokens)
+
+class TenantRetriever(VectorStoreManagerRetriever):
+    """
+    Retriever looking its tenant's index up in the registry on every query
+    
+    It holds no reference to the index, so one the registry evicts is freed
+    even while sessions keep their chains, and searches reach the reloaded
+    index that new uploads go to.
+    """
+    
+    manager: Any = None
+    registry: Any
+    tenant: str
+    
+    def current_manager(self) -> VectorStoreManager:
+        return self.registry.get(self.tenant)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Warm-up - Run slow initialization steps in a background thread
+"""
+
+import importlib
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+from utils.metrics import metrics
+
+class Warmup:
+    def __init__(self, steps: List[Tuple[str, Callable]]):
+        """
+        Run steps in order on a daemon thread, timing each one
+
+        Requests needing a step's result simply call it again: the steps are
+        expected to be idempotent (cached imports, registry loads), so a
+        request arriving early waits for the warm-up instead of repeating it.
+
+        Args:
+            steps: (name, function) pairs, recorded as warmup_<name> metrics
+        """
+        self.steps = steps
+        self.timings = {}
+        self.errors = {}
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kb-warmup", daemon=True)
+
+    def start(self) -> "Warmup":
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+    def _run(self):
+        for name, step in self.steps:
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.errors[name] = str(e)
+                print(f"⚠️ Warm-up step '{name}' failed: {str(e)}")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.timings[name] = round(elapsed_ms, 1)
+            metrics.observe(f"warmup_{name}", elapsed_ms)
+        self.done.set()
+
+    def get_stats(self) -> Dict:
+        return {"done": self.done.is_set(), "timings_ms": dict(self.timings), "errors": dict(self.errors)}
+
+def import_modules(*names: str) -> Callable:
+    """Warm-up step importing modules (LangChain, FAISS, PDF parsing) ahead of first use"""
+    def step():
+        for name in names:
+            importlib.import_module(name)
+    return step